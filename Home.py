@@ -3,8 +3,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
-import base64
-from PIL import Image
+from utils import asset_url, finish_page_timing, start_page_timing, timed_section
 
 # Configure Streamlit page
 st.set_page_config(
@@ -12,33 +11,12 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("Home")
 
-# Paths to the original and new images
-original_image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-new_image_path = os.path.join(os.getcwd(), 'plots', 'wheat_field.jpg')
-
-# Open both images
-original_image = Image.open(original_image_path)
-new_image = Image.open(new_image_path)
-
-# Resize the new image to match the dimensions of the original
-new_image_resized = new_image.resize(original_image.size, Image.Resampling.LANCZOS)
-
-# Save the resized image
-new_image_resized_path = os.path.join(os.getcwd(), 'plots', 'Mining_resized.jpg')
-new_image_resized.save(new_image_resized_path)
-
-# Use the resized image for the dashboard
-image_path = new_image_resized_path
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero image: the wheat field at the hero's 2200x900 size, prebuilt once as a compressed
+# variant (keyed by source content) and referenced by URL from the asset registry
+with timed_section("hero image"):
+    hero_image_url = asset_url("hero")
 
 # Update the font sizes by increasing them by 2 levels
 st.markdown(f"""
@@ -80,7 +58,7 @@ st.markdown(f"""
             background-image: linear-gradient(
                 rgba(0, 0, 0, 0.5),
                 rgba(0, 0, 0, 0.5)
-            ), url("{image_base64}");
+            ), url("{hero_image_url}");
             background-size: cover; /* Ensure image covers the entire container */
             background-position: center top; /* Ensure background starts from the top and stays centered */
             background-repeat: no-repeat;
@@ -427,37 +405,20 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-import streamlit as st
-from PIL import Image
-import base64
-import os
-
-# Function to encode an image to base64
-def image_to_base64(image):
-    with open(image, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Paths to the images
-oil_digger_path = os.path.join(os.getcwd(), 'plots', 'oil_digger.jpg')
-wheat_field_path = os.path.join(os.getcwd(), 'plots', 'wheat_field.jpg')
-Mining_path = os.path.join(os.getcwd(), 'plots', 'Mining.jpg')
-
-# Check if the image files exist
-if not os.path.exists(oil_digger_path) or not os.path.exists(wheat_field_path):
+# Collage images, downscaled to the collage's 1200px width
+try:
+    oil_digger_url = asset_url("oil_digger")
+    wheat_field_url = asset_url("wheat_field")
+    Mining_url = hero_image_url
+except FileNotFoundError:
     st.error("One or more image files are missing.")
-else:
-    # Convert images to base64
-    oil_digger_base64 = image_to_base64(oil_digger_path)
-    wheat_field_base64 = image_to_base64(wheat_field_path)
-    Mining_base64 = image_to_base64(Mining_path)
 
     # Custom CSS for styling the About section
 st.markdown(f"""
     <style>
         /* About Section Container */
         .about-container {{
-            background: linear-gradient(rgba(255, 255, 255, 0.9), rgba(255, 255, 255, 0.9)), url("{Mining_base64}");
+            background: linear-gradient(rgba(255, 255, 255, 0.9), rgba(255, 255, 255, 0.9)), url("{Mining_url}");
             background-size: cover;
             background-position: center;
             padding: 4rem 2rem;
@@ -604,13 +565,13 @@ st.markdown(f"""
         </div>
         <div class="image-collage">
             <div class="image-1">
-                <img src="{oil_digger_base64}" alt="Oil Digger" class="collage-image">
+                <img src="{oil_digger_url}" alt="Oil Digger" class="collage-image">
             </div>
             <div class="image-2">
-                <img src="{wheat_field_base64}" alt="Wheat Field" class="collage-image">
+                <img src="{wheat_field_url}" alt="Wheat Field" class="collage-image">
             </div>
             <div class="image-3">
-                <img src="{Mining_base64}" alt="Mining" class="collage-image">
+                <img src="{Mining_url}" alt="Mining" class="collage-image">
             </div>
         </div>
     </div>
@@ -635,3 +596,5 @@ st.markdown(f"""
             Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</div>
     </div>
 """, unsafe_allow_html=True)
+
+finish_page_timing()
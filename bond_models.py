@@ -0,0 +1,855 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy import special, stats
+
+import utils
+from utils import _file_lock, _read_parquet_cached, _write_parquet_atomic, get_fred_series
+
+# Percentiles reported for each maturity's impact distribution
+IMPACT_PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+# Curve factors in order of explained variance (level, slope, curvature, ...)
+FACTOR_NAMES = ["Shift", "Twist", "Flex", "Wiggle"]
+# Fitted factor models kept in memory, most recently used last
+FACTOR_MODEL_CACHE_SIZE = 8
+
+# CIR calibration: short-rate series, observation spacing in years, rolling window length
+# and spacing in observations, and the maturities (years) priced off the latest fit
+CIR_SERIES = "DTB3"
+CIR_DT = 1 / 252
+CIR_WINDOW = 756
+CIR_STEP = 21
+CIR_MATURITIES = [1 / 12, 0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30]
+CIR_FORECAST_STEPS = 21
+# Rates are floored so sqrt(r) and the transition variance stay positive near zero
+CIR_RATE_FLOOR = 1e-4
+CIR_MAX_ITER = 50
+CIR_TOLERANCE = 1e-7
+# CIR Monte Carlo: default paths, paths simulated per chunk, histogram bins kept per step
+# (quantiles are read off these, so memory doesn't grow with the path count), and the
+# quantiles drawn as fan chart bands
+CIR_MC_PATHS = 50_000
+CIR_MC_CHUNK = 50_000
+CIR_MC_BINS = 1024
+CIR_MC_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+CIR_MC_CACHE_SIZE = 8
+
+_factor_models = OrderedDict()
+_factor_models_lock = threading.Lock()
+_cir_calibrations = {}
+_cir_lock = threading.Lock()
+_cir_simulations = OrderedDict()
+# Per-key locks for simulations being built, so concurrent sessions wait for one run
+_cir_building = {}
+
+
+def _poisson_ppf(v, u):
+    """
+    Poisson inverse CDF by lookup: the CDF is tabulated once over the support the
+    clipped uniforms can reach and each u is placed with a binary search.
+    """
+    lo, hi = stats.poisson.ppf([1e-12, 1 - 1e-12], v)
+    k = np.arange(lo, hi + 1)
+    cdf = stats.poisson.cdf(k, v)
+    return k[np.minimum(np.searchsorted(cdf, u), len(k) - 1)]
+
+
+def _gamma2_ppf(v, u):
+    """
+    Gamma(shape 2) inverse CDF. The CDF is 1 - (1 + x)e^-x, so x solves
+    log1p(x) - x = log(1 - u); four vectorized Newton steps from an asymptotic start
+    agree with scipy's gammaincinv to ~1e-10 relative at a fraction of its cost.
+    """
+    target = np.log1p(-u)
+    x = np.where(u < 0.5, np.sqrt(2 * u) * (1 + np.sqrt(2 * u) / 3), np.log1p(-target) - target)
+    for _ in range(4):
+        x += (np.log1p(x) - x - target) * (1 + x) / x
+    return x * v
+
+
+# Shock distributions: inverse CDF for inverse-transform sampling, and the mean and
+# variance of a single shock, all in terms of the volatility input
+SHOCK_DISTRIBUTIONS = {
+    "Normal": (lambda v, u: special.ndtri(u) * v, lambda v: (0.0, v ** 2)),
+    "Uniform": (lambda v, u: (2 * u - 1) * v, lambda v: (0.0, v ** 2 / 3)),
+    "Poisson": (_poisson_ppf, lambda v: (v, v)),
+    "Exponential": (lambda v, u: -np.log1p(-u) * v, lambda v: (v, v ** 2)),
+    "Gamma": (_gamma2_ppf, lambda v: (2 * v, 2 * v ** 2)),
+}
+SHOCK_SAMPLERS = ["Pseudo-random", "Sobol"]
+# Independent replicates a scenario run is split into; the spread of their estimates
+# is the convergence diagnostic
+SHOCK_BATCHES = 8
+
+
+# Generate Random Shock Vector
+def generate_shocks(volatility, size, distribution_type, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    if distribution_type == "Normal":
+        return rng.normal(0, volatility, size=size)
+    elif distribution_type == "Uniform":
+        return rng.uniform(-volatility, volatility, size=size)
+    elif distribution_type == "Poisson":
+        return rng.poisson(volatility, size=size)  # Poisson distribution
+    elif distribution_type == "Exponential":
+        return rng.exponential(volatility, size=size)  # Exponential distribution
+    elif distribution_type == "Gamma":
+        return rng.gamma(shape=2, scale=volatility, size=size)  # Gamma distribution
+    raise ValueError(f"Unknown distribution type: {distribution_type}")
+
+
+def generate_uniforms(rng, n, d, sampler="Pseudo-random"):
+    """
+    (n, d) points in the unit cube: pseudo-random, or a scrambled Sobol sequence
+    (n should then be a power of two to keep its balance).
+    """
+    if sampler == "Sobol":
+        return stats.qmc.Sobol(d, scramble=True, seed=rng).random(n)
+    if sampler == "Pseudo-random":
+        return rng.random((n, d))
+    raise ValueError(f"Unknown sampler: {sampler}")
+
+
+def draw_shock_batch(rng, n, d, volatility, distribution_type, sampler="Pseudo-random", antithetic=False):
+    """
+    One independent batch of (n, d) factor shocks. Sobol and antithetic draws go through
+    the inverse CDF, antithetic pairs mirroring u as 1 - u.
+    """
+    if distribution_type not in SHOCK_DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution type: {distribution_type}")
+    if sampler == "Pseudo-random" and not antithetic:
+        return generate_shocks(volatility, (n, d), distribution_type, rng)
+    u = generate_uniforms(rng, n // 2 if antithetic else n, d, sampler)
+    if antithetic:
+        u = np.vstack([u, 1 - u])
+    # Keep the inverse CDF finite at the cube's edges
+    u = np.clip(u, 1e-12, 1 - 1e-12)
+    return SHOCK_DISTRIBUTIONS[distribution_type][0](volatility, u)
+
+
+def exact_impact_moments(B, volatility, distribution_type):
+    """
+    Closed-form mean and std of each maturity's impact: impacts are a linear map of
+    independent shocks, so they follow from a single shock's mean and variance.
+    """
+    if distribution_type not in SHOCK_DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution type: {distribution_type}")
+    mean, variance = SHOCK_DISTRIBUTIONS[distribution_type][1](volatility)
+    loadings = np.asarray(B, dtype=float)
+    return mean * loadings.sum(axis=0), np.sqrt(variance * (loadings ** 2).sum(axis=0))
+
+
+def _impact_moments(shocks, B):
+    """
+    Mean and std of each maturity's impact over one batch of shocks.
+    """
+    impacts = shocks @ B
+    return impacts.mean(axis=0), impacts.std(axis=0)
+
+
+def _sorted_percentiles(sorted_rows, q):
+    """
+    Linear-interpolated percentiles (numpy's default method) of row-wise sorted data.
+    """
+    positions = np.asarray(q, dtype=float) / 100 * (sorted_rows.shape[1] - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, sorted_rows.shape[1] - 1)
+    frac = positions - lower
+    return sorted_rows[:, lower] * (1 - frac) + sorted_rows[:, upper] * frac
+
+
+def summarize_impacts(impacts, columns, tail=0.05):
+    """
+    Per-maturity statistics of an (n_maturities, n_simulations) impact matrix:
+    mean, std, percentiles and the expected impact in each tail beyond `tail`.
+    """
+    impacts = np.sort(impacts, axis=1)
+    n_tail = max(int(np.ceil(impacts.shape[1] * tail)), 1)
+    percentiles = _sorted_percentiles(impacts, IMPACT_PERCENTILES)
+
+    summary = pd.DataFrame(
+        {
+            "Mean": impacts.mean(axis=1),
+            "Std": impacts.std(axis=1),
+            **{f"P{p}": percentiles[:, i] for i, p in enumerate(IMPACT_PERCENTILES)},
+            # Tail expectations (expected shortfall on each side)
+            f"Lower Tail Mean ({tail:.0%})": impacts[:, :n_tail].mean(axis=1),
+            f"Upper Tail Mean ({tail:.0%})": impacts[:, -n_tail:].mean(axis=1),
+        },
+        index=columns,
+    )
+    return summary
+
+
+def simulate_curve_shocks(B, volatility, distribution_type, num_simulations, tail=0.05, sampler="Pseudo-random",
+                          antithetic=False, seed=None, batches=SHOCK_BATCHES, diagnostics=False):
+    """
+    Run the yield curve shock scenario.
+
+    Factor shocks are drawn in `batches` independent replicates, each from its own
+    stream of a per-run Generator (pseudo-random or scrambled Sobol, optionally
+    antithetic), and mapped onto the curve with one matrix product against the factor
+    loadings `B` (a factors x maturities DataFrame).
+
+    Returns the per-maturity summary from `summarize_impacts`, the impacts of the first
+    simulation, and (with `diagnostics`, else None) a convergence diagnostic: the standard error of the mean and std
+    estimates across batches, the variance reduction against plain Monte Carlo with the
+    same number of draws (NaN where the batches agree to rounding, e.g. antithetic
+    means of symmetric shocks), and the closed-form values from `exact_impact_moments`.
+    """
+    d = B.shape[0]
+    per_batch = int(np.ceil(num_simulations / batches))
+    if sampler == "Sobol":
+        # Sobol points are balanced in powers of two (and antithetic halves need one too)
+        per_batch = 2 ** int(np.ceil(np.log2(max(per_batch, 2))))
+    elif antithetic:
+        per_batch += per_batch % 2
+    streams = np.random.SeedSequence(seed).spawn(batches)
+    shocks = [
+        draw_shock_batch(np.random.default_rng(stream), per_batch, d, volatility, distribution_type, sampler, antithetic)
+        for stream in streams
+    ]
+    loadings = B.values
+    moments = np.array([_impact_moments(batch, loadings) for batch in shocks]) if diagnostics else None
+
+    shocks = np.vstack(shocks)
+    # Maturities x simulations, so each maturity's draws are contiguous for the sort
+    impacts = loadings.T @ shocks.T
+    first_impacts = impacts[:, 0].copy()
+    summary = summarize_impacts(impacts, B.columns, tail=tail)
+    if not diagnostics:
+        return summary, first_impacts, None
+
+    n = impacts.shape[1]
+    mean_se = moments[:, 0].std(axis=0, ddof=1) / np.sqrt(batches)
+    std_se = moments[:, 1].std(axis=0, ddof=1) / np.sqrt(batches)
+    # Plain Monte Carlo standard errors for n independent draws
+    squares = impacts - impacts.mean(axis=1, keepdims=True)
+    np.square(squares, out=squares)
+    variance = squares.mean(axis=1)
+    fourth = np.einsum("ij,ij->i", squares, squares) / n
+    plain_mean_se = np.sqrt(variance / n)
+    plain_std_se = np.sqrt(np.maximum(fourth - variance ** 2, 0) / (4 * variance * n))
+    exact_mean, exact_std = exact_impact_moments(loadings, volatility, distribution_type)
+    # Below this the batch spread is rounding noise and the ratio means nothing
+    resolution = np.finfo(float).eps * np.sqrt(n) * (np.abs(exact_mean) + exact_std)
+    diagnostics = pd.DataFrame(
+        {
+            "Mean": summary["Mean"].values,
+            "Exact Mean": exact_mean,
+            "Mean SE": mean_se,
+            "Mean Variance Reduction": np.where(mean_se > resolution, plain_mean_se ** 2 / np.maximum(mean_se, resolution) ** 2, np.nan),
+            "Std": summary["Std"].values,
+            "Exact Std": exact_std,
+            "Std SE": std_se,
+            "Std Variance Reduction": np.where(std_se > resolution, plain_std_se ** 2 / np.maximum(std_se, resolution) ** 2, np.nan),
+        },
+        index=B.columns,
+    )
+    diagnostics.attrs["draws"] = n
+    diagnostics.attrs["batches"] = batches
+    return summary, first_impacts, diagnostics
+
+
+def rates_fingerprint(rates):
+    """
+    Content hash of a rates window (index, columns and values).
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(rates, index=True).values.tobytes())
+    digest.update("|".join(map(str, rates.columns)).encode())
+    return digest.hexdigest()
+
+
+class CurveFactorModel:
+    """
+    Eigen-factor model of the treasury curve.
+
+    Covariance, the symmetric eigen-decomposition (sorted by descending eigenvalue)
+    and the factor loadings are each computed once on first use and then reused.
+    Build instances through `get_curve_factor_model` so reruns on the same data share one.
+    """
+
+    def __init__(self, rates, fingerprint=None):
+        self.rates = rates
+        self.fingerprint = fingerprint or rates_fingerprint(rates)
+        self._covariance = None
+        self._eigen = None
+        self._loadings = {}
+
+    @property
+    def covariance(self):
+        if self._covariance is None:
+            self._covariance = self.rates.cov()
+        return self._covariance
+
+    @property
+    def eigen(self):
+        """
+        (eigenvalues, eigenvectors) with eigenvectors as columns, largest eigenvalue first.
+        """
+        if self._eigen is None:
+            eigenvalues, eigenvectors = np.linalg.eigh(self.covariance.values)
+            order = np.argsort(eigenvalues)[::-1]
+            # Pairwise covariance of gappy series can leave tiny negative eigenvalues
+            eigenvalues = np.clip(eigenvalues[order], 0, None)
+            eigenvectors = eigenvectors[:, order]
+            # Eigenvector signs are arbitrary; make the largest component positive so
+            # factor directions stay stable between refits
+            rows = np.abs(eigenvectors).argmax(axis=0)
+            eigenvectors = eigenvectors * np.sign(eigenvectors[rows, np.arange(eigenvectors.shape[1])])
+            self._eigen = (eigenvalues, eigenvectors)
+        return self._eigen
+
+    @property
+    def explained_variance_ratio(self):
+        eigenvalues = self.eigen[0]
+        return eigenvalues / eigenvalues.sum()
+
+    def loadings(self, n_factors=4):
+        """
+        Factors x maturities matrix B = sqrt(Lambda) V^T for the leading `n_factors`.
+        """
+        if n_factors not in self._loadings:
+            eigenvalues, eigenvectors = self.eigen
+            B = np.diag(np.sqrt(eigenvalues[:n_factors])) @ eigenvectors[:, :n_factors].T
+            names = FACTOR_NAMES[:n_factors] + [f"Factor {i + 1}" for i in range(len(FACTOR_NAMES), n_factors)]
+            self._loadings[n_factors] = pd.DataFrame(B, index=names, columns=self.rates.columns)
+        return self._loadings[n_factors]
+
+
+def get_curve_factor_model(rates):
+    """
+    Factor model for `rates`, reused for as long as the rates window is unchanged.
+    """
+    fingerprint = rates_fingerprint(rates)
+    with _factor_models_lock:
+        model = _factor_models.get(fingerprint)
+        if model is None:
+            model = _factor_models[fingerprint] = CurveFactorModel(rates, fingerprint)
+            while len(_factor_models) > FACTOR_MODEL_CACHE_SIZE:
+                _factor_models.popitem(last=False)
+        _factor_models.move_to_end(fingerprint)
+    return model
+
+
+# CIR short-rate model: dr = a (b - r) dt + sigma sqrt(r) dW
+def cir_windows(n, window=CIR_WINDOW, step=CIR_STEP):
+    """
+    End positions (exclusive) of the rolling windows over `n` observations. Windows are
+    anchored at the start of the series, so they stay put as new observations arrive,
+    and the last one always ends at the latest observation.
+    """
+    if n < window:
+        return np.array([n]) if n > 2 else np.array([], dtype=int)
+    ends = np.arange(window, n + 1, step)
+    return ends if ends[-1] == n else np.r_[ends, n]
+
+
+def cir_ols(rates, ends, window=CIR_WINDOW, dt=CIR_DT):
+    """
+    Closed-form OLS estimates of (a, b, sigma) for every window ending at `ends`, from the
+    Euler discretization (r' - r) / sqrt(r) = a b dt / sqrt(r) - a dt sqrt(r) + sigma sqrt(dt) e.
+    Window sums come from prefix sums, so all windows cost one pass over the data.
+    """
+    r0, r1 = rates[:-1], rates[1:]
+    root = np.sqrt(r0)
+    z1, z2, y = dt / root, dt * root, (r1 - r0) / root
+    prefix = np.vstack([np.zeros(6), np.cumsum(np.column_stack([z1 * z1, z2 * z2, z1 * y, z2 * y, y * y,
+                                                                 np.ones_like(y)]), axis=0)])
+    starts = np.maximum(ends - window, 0)
+    # Window [start, end) holds the transitions start .. end - 2
+    s11, s22, s1y, s2y, syy, n = (prefix[ends - 1] - prefix[starts]).T
+    s12 = n * dt * dt
+    det = s11 * s22 - s12 * s12
+    beta1 = (s22 * s1y - s12 * s2y) / det
+    beta2 = (s11 * s2y - s12 * s1y) / det
+    residual = np.maximum(syy - beta1 * s1y - beta2 * s2y, 0) / np.maximum(n - 2, 1)
+    a = -beta2
+    # Without mean reversion in the window, start from slow reversion to the window mean
+    means = (np.cumsum(np.r_[0, rates])[ends] - np.cumsum(np.r_[0, rates])[starts]) / (ends - starts)
+    b = np.where(a > 0, beta1 / np.where(a > 0, a, 1), means)
+    a = np.where(a > 0, a, 0.05)
+    b = np.clip(b, CIR_RATE_FLOOR, None)
+    sigma = np.sqrt(residual / dt)
+    return np.column_stack([a, b, sigma])
+
+
+def cir_moments(r, a, b, sigma, dt=CIR_DT):
+    """
+    Exact conditional mean and variance of r(t + dt) given r(t) = r.
+    """
+    decay = np.exp(-a * dt)
+    mean = r * decay + b * (1 - decay)
+    variance = sigma ** 2 * (r * (decay - decay ** 2) / a + b * (1 - decay) ** 2 / (2 * a))
+    return mean, variance
+
+
+def cir_loglik(r0, r1, params, dt=CIR_DT):
+    """
+    Gaussian log-likelihood of transitions r0 -> r1 (windows x transitions) under the exact
+    CIR conditional moments, for one (a, b, sigma) row per window.
+    """
+    a, b, sigma = (params[:, [i]] for i in range(3))
+    mean, variance = cir_moments(r0, a, b, sigma, dt)
+    return -0.5 * (np.log(2 * np.pi * variance) + (r1 - mean) ** 2 / variance).sum(axis=1)
+
+
+def cir_mle(windows, init, dt=CIR_DT, max_iter=CIR_MAX_ITER, tol=CIR_TOLERANCE):
+    """
+    Maximum (exact-moment quasi) likelihood estimates for a stack of equal-length windows,
+    refined from `init` with damped Newton steps taken for every window at once.
+    Parameters are optimized as logs so they stay positive. Returns (params, loglik).
+    """
+    r0, r1 = windows[:, :-1], windows[:, 1:]
+    theta = np.log(init)
+    h = 1e-4
+    eye = np.eye(3) * h
+
+    current = cir_loglik(r0, r1, np.exp(theta), dt)
+    active = np.isfinite(current)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        index = np.flatnonzero(active)
+        t, f0 = theta[index], current[index]
+
+        def loglik(theta, x0=r0[index], x1=r1[index]):
+            return cir_loglik(x0, x1, np.exp(theta), dt)
+
+        # Central-difference gradient and Hessian, each evaluation covering every window
+        plus = np.array([loglik(t + eye[i]) for i in range(3)])
+        minus = np.array([loglik(t - eye[i]) for i in range(3)])
+        grad = ((plus - minus) / (2 * h)).T
+        hess = np.empty((len(t), 3, 3))
+        for i in range(3):
+            hess[:, i, i] = (plus[i] - 2 * f0 + minus[i]) / h ** 2
+            for j in range(i + 1, 3):
+                cross = (loglik(t + eye[i] + eye[j]) - loglik(t + eye[i] - eye[j])
+                         - loglik(t - eye[i] + eye[j]) + loglik(t - eye[i] - eye[j])) / (4 * h ** 2)
+                hess[:, i, j] = hess[:, j, i] = cross
+        # Newton step where the Hessian is negative definite, gradient ascent elsewhere
+        concave = np.all(np.linalg.eigvalsh(hess) < 0, axis=1)
+        step = grad * 0.1 / np.maximum(np.abs(grad).max(axis=1, keepdims=True), 1)
+        if concave.any():
+            step[concave] = -np.linalg.solve(hess[concave], grad[concave][:, :, None])[:, :, 0]
+        # Backtracking on a fixed ladder, keeping each window's best step (or none)
+        best, best_f = t, f0
+        for scale in [1.0, 0.5, 0.25, 0.1, 0.01]:
+            candidate = t + scale * step
+            f = loglik(candidate)
+            better = np.isfinite(f) & (f > best_f)
+            best = np.where(better[:, None], candidate, best)
+            best_f = np.where(better, f, best_f)
+        moved = np.abs(best - t).max(axis=1)
+        theta[index] = best
+        current[index] = best_f
+        active[index] = moved > tol
+    return np.exp(theta), current
+
+
+def cir_bond_yields(r, a, b, sigma, maturities):
+    """
+    Continuously compounded zero-coupon yields at `maturities` (years) under CIR with
+    short rate `r`, from the closed-form bond price P = A(tau) exp(-B(tau) r).
+    """
+    tau = np.asarray(maturities, dtype=float)
+    gamma = np.sqrt(a ** 2 + 2 * sigma ** 2)
+    growth = np.expm1(gamma * tau)
+    denominator = (gamma + a) * growth + 2 * gamma
+    B = 2 * growth / denominator
+    log_A = 2 * a * b / sigma ** 2 * (np.log(2 * gamma) + (a + gamma) * tau / 2 - np.log(denominator))
+    return (B * r - log_A) / tau
+
+
+def calibrate_cir(rates, ends, window=CIR_WINDOW, dt=CIR_DT):
+    """
+    Fit (a, b, sigma) for the windows of `rates` (decimal, floored) ending at `ends`:
+    OLS initialization followed by likelihood refinement, all windows at once.
+    Returns an (n_windows, 3) parameter array and the log-likelihoods.
+    """
+    init = cir_ols(rates, ends, window, dt)
+    params = np.empty_like(init)
+    loglik = np.empty(len(ends))
+    starts = np.maximum(ends - window, 0)
+    # Full-length windows are stacked as views; a short history is a single window
+    full = ends - starts == window
+    if full.any():
+        view = np.lib.stride_tricks.sliding_window_view(rates, window)
+        params[full], loglik[full] = cir_mle(view[starts[full]], init[full], dt)
+    for i in np.flatnonzero(~full):
+        params[[i]], loglik[[i]] = cir_mle(rates[None, starts[i]:ends[i]], init[[i]], dt)
+    return params, loglik
+
+
+def _window_hashes(rates, ends, window):
+    return [
+        hashlib.sha1(rates[max(end - window, 0):end].tobytes()).hexdigest()[:16]
+        for end in ends
+    ]
+
+
+def _cir_path(series_id, window, step):
+    return os.path.join(utils.CACHE_DIR, "cir", f"{series_id}-w{window}-s{step}.parquet")
+
+
+class CIRCalibration:
+    """
+    Rolling CIR fits of a short-rate series, with the latest window's fitted path,
+    one-month forecast and implied yield curve. Figures are built on first use.
+    Build instances through `get_cir_calibration`, shared while the data is unchanged.
+    """
+
+    def __init__(self, series, params, version):
+        self.series = series
+        self.params = params
+        self.version = version
+        self._figures = {}
+        self._figures_lock = threading.Lock()
+
+    @property
+    def latest(self):
+        return self.params.iloc[-1]
+
+    @property
+    def window(self):
+        """
+        Rates (%) of the latest calibration window.
+        """
+        return self.series.loc[self.latest["start"]:self.latest["end"]]
+
+    def fitted(self):
+        """
+        One-step-ahead conditional means (%) over the latest window under its fit.
+        """
+        a, b, sigma = self.latest[["a", "b", "sigma"]]
+        rates = np.maximum(self.window.values / 100, CIR_RATE_FLOOR)
+        mean, _ = cir_moments(rates[:-1], a, b, sigma)
+        return pd.Series(np.r_[rates[0], mean] * 100, index=self.window.index)
+
+    def forecast(self, steps=CIR_FORECAST_STEPS):
+        """
+        Expected short rate (%) `steps` observations after the latest one.
+        """
+        a, b, _ = self.latest[["a", "b", "sigma"]]
+        decay = np.exp(-a * steps * CIR_DT)
+        r = max(self.series.iloc[-1] / 100, CIR_RATE_FLOOR)
+        return (r * decay + b * (1 - decay)) * 100
+
+    def yield_curve(self, maturities=CIR_MATURITIES):
+        """
+        Zero-coupon yields (%) priced off the one-month forecast rate.
+        """
+        a, b, sigma = self.latest[["a", "b", "sigma"]]
+        yields = cir_bond_yields(self.forecast() / 100, a, b, sigma, maturities) * 100
+        return pd.Series(yields, index=maturities)
+
+    def figure(self, name):
+        with self._figures_lock:
+            if name not in self._figures:
+                self._figures[name] = getattr(self, f"_build_{name}_figure")()
+            return self._figures[name]
+
+    def _style(self, fig, x_title, y_title):
+        fig.update_xaxes(title_text=x_title, showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_yaxes(title_text=y_title, showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_layout(plot_bgcolor="white", paper_bgcolor="white")
+        return fig
+
+    def _build_fit_figure(self):
+        window, fitted = self.window, self.fitted()
+        a, b, sigma = self.latest[["a", "b", "sigma"]]
+        fig = go.Figure([
+            go.Scatter(x=window.index, y=window.values, mode="lines", name="Actual Interest Rate",
+                       line={"color": "#A1C4D7"},
+                       hovertemplate="Date=%{x}<br>Interest Rate=%{y:.3f}%<extra></extra>"),
+            go.Scatter(x=fitted.index, y=fitted.values, mode="lines", name="Fitted CIR Model",
+                       line={"color": "#8BC34A", "width": 2},
+                       hovertemplate="Date=%{x}<br>Fitted=%{y:.3f}%<extra></extra>"),
+        ])
+        fig.update_layout(
+            title={"text": "CIR Model Calibration: Actual vs Fitted Interest Rates"
+                           f"<br><sup>a = {a:.3f}, b = {b:.2%}, sigma = {sigma:.3f}</sup>"},
+            legend={"title": {"text": "<b>Actual vs CIR Model</b>"}, "font": {"size": 12, "color": "#4F4F4F"}},
+        )
+        return self._style(fig, "Date", "Interest Rate (%)")
+
+    def _build_yield_figure(self):
+        curve = self.yield_curve()
+        fig = go.Figure(go.Scatter(
+            x=curve.index, y=curve.values, mode="lines+markers", line={"color": "#8BC34A"},
+            hovertemplate="Maturity (Years)=%{x:.2f}<br>Yield(%)=%{y:.3f}<extra></extra>",
+        ))
+        fig.update_layout(
+            title={"text": "Yield Curve from CIR Model from Forecasted Interest Rate (1 Month in Future) "
+                           "(No-Arbitrage - Zero Coupon Bonds)"},
+            showlegend=False,
+        )
+        return self._style(fig, "Maturity (Years)", "Yield(%)")
+
+    def _build_parameters_figure(self):
+        params = self.params.set_index("end")
+        fig = go.Figure([
+            go.Scatter(x=params.index, y=params["b"] * 100, mode="lines", name="Long-run mean b (%)",
+                       line={"color": "#8BC34A", "width": 2}),
+            go.Scatter(x=params.index, y=params["a"], mode="lines", name="Mean reversion a", yaxis="y2",
+                       line={"color": "#A1C4D7"}),
+        ])
+        fig.update_layout(
+            title={"text": f"Rolling CIR Calibration ({CIR_WINDOW}-observation windows)"},
+            yaxis2={"title": {"text": "Mean reversion a"}, "overlaying": "y", "side": "right", "showgrid": False},
+            legend={"orientation": "h", "y": -0.2},
+        )
+        return self._style(fig, "Window End", "Long-run mean (%)")
+
+
+def get_cir_calibration(series_id=CIR_SERIES, window=CIR_WINDOW, step=CIR_STEP):
+    """
+    Rolling CIR calibration of `series_id` (a FRED short rate in percent).
+
+    Fitted windows are stored under CACHE_DIR, keyed by a hash of each window's data, and
+    shared by every process: a refresh only fits windows whose data is new or revised,
+    which for a daily update is the latest one. Within a process the calibration is
+    reused until the series changes.
+    """
+    series = get_fred_series(series_id).dropna()
+    digest = hashlib.sha1(np.ascontiguousarray(series.index.values).tobytes())
+    digest.update(np.ascontiguousarray(series.values, dtype=float).tobytes())
+    version = digest.hexdigest()
+    key = (series_id, window, step)
+    with _cir_lock:
+        cached = _cir_calibrations.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    rates = np.maximum(series.values / 100, CIR_RATE_FLOOR)
+    ends = cir_windows(len(rates), window, step)
+    if not len(ends):
+        raise ValueError(f"Not enough {series_id} observations for a CIR fit")
+    hashes = _window_hashes(rates, ends, window)
+
+    path = _cir_path(series_id, window, step)
+    with _file_lock(path + ".lock"):
+        stored, _ = _read_parquet_cached(path)
+        known = stored.set_index("hash") if stored is not None else None
+        new = [i for i, h in enumerate(hashes) if known is None or h not in known.index]
+        if new:
+            fits, loglik = calibrate_cir(rates, ends[new], window)
+            fitted = pd.DataFrame(fits, columns=["a", "b", "sigma"])
+            fitted["loglik"] = loglik
+            fitted["hash"] = [hashes[i] for i in new]
+            known = pd.concat([known.reset_index() if known is not None else None, fitted], ignore_index=True)
+            known = known.drop_duplicates("hash", keep="last").set_index("hash")
+            # Only windows of the current data are kept
+            _write_parquet_atomic(known.loc[hashes].reset_index(), path)
+
+    params = known.loc[hashes, ["a", "b", "sigma", "loglik"]].reset_index(drop=True)
+    starts = np.maximum(ends - window, 0)
+    params.insert(0, "start", series.index[starts])
+    params.insert(1, "end", series.index[ends - 1])
+    calibration = CIRCalibration(series, params, version)
+    with _cir_lock:
+        _cir_calibrations[key] = calibration
+    return calibration
+
+
+# CIR Monte Carlo
+def cir_marginal_moments(r0, a, b, sigma, horizons):
+    """
+    Mean and standard deviation of r(t) given r(0) = r0 at each horizon t (years).
+    """
+    mean, variance = cir_moments(r0, a, b, sigma, np.asarray(horizons, dtype=float))
+    return mean, np.sqrt(variance)
+
+
+def cir_step(rng, rates, a, b, sigma, dt=CIR_DT):
+    """
+    Exact CIR transition of `rates` over `dt`: a scaled noncentral chi-square draw.
+    """
+    c = 2 * a / (sigma ** 2 * (1 - np.exp(-a * dt)))
+    df = 4 * a * b / sigma ** 2
+    return rng.noncentral_chisquare(df, 2 * c * rates * np.exp(-a * dt)) / (2 * c)
+
+
+def _histogram_quantiles(counts, edges, q):
+    """
+    Quantiles `q` of each row of binned `counts` (edges per row), interpolating
+    linearly within the bin where the cumulative share crosses each quantile.
+    """
+    cdf = np.cumsum(counts, axis=1) / counts.sum(axis=1, keepdims=True)
+    rows = np.arange(len(counts))[:, None]
+    bins = np.minimum((cdf[:, :, None] < np.asarray(q)).sum(axis=1), counts.shape[1] - 1)
+    below = np.where(bins > 0, cdf[rows, bins - 1], 0)
+    share = cdf[rows, bins] - below
+    frac = np.where(share > 0, (np.asarray(q) - below) / np.where(share > 0, share, 1), 0.5)
+    return edges[rows, bins] + frac * (edges[rows, bins + 1] - edges[rows, bins])
+
+
+def simulate_cir(r0, a, b, sigma, n_paths=CIR_MC_PATHS, n_steps=CIR_FORECAST_STEPS, dt=CIR_DT,
+                 chunk_size=CIR_MC_CHUNK, bins=CIR_MC_BINS, seed=None):
+    """
+    Simulate `n_paths` CIR paths of `n_steps` exact transitions from r0, `chunk_size`
+    paths at a time, keeping only per-step sums and histograms.
+
+    Each step's bins span +-10 standard deviations of the exact marginal distribution
+    (floored at zero), with draws beyond the range counted in the end bins. Returns
+    (mean, std, counts, edges): counts is steps x bins, edges steps x (bins + 1), and
+    step 0 is r0 itself.
+    """
+    rng = np.random.default_rng(seed)
+    horizons = np.arange(n_steps + 1) * dt
+    center, spread = cir_marginal_moments(r0, a, b, sigma, horizons)
+    low = np.maximum(center - 10 * spread, 0)
+    high = np.maximum(center + 10 * spread, low + 1e-12)
+    edges = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, bins + 1)
+    width = (high - low) / bins
+
+    counts = np.zeros((n_steps + 1, bins), dtype=np.int64)
+    sums = np.zeros(n_steps + 1)
+    squares = np.zeros(n_steps + 1)
+    for start in range(0, n_paths, chunk_size):
+        rates = np.full(min(chunk_size, n_paths - start), float(r0))
+        for step in range(n_steps + 1):
+            if step:
+                rates = cir_step(rng, rates, a, b, sigma, dt)
+            index = np.clip(((rates - low[step]) / width[step]).astype(np.int64), 0, bins - 1)
+            counts[step] += np.bincount(index, minlength=bins)
+            sums[step] += rates.sum()
+            squares[step] += rates @ rates
+    mean = sums / n_paths
+    std = np.sqrt(np.maximum(squares / n_paths - mean ** 2, 0))
+    return mean, std, counts, edges
+
+
+class CIRSimulation:
+    """
+    Streaming summary of a CIR Monte Carlo run from the latest calibration: per-step
+    mean, std and quantile bands, and the terminal distribution. Figures are built on
+    first use. Build instances through `get_cir_simulation`.
+    """
+
+    def __init__(self, calibration, n_paths, n_steps, seed):
+        self.calibration = calibration
+        self.n_paths = n_paths
+        self.n_steps = n_steps
+        self.seed = seed
+        a, b, sigma = calibration.latest[["a", "b", "sigma"]]
+        self.r0 = max(calibration.series.iloc[-1] / 100, CIR_RATE_FLOOR)
+        mean, std, self.counts, self.edges = simulate_cir(self.r0, a, b, sigma, n_paths, n_steps, seed=seed)
+        self.dates = pd.bdate_range(calibration.series.index[-1], periods=n_steps + 1)
+        # Rates in percent, like the source series
+        self.mean = pd.Series(mean * 100, index=self.dates)
+        self.std = pd.Series(std * 100, index=self.dates)
+        self.quantiles = pd.DataFrame(
+            _histogram_quantiles(self.counts, self.edges, CIR_MC_QUANTILES) * 100,
+            index=self.dates, columns=CIR_MC_QUANTILES,
+        )
+        self._figures = {}
+        self._figures_lock = threading.Lock()
+
+    def terminal_histogram(self, bars=64):
+        """
+        (bin centers, counts) of the last step's rates (%), regrouped into `bars` bins
+        over the range that holds draws.
+        """
+        counts, edges = self.counts[-1], self.edges[-1] * 100
+        group = max(len(counts) // bars, 1)
+        counts = counts[: len(counts) // group * group].reshape(-1, group).sum(axis=1)
+        edges = edges[:: group][: len(counts) + 1]
+        filled = np.flatnonzero(counts)
+        keep = slice(filled[0], filled[-1] + 1)
+        return (edges[:-1][keep] + edges[1:][keep]) / 2, counts[keep]
+
+    def figure(self, name):
+        with self._figures_lock:
+            if name not in self._figures:
+                self._figures[name] = getattr(self, f"_build_{name}_figure")()
+            return self._figures[name]
+
+    def _build_fan_figure(self):
+        history = self.calibration.series.iloc[-3 * self.n_steps:]
+        q = self.quantiles
+        fig = go.Figure(go.Scatter(x=history.index, y=history.values, mode="lines", name="Actual Interest Rate",
+                                   line={"color": "#A1C4D7", "width": 2}))
+        for (lower, upper), alpha in zip([(0.01, 0.99), (0.05, 0.95), (0.25, 0.75)], [0.15, 0.25, 0.4]):
+            fig.add_trace(go.Scatter(x=q.index, y=q[upper], mode="lines", line={"width": 0},
+                                     showlegend=False, hoverinfo="skip"))
+            fig.add_trace(go.Scatter(
+                x=q.index, y=q[lower], mode="lines", line={"width": 0}, fill="tonexty",
+                fillcolor=f"rgba(139, 195, 74, {alpha})", name=f"{lower:.0%}-{upper:.0%} band",
+                hoverinfo="skip",
+            ))
+        fig.add_trace(go.Scatter(x=q.index, y=q[0.5], mode="lines", name="Median",
+                                 line={"color": "#8BC34A", "width": 2.5},
+                                 hovertemplate="Date=%{x}<br>Median=%{y:.3f}%<extra></extra>"))
+        fig.add_trace(go.Scatter(x=self.mean.index, y=self.mean.values, mode="lines", name="Mean",
+                                 line={"color": "#2E7D32", "width": 1.5, "dash": "dot"},
+                                 hovertemplate="Date=%{x}<br>Mean=%{y:.3f}%<extra></extra>"))
+        fig.update_xaxes(title_text="Date", showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_yaxes(title_text="Interest Rate (%)", showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_layout(
+            title={"text": f"Monte Carlo Simulation of Interest Rate Paths (CIR Model, {self.n_paths:,} paths)"},
+            legend={"orientation": "h", "y": -0.2},
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+        )
+        return fig
+
+    def _build_terminal_figure(self):
+        centers, counts = self.terminal_histogram()
+        fig = go.Figure(go.Bar(
+            x=centers, y=counts, marker_color="#8BC34A",
+            hovertemplate="Interest Rate=%{x:.3f}%<br>count=%{y}<extra></extra>",
+        ))
+        fig.update_xaxes(title_text="Interest Rate (%)", showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_yaxes(title_text="count", showgrid=True, gridcolor="lightgray", zeroline=False)
+        fig.update_layout(
+            title={"text": f"Simulated Interest Rate in {self.n_steps} Business Days (CIR Model)"},
+            bargap=0.05,
+            showlegend=False,
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+        )
+        return fig
+
+
+def get_cir_simulation(calibration, n_paths=CIR_MC_PATHS, n_steps=CIR_FORECAST_STEPS, seed=0):
+    """
+    CIRSimulation from `calibration`'s latest fit, shared by every session until the
+    calibration changes. A fixed `seed` makes reruns reproducible. Sessions asking for
+    a run that is already being simulated wait for it rather than starting their own.
+    """
+    key = (calibration.version, n_paths, n_steps, seed)
+
+    def cached():
+        simulation = _cir_simulations.get(key)
+        if simulation is not None:
+            _cir_simulations.move_to_end(key)
+        return simulation
+
+    with _cir_lock:
+        simulation = cached()
+        if simulation is not None:
+            return simulation
+        building = _cir_building.setdefault(key, threading.Lock())
+    with building:
+        # Another session may have finished this run while we waited
+        with _cir_lock:
+            simulation = cached()
+        if simulation is not None:
+            return simulation
+        try:
+            simulation = CIRSimulation(calibration, n_paths, n_steps, seed)
+            with _cir_lock:
+                _cir_simulations[key] = simulation
+                while len(_cir_simulations) > CIR_MC_CACHE_SIZE:
+                    _cir_simulations.popitem(last=False)
+        finally:
+            with _cir_lock:
+                _cir_building.pop(key, None)
+    return simulation
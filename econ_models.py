@@ -0,0 +1,812 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import utils
+from utils import (
+    _file_lock, _read_parquet_cached, _read_text_cached, _write_arrow_atomic, _write_json_atomic,
+    _write_parquet_atomic,
+    figure_spec_path, load_figure_spec,
+)
+
+REGIONS = ["Africa", "Asia-Pacific", "Caribbean", "Europe", "Middle East", "North America", "South America"]
+
+# Saved regional plots holding each indicator's yearly growth rate per region, one
+# "Raw Growth Rate" trace per region in REGIONS order. The repo ships no source data
+# for these, so the regional store is extracted from the plots' figure specs
+# (tools/convert_plots.py). Exports are left out: Regional_vole.html is a copy of the
+# inflation plot, not export volumes.
+REGIONAL_INDICATOR_PLOTS = {
+    "gdp": "Regional_gdp.html",
+    "inflation": "Regional_inf.html",
+    "unemployment": "Reigonal_unemp.html",
+    "investment": "Regional_toti.html",
+    "imports": "Regional_voli.html",
+}
+
+# The regional growth views, keyed like REGIONAL_INDICATOR_PLOTS
+REGIONAL_VIEWS = {
+    "gdp": {"title": "Regional GDP", "color": "#8BC34A"},
+    "inflation": {"title": "Regional Inflation, Average Consumer Prices", "color": "#FFA500"},
+    "unemployment": {"title": "Regional Unemployment Rate", "color": "#81D4FA"},
+    "investment": {"title": "Regional Total Investment", "color": "#B39DDB"},
+    "imports": {
+        "title": "Regional Volume of Imports of Goods", "color": "#FF7043",
+        "axis_title": "Volume of Imports of goods (%)",
+    },
+}
+REGIONAL_EVENTS = {
+    2008: "Global Financial\nCrisis",
+    2011: "European Debt\nCrisis",
+    2015: "China Stock\nMarket Crash",
+    2020: "COVID-19\nPandemic",
+    2022: "Inflation\nCrisis",
+}
+REGIONAL_RECESSIONS = [(2007, 2009), (2020, 2020)]
+
+# Expenditure by category, one bar trace per region in EXPENDITURE_REGIONS order
+EXPENDITURE_PLOT = "Regional_expenditure.html"
+EXPENDITURE_YEAR = 2023
+EXPENDITURE_REGIONS = {
+    "Africa": "#2E86DE",
+    "Asia": "#54A0FF",
+    "Europe": "#0FB9B1",
+    "North America": "#20BF6B",
+    "Oceania": "#26DE81",
+    "South America": "#F7B731",
+}
+
+# Columns of the regional indicator store; rows are sorted by the first five
+REGIONAL_STORE_COLUMNS = ["indicator", "region", "country", "category", "year", "value"]
+REGIONAL_STORE_KEYS = REGIONAL_STORE_COLUMNS[:5]
+
+# Economic Health Score components: weight, and direction (+1 when higher is healthier).
+# Inflation is scored on its distance from `target`.
+HEALTH_SCORE_COMPONENTS = {
+    "gdp": {"weight": 0.35, "direction": 1},
+    "inflation": {"weight": 0.25, "direction": -1, "target": 2.0},
+    "unemployment": {"weight": 0.2, "direction": -1},
+    "investment": {"weight": 0.1, "direction": 1},
+    "imports": {"weight": 0.1, "direction": 1},
+}
+# Years of history an indicator needs before its z-score counts
+HEALTH_SCORE_MIN_YEARS = 5
+# z-scores are clipped so one extreme year (e.g. hyperinflation) can't swamp the score
+HEALTH_SCORE_Z_CLIP = 3.0
+
+# Countries shaded with their region's score on the map
+REGION_COUNTRIES = {
+    "Africa": [
+        "Algeria", "Angola", "Botswana", "Burundi", "Central African Republic", "Chad", "Comoros", "Egypt",
+        "Equatorial Guinea", "Eritrea", "Ethiopia", "Gabon", "Ghana", "Kenya", "Lesotho", "Liberia", "Madagascar",
+        "Malawi", "Mauritania", "Mauritius", "Morocco", "Mozambique", "Namibia", "Nigeria", "Rwanda", "Seychelles",
+        "Sierra Leone", "Somalia", "South Africa", "Tanzania", "Togo", "Tunisia", "Uganda", "Zimbabwe",
+    ],
+    "Asia-Pacific": [
+        "Australia", "Bangladesh", "Brunei Darussalam", "Cambodia", "China", "India", "Indonesia", "Japan",
+        "Malaysia", "Mongolia", "Myanmar", "Nepal", "New Zealand", "Pakistan", "Philippines", "Singapore",
+        "Sri Lanka", "Thailand", "Vietnam",
+    ],
+    "Caribbean": ["Barbados", "Dominican Republic", "Jamaica", "Trinidad and Tobago"],
+    "Europe": [
+        "Albania", "Armenia", "Azerbaijan", "Belarus", "Belgium", "Bosnia and Herzegovina", "Bulgaria", "Croatia",
+        "Cyprus", "Czech Republic", "Denmark", "Estonia", "Finland", "France", "Georgia", "Germany", "Greece",
+        "Hungary", "Iceland", "Ireland", "Italy", "Latvia", "Lithuania", "Luxembourg", "Malta", "Moldova",
+        "Montenegro", "Netherlands", "North Macedonia", "Norway", "Poland", "Portugal", "Romania", "Russia",
+        "Serbia", "Slovenia", "Spain", "Sweden", "Switzerland", "Turkey", "United Kingdom",
+    ],
+    "Middle East": [
+        "Bahrain", "Iraq", "Israel", "Jordan", "Kuwait", "Lebanon", "Oman", "Qatar", "Saudi Arabia", "Syria",
+        "United Arab Emirates", "Yemen",
+    ],
+    "North America": ["Belize", "Canada", "Mexico"],
+    "South America": [
+        "Argentina", "Brazil", "Chile", "Colombia", "Guyana", "Paraguay", "Peru", "Suriname", "Uruguay", "Venezuela",
+    ],
+}
+
+# Regional PCA: principal components reported, and years a region needs
+PCA_COMPONENTS = 4
+PCA_MIN_YEARS = 10
+# Indicators the PCA is run over
+PCA_INDICATORS = list(REGIONAL_INDICATOR_PLOTS)
+# Region names used by the overview page that differ from the dataset's
+PCA_REGION_ALIASES = {"Asia": "Asia-Pacific"}
+
+PANEL_KEYS = ["region", "indicator", "year"]
+
+_regional_store = {}
+_regional_store_lock = threading.Lock()
+_health_score = {}
+_health_score_lock = threading.Lock()
+_pca_results = {}
+_pca_failures = {}
+_pca_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+# Regional indicator store
+def _regional_sources():
+    return list(REGIONAL_INDICATOR_PLOTS.values()) + [EXPENDITURE_PLOT]
+
+
+def regional_source_version():
+    """
+    Version key of the regional data, changing whenever any source plot does.
+    """
+    return hashlib.sha1("|".join(
+        f"{plot_file}:{os.stat(figure_spec_path(plot_file)).st_mtime_ns}" for plot_file in _regional_sources()
+    ).encode()).hexdigest()
+
+
+def extract_regional_indicators():
+    """
+    Long frame of every regional series held in the saved regional plots, with
+    REGIONAL_STORE_COLUMNS. The plots only hold regional aggregates, so `country` is
+    always null (kept so country-level data can be added without a schema change) and
+    `category` is only set for expenditure.
+    """
+    frames = []
+    for indicator, plot_file in REGIONAL_INDICATOR_PLOTS.items():
+        traces = [trace for trace in load_figure_spec(plot_file).data if trace.get("name") == "Raw Growth Rate"]
+        for region, trace in zip(REGIONS, traces):
+            frames.append(pd.DataFrame({
+                "indicator": indicator,
+                "region": region,
+                "year": np.asarray(trace["x"], dtype=int),
+                "value": np.asarray(trace["y"], dtype=float),
+            }))
+    for region, trace in zip(EXPENDITURE_REGIONS, load_figure_spec(EXPENDITURE_PLOT).data):
+        frames.append(pd.DataFrame({
+            "indicator": "expenditure",
+            "region": region,
+            "category": list(trace["y"]),
+            "year": EXPENDITURE_YEAR,
+            "value": np.asarray(trace["x"], dtype=float),
+        }))
+    frame = pd.concat(frames, ignore_index=True).reindex(columns=REGIONAL_STORE_COLUMNS)
+    for column in ["indicator", "region", "country", "category"]:
+        frame[column] = frame[column].astype("string")
+    return frame.sort_values(REGIONAL_STORE_KEYS, ignore_index=True, na_position="first")
+
+
+class RegionalStore:
+    """
+    Memory-mapped columnar store of the regional indicators, with row ranges indexed by
+    indicator and region. Rows are sorted by REGIONAL_STORE_KEYS, so a query for one
+    indicator (or one of its regions) is a zero-copy slice; only country and year
+    filters touch the values.
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        indicators = self.table.column("indicator").to_numpy(zero_copy_only=False)
+        regions = self.table.column("region").to_numpy(zero_copy_only=False)
+        # Sorted rows: each (indicator, region) is one contiguous range
+        starts = np.flatnonzero(np.r_[True, (indicators[1:] != indicators[:-1]) | (regions[1:] != regions[:-1])])
+        stops = np.r_[starts[1:], len(indicators)]
+        self._ranges = {}
+        for start, stop in zip(starts, stops):
+            self._ranges.setdefault(indicators[start], {})[regions[start]] = (int(start), int(stop))
+
+    @property
+    def indicators(self):
+        return list(self._ranges)
+
+    def regions(self, indicator):
+        return list(self._ranges.get(indicator, {}))
+
+    def query(self, indicators, regions=None, countries=None, years=None):
+        """
+        Rows of `indicators` (a name or a list), optionally limited to `regions`,
+        `countries` and `years` (a list, or a (first, last) tuple), as a DataFrame.
+        """
+        if isinstance(indicators, str):
+            indicators = [indicators]
+        slices = [
+            self.table.slice(start, stop - start)
+            for indicator in indicators
+            for region, (start, stop) in self._ranges.get(indicator, {}).items()
+            if regions is None or region in regions
+        ]
+        table = pa.concat_tables(slices) if slices else self.table.slice(0, 0)
+        if countries is not None:
+            table = table.filter(pc.is_in(table.column("country"), pa.array(countries, pa.string())))
+        if isinstance(years, tuple):
+            first, last = years
+            year = table.column("year")
+            table = table.filter(pc.and_(pc.greater_equal(year, first), pc.less_equal(year, last)))
+        elif years is not None:
+            table = table.filter(pc.is_in(table.column("year"), pa.array(years, table.schema.field("year").type)))
+        return table.to_pandas()
+
+
+def _regional_store_path(version):
+    return os.path.join(utils.CACHE_DIR, "regional", f"indicators-{version[:16]}.arrow")
+
+
+def get_regional_store():
+    """
+    RegionalStore of the current regional data. Built once under CACHE_DIR from the
+    regional plots and rebuilt when any of them changes, removing older versions; every
+    process memory maps the same file and every session shares one instance per version.
+    """
+    version = regional_source_version()
+    with _regional_store_lock:
+        cached = _regional_store.get("store")
+    if cached is not None and cached.version == version:
+        return cached
+
+    path = _regional_store_path(version)
+    if not os.path.exists(path):
+        with _file_lock(path + ".lock"):
+            if not os.path.exists(path):
+                table = pa.Table.from_pandas(extract_regional_indicators(), preserve_index=False)
+                _write_arrow_atomic(table, path)
+                # Mapped copies stay readable after the unlink
+                for old_path in glob.glob(_regional_store_path("*")):
+                    if old_path != path:
+                        for stale in (old_path, old_path + ".lock"):
+                            try:
+                                os.remove(stale)
+                            except FileNotFoundError:
+                                pass  # Pruned by another process
+    store = RegionalStore(path, version)
+    with _regional_store_lock:
+        _regional_store["store"] = store
+    return store
+
+
+def regional_indicator_panel():
+    """
+    Long (region, indicator, year, value) frame of yearly regional growth rates, and a
+    version key that changes whenever any source does.
+    """
+    store = get_regional_store()
+    with _health_score_lock:
+        cached = _health_score.get("panel")
+    if cached is not None and cached[0] == store.version:
+        return cached[1], store.version
+
+    panel = store.query(list(REGIONAL_INDICATOR_PLOTS))[PANEL_KEYS + ["value"]]
+    panel = panel.astype({"region": object, "indicator": object}).sort_values(PANEL_KEYS, ignore_index=True)
+    with _health_score_lock:
+        _health_score["panel"] = (store.version, panel)
+    return panel, store.version
+
+
+class RegionalView:
+    """
+    One regional view (a growth indicator or "expenditure") built from the regional
+    store, with its figure built on first use.
+    """
+
+    def __init__(self, indicator, data, version):
+        self.indicator = indicator
+        self.data = data
+        self.version = version
+        self._figure = None
+        self._figure_lock = threading.Lock()
+
+    @property
+    def figure(self):
+        with self._figure_lock:
+            if self._figure is None:
+                if self.indicator == "expenditure":
+                    self._figure = self._build_expenditure_figure()
+                else:
+                    self._figure = self._build_growth_figure()
+            return self._figure
+
+    def _build_growth_figure(self):
+        from plotly.subplots import make_subplots
+
+        view = REGIONAL_VIEWS[self.indicator]
+        axis_title = view.get("axis_title", "Growth Rate (%)")
+        fig = make_subplots(rows=4, cols=2, subplot_titles=[f"<b>{region}</b>" for region in REGIONS],
+                            vertical_spacing=0.15, horizontal_spacing=0.08)
+        recession_style = {
+            "fillcolor": "rgba(169, 169, 169, 0.3)", "layer": "below", "legendgroup": "recession",
+            "line": {"color": "rgba(169, 169, 169, 0.5)", "width": 1}, "name": "Recession Period",
+        }
+        shapes, annotations = [], list(fig.layout.annotations)
+        for i, region in enumerate(REGIONS):
+            row, col = i // 2 + 1, i % 2 + 1
+            axes = {"xref": f"x{i + 1}" if i else "x", "yref": f"y{i + 1}" if i else "y"}
+            raw = self.data[self.data["region"] == region].set_index("year")["value"]
+            first = i == 0
+            fig.add_trace(go.Scatter(x=raw.index, y=raw.values, mode="lines", name="Raw Growth Rate",
+                                     legendgroup="raw", showlegend=first,
+                                     line={"color": "#A1C4D7", "width": 2}), row=row, col=col)
+            fig.add_trace(go.Scatter(x=raw.index, y=raw.rolling(3).mean().values, mode="lines",
+                                     name="3-Year Moving Average", legendgroup="smoothed", showlegend=first,
+                                     line={"color": view["color"], "width": 2.5}), row=row, col=col)
+            fig.add_trace(go.Scatter(x=raw.index, y=np.zeros(len(raw)), mode="lines", name="Zero Growth Line",
+                                     legendgroup="zero", showlegend=first,
+                                     line={"color": "black", "dash": "dot", "width": 1}), row=row, col=col)
+            # Shapes and annotations go in with one layout update, add_shape/add_annotation
+            # revalidate the whole layout on every call
+            for j, (start, end) in enumerate(REGIONAL_RECESSIONS):
+                shapes.append({"type": "rect", "x0": start, "x1": end, "y0": -20, "y1": 20,
+                               "showlegend": first and j == 0, **axes, **recession_style})
+            for year, event in REGIONAL_EVENTS.items():
+                if not np.isnan(raw.get(year, np.nan)):
+                    annotations.append({
+                        "x": year, "y": raw[year], "text": event, "showarrow": True, "arrowhead": 2, "arrowsize": 1,
+                        "arrowwidth": 2, "arrowcolor": "rgba(0, 0, 0, 0.7)", "ax": 0, "ay": -50,
+                        "font": {"size": 9, "color": "black"}, "bgcolor": "rgba(255, 255, 255, 0.8)",
+                        "bordercolor": "rgba(0, 0, 0, 0.3)", "borderwidth": 1, "borderpad": 4, **axes,
+                    })
+        fig.update_xaxes(showgrid=True, gridcolor="lightgray", zeroline=False, tickangle=45, dtick=2)
+        fig.update_yaxes(title_text=axis_title, showgrid=True, gridcolor="lightgray", zeroline=False, range=[-20, 20])
+        fig.update_layout(
+            title={
+                "text": f"<b>{view['title']} Growth Trends with Historical Events</b>",
+                "font": {"size": 20, "color": view["color"]},
+                "x": 0.5, "y": 0.95, "xanchor": "center", "yanchor": "top",
+            },
+            legend={"font": {"size": 12}, "orientation": "h", "yanchor": "bottom", "y": 1.02,
+                    "xanchor": "center", "x": 0.5},
+            margin={"t": 150, "b": 50, "l": 50, "r": 50},
+            height=1600,
+            showlegend=True,
+            plot_bgcolor="white",
+            shapes=shapes,
+            annotations=annotations,
+        )
+        return fig
+
+    def _build_expenditure_figure(self):
+        from plotly.subplots import make_subplots
+
+        fig = make_subplots(rows=len(EXPENDITURE_REGIONS), cols=1, vertical_spacing=0.08)
+        for i, (region, color) in enumerate(EXPENDITURE_REGIONS.items()):
+            rows = self.data[self.data["region"] == region].sort_values("value", ascending=False, kind="stable")
+            fig.add_trace(go.Bar(
+                x=rows["value"].values, y=rows["category"].values, orientation="h", width=0.75, showlegend=False,
+                marker={"color": color, "line": {"width": 0}, "opacity": 0.85},
+                hovertemplate=f"<b>{region}</b><br>%{{y}}<br>Expenditure: %{{x:,.0f}}<br><extra></extra>",
+            ), row=i + 1, col=1)
+        tickfont = {"size": 11, "color": "#2C3E50"}
+        fig.update_xaxes(type="log", tickfont=tickfont, showgrid=True, gridwidth=1,
+                         gridcolor="rgba(189, 195, 199, 0.4)", zeroline=False, tickformat=",")
+        fig.update_yaxes(tickfont=tickfont, showgrid=False, ticklabelposition="outside")
+        color_mapping = " | ".join(
+            f"<span style='color:{color}'>{region}</span>" for region, color in EXPENDITURE_REGIONS.items()
+        )
+        annotations = [
+            {"text": "<b>Expenditure (Log Scale)</b>", "x": 0.5, "y": -0.02, "font": {"size": 16, "color": "#2C3E50"}},
+            {"text": "Data represents total expenditure by category for each region", "x": 0.5, "y": -0.025,
+             "font": {"size": 12, "color": "#7F8C8D"}},
+            {"text": f"<b>Region - Color Mapping:</b><br>{color_mapping}", "x": 0.45, "y": 1.01, "align": "center",
+             "font": {"size": 14, "color": "#2C3E50"}},
+        ]
+        for annotation in annotations:
+            fig.add_annotation(xref="paper", yref="paper", xanchor="center", showarrow=False, **annotation)
+        fig.update_layout(
+            title={
+                "text": f"<b>Regional Expenditure Analysis {EXPENDITURE_YEAR}</b>",
+                "font": {"size": 24, "color": "#2C3E50", "family": "Arial, sans-serif"},
+                "x": 0.5, "y": 0.98, "xanchor": "center", "yanchor": "top",
+            },
+            margin={"t": 120, "b": 80, "l": 100, "r": 100},
+            height=3000,
+            showlegend=False,
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            bargap=0.15,
+            bargroupgap=0.1,
+        )
+        return fig
+
+
+def get_regional_view(indicator):
+    """
+    RegionalView of `indicator` ("expenditure" or a REGIONAL_INDICATOR_PLOTS key),
+    querying only its slice of the regional store. Shared until the store changes.
+    """
+    store = get_regional_store()
+    key = ("view", indicator)
+    with _regional_store_lock:
+        cached = _regional_store.get(key)
+    if cached is not None and cached.version == store.version:
+        return cached
+    if indicator not in store.indicators:
+        raise KeyError(f"No regional data for {indicator}")
+
+    view = RegionalView(indicator, store.query(indicator), store.version)
+    with _regional_store_lock:
+        _regional_store[key] = view
+    return view
+
+
+# Economic Health Score
+def _component_values(panel):
+    """
+    Score inputs: the scored indicators, with inflation as its distance from target.
+    """
+    panel = panel[panel["indicator"].isin(HEALTH_SCORE_COMPONENTS)].copy()
+    for indicator, component in HEALTH_SCORE_COMPONENTS.items():
+        if "target" in component:
+            rows = panel["indicator"] == indicator
+            panel.loc[rows, "value"] = (panel.loc[rows, "value"] - component["target"]).abs()
+    return panel.sort_values(PANEL_KEYS, ignore_index=True)
+
+
+def _expanding_zscores(rows, base=None):
+    """
+    Expanding-window z-scores of `rows` (sorted by PANEL_KEYS), continuing each
+    (region, indicator) from the running count, sum and sum of squares in `base`.
+    """
+    groups = [rows["region"], rows["indicator"]]
+    observed = rows["value"].notna()
+    x = rows["value"].fillna(0.0)
+    if base is None:
+        start = pd.DataFrame(0.0, index=rows.index, columns=["n", "sum", "sumsq"])
+    else:
+        start = base.reindex(pd.MultiIndex.from_frame(rows[["region", "indicator"]])).fillna(0.0)
+    n = observed.astype(float).groupby(groups).cumsum().values + start["n"].values
+    total = x.groupby(groups).cumsum().values + start["sum"].values
+    squares = (x ** 2).groupby(groups).cumsum().values + start["sumsq"].values
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+        std = np.sqrt(np.clip((squares - total * mean) / (n - 1), 0, None))
+        z = (rows["value"].values - mean) / std
+    z[(n < HEALTH_SCORE_MIN_YEARS) | ~np.isfinite(z)] = np.nan
+    return rows.assign(n=n, sum=total, sumsq=squares, z=np.clip(z, -HEALTH_SCORE_Z_CLIP, HEALTH_SCORE_Z_CLIP))
+
+
+def update_health_components(panel, stored=None):
+    """
+    Per (region, indicator, year) z-scores with their running statistics.
+
+    Rows in `stored` (a previous result) are kept up to the first year whose value is
+    new or revised in each (region, indicator), and only the rows from there on are
+    recomputed. Returns (components, number of rows recomputed).
+    """
+    values = _component_values(panel)
+    if stored is None or stored.empty:
+        return _expanding_zscores(values), len(values)
+
+    merged = values.merge(stored[PANEL_KEYS + ["value"]], on=PANEL_KEYS, how="left", suffixes=("", "_stored"),
+                          indicator=True)
+    same = (merged["_merge"] == "both") & (
+        (merged["value"] == merged["value_stored"]) | (merged["value"].isna() & merged["value_stored"].isna())
+    )
+    # Stored rows for years no longer in the panel also invalidate the tail
+    changed_year = merged.loc[~same.values].groupby(["region", "indicator"])["year"].min()
+    last_year = values.groupby(["region", "indicator"])["year"].max()
+    dropped = stored.merge(values[PANEL_KEYS], on=PANEL_KEYS, how="left", indicator=True)
+    dropped_year = dropped.loc[dropped["_merge"] == "left_only"].groupby(["region", "indicator"])["year"].min()
+    first_changed = pd.concat([changed_year, dropped_year], axis=1).min(axis=1).reindex(last_year.index)
+    first_changed = first_changed.fillna(last_year + 1)
+
+    cutoff = first_changed.reindex(pd.MultiIndex.from_frame(values[["region", "indicator"]])).values
+    recompute = values[values["year"].values >= cutoff]
+    stored_cutoff = first_changed.reindex(pd.MultiIndex.from_frame(stored[["region", "indicator"]])).values
+    kept = stored[stored["year"].values < stored_cutoff]
+    if recompute.empty:
+        return stored, 0
+
+    # Running statistics at the last kept year of each (region, indicator)
+    base = kept.groupby(["region", "indicator"])[["n", "sum", "sumsq"]].last()
+    components = pd.concat([kept, _expanding_zscores(recompute, base)], ignore_index=True)
+    return components.sort_values(PANEL_KEYS, ignore_index=True), len(recompute)
+
+
+def health_scores(components):
+    """
+    Composite score per (region, year): the weighted mean of signed, clipped z-scores
+    over the components available that year.
+    """
+    components = components.dropna(subset=["z"])
+    weights = components["indicator"].map({k: c["weight"] for k, c in HEALTH_SCORE_COMPONENTS.items()})
+    directions = components["indicator"].map({k: c["direction"] for k, c in HEALTH_SCORE_COMPONENTS.items()})
+    weighted = pd.DataFrame({
+        "region": components["region"],
+        "year": components["year"],
+        "score": weights * directions * components["z"],
+        "weight": weights,
+    }).groupby(["region", "year"])[["score", "weight"]].sum()
+    scores = (weighted["score"] / weighted["weight"]).rename("score")
+    return scores.reset_index()
+
+
+class HealthScore:
+    """
+    Economic Health Score per region and year, with its map figure built on first use.
+    Build instances through `get_health_score` so reruns on the same data share one.
+    """
+
+    def __init__(self, scores, version):
+        self.scores = scores
+        self.version = version
+        self._figure = None
+        self._figure_lock = threading.Lock()
+
+    @property
+    def latest_year(self):
+        return int(self.scores["year"].max())
+
+    def latest(self):
+        """
+        Score per region for the latest year every region has a score for, else the
+        latest score each region has.
+        """
+        by_region = self.scores.pivot(index="year", columns="region", values="score").dropna()
+        if not by_region.empty:
+            return by_region.iloc[-1], int(by_region.index[-1])
+        return self.scores.groupby("region")["score"].last(), self.latest_year
+
+    @property
+    def figure(self):
+        with self._figure_lock:
+            if self._figure is None:
+                self._figure = self._build_figure()
+            return self._figure
+
+    def _build_figure(self):
+        latest, year = self.latest()
+        countries = [(country, region) for region, names in REGION_COUNTRIES.items() for country in names]
+        arial = lambda size, color="black": {"family": "Arial", "size": size, "color": color}
+        summary = "<br>".join(
+            f"{region}: <span style='color: {'#8BC34A' if score >= 0 else '#FFB74D'}'>{score:.2f}</span>"
+            for region, score in latest.items()
+        )
+        fig = go.Figure(go.Choropleth(
+            locations=[country for country, _ in countries],
+            locationmode="country names",
+            z=[latest.get(region, np.nan) for _, region in countries],
+            customdata=[region for _, region in countries],
+            hovertemplate="<b>%{location}</b><br>Region: %{customdata}<br>Economic Health Score: %{z:.2f}<extra></extra>",
+            coloraxis="coloraxis",
+        ))
+        fig.update_layout(
+            title={"text": f"Global Economic Health Score ({year})", "font": arial(24, "#333333")},
+            height=1000,
+            geo={
+                "projection": {"type": "natural earth"}, "showframe": True, "showocean": True,
+                "oceancolor": "lightblue", "lakecolor": "lightblue", "showland": True, "landcolor": "white",
+                "countrycolor": "black", "subunitcolor": "gray", "bgcolor": "white",
+            },
+            coloraxis={
+                "colorscale": [[0.0, '#FFB74D'], [1.0, '#8BC34A']],
+                "cmin": -1, "cmax": 1,
+                "colorbar": {
+                    "title": {"text": "Economic Health Score<br><br>", "font": arial(14)},
+                    "tickfont": arial(14), "tickvals": [-1, 0, 1], "ticktext": ["Negative", "Neutral", "Positive"],
+                    "len": 0.8, "thickness": 20, "outlinewidth": 1, "outlinecolor": "black",
+                },
+            },
+            hoverlabel={"font": arial(14), "bgcolor": "rgba(255, 255, 255, 0.7)"},
+            annotations=[{
+                "text": summary, "align": "left", "showarrow": False, "x": 0.018, "y": 1.04,
+                "xref": "paper", "yref": "paper", "bgcolor": "rgba(255, 255, 255, 0.7)",
+                "bordercolor": "black", "borderwidth": 1, "borderpad": 10, "font": arial(14),
+            }],
+        )
+        return fig
+
+
+def _health_components_path():
+    return os.path.join(utils.CACHE_DIR, "health_score", "components.parquet")
+
+
+def get_health_score():
+    """
+    Economic Health Score from the regional indicators.
+
+    Component z-scores are stored under CACHE_DIR and shared by every process. When the
+    regional data changes only the rows from the first new or revised year onward are
+    recomputed, and within a process the result is reused until the data changes.
+    """
+    panel, version = regional_indicator_panel()
+    with _health_score_lock:
+        cached = _health_score.get("score")
+    if cached is not None and cached.version == version:
+        return cached
+
+    path = _health_components_path()
+    with _file_lock(path + ".lock"):
+        stored, _ = _read_parquet_cached(path)
+        components, updated = update_health_components(panel, stored)
+        if updated:
+            _write_parquet_atomic(components, path)
+
+    health_score = HealthScore(health_scores(components), version)
+    with _health_score_lock:
+        _health_score["score"] = health_score
+    return health_score
+
+
+# Regional PCA
+def region_matrix(panel, region):
+    """
+    Year x indicator matrix of `region`, keeping years where every indicator is observed
+    and indicators that vary.
+    """
+    rows = panel[(panel["region"] == region) & panel["indicator"].isin(PCA_INDICATORS)]
+    matrix = rows.pivot(index="year", columns="indicator", values="value")
+    matrix = matrix.dropna(axis=1, how="all").dropna()
+    return matrix.loc[:, matrix.std() > 0]
+
+
+def matrix_version(matrix):
+    """
+    Content hash of a region matrix (years, indicators and values).
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(matrix.values, dtype=float).tobytes())
+    digest.update(np.asarray(matrix.index, dtype=np.int64).tobytes())
+    digest.update("|".join(map(str, matrix.columns)).encode())
+    return digest.hexdigest()
+
+
+def fit_pca(values, n_components=PCA_COMPONENTS):
+    """
+    Loadings (indicators x components, as correlations with each component) and
+    explained variance ratios of the standardized columns of `values`.
+    """
+    X = (values - values.mean(axis=0)) / values.std(axis=0, ddof=1)
+    n_components = min(n_components, *X.shape)
+    # A handful of indicators over a few decades: a full SVD takes microseconds
+    _, singular_values, components = np.linalg.svd(X, full_matrices=False)
+    singular_values, components = singular_values[:n_components], components[:n_components]
+    explained = singular_values ** 2 / (X ** 2).sum()
+    loadings = components.T * singular_values / np.sqrt(X.shape[0] - 1)
+    # Component signs are arbitrary; make the largest loading positive so they stay stable
+    rows = np.abs(loadings).argmax(axis=0)
+    loadings = loadings * np.sign(loadings[rows, np.arange(loadings.shape[1])])
+    return loadings, explained
+
+
+def _pca_result(region, version, values, indicators, years):
+    """
+    Fit one region's PCA, as the plain data stored under CACHE_DIR.
+    """
+    loadings, explained = fit_pca(values)
+    return {
+        "region": region,
+        "version": version,
+        "indicators": list(indicators),
+        "years": [int(years[0]), int(years[-1]), len(years)],
+        "loadings": loadings.tolist(),
+        "explained": explained.tolist(),
+    }
+
+
+class RegionalPCA:
+    """
+    Fitted PCA of one region's indicators, with its figure built on first use.
+    Build instances through `get_regional_pca` so every session shares one per data version.
+    """
+
+    def __init__(self, result):
+        self.region = result["region"]
+        self.version = result["version"]
+        self.years = result["years"]
+        self.explained = np.asarray(result["explained"])
+        self.loadings = pd.DataFrame(
+            result["loadings"],
+            index=result["indicators"],
+            columns=[f"PC{i + 1}" for i in range(len(self.explained))],
+        )
+        self._figure = None
+        self._figure_lock = threading.Lock()
+
+    @property
+    def figure(self):
+        with self._figure_lock:
+            if self._figure is None:
+                self._figure = self._build_figure()
+            return self._figure
+
+    def _build_figure(self):
+        from plotly.subplots import make_subplots
+
+        components = list(self.loadings.columns)
+        fig = make_subplots(
+            rows=1,
+            cols=len(components),
+            subplot_titles=[f"{pc}: {ratio:.1%} of variance" for pc, ratio in zip(components, self.explained)],
+            horizontal_spacing=0.05,
+        )
+        for i, pc in enumerate(components):
+            loadings = self.loadings[pc].sort_values(ascending=False)
+            fig.add_trace(go.Bar(
+                x=[name.title() for name in loadings.index],
+                y=loadings.values,
+                text=[f"{value:.2f}" for value in loadings.values],
+                textposition="outside",
+                marker_color=np.where(loadings.values >= 0, "#8BC34A", "#FFB74D"),
+                hovertemplate="%{x}: %{y:.3f}<extra></extra>",
+            ), row=1, col=i + 1)
+        fig.update_xaxes(tickangle=45, showgrid=True, gridwidth=1, gridcolor="rgba(128,128,128,0.2)")
+        fig.update_yaxes(range=[-1.1, 1.1], showgrid=True, gridwidth=1, gridcolor="rgba(128,128,128,0.2)",
+                         zeroline=True, zerolinewidth=1.5, zerolinecolor="rgba(0,0,0,0.2)")
+        first_year, last_year, _ = self.years
+        fig.update_layout(
+            title={
+                "text": f"Indicator Loadings (Region: {self.region}, {first_year}-{last_year})"
+                        f"<br>PC1 Explains: {self.explained[0]:.2%} Variance",
+                "font": {"size": 24, "color": "#1f77b4"}, "x": 0.5, "xanchor": "center",
+            },
+            height=700,
+            margin={"t": 150, "l": 50, "r": 50, "b": 50},
+            font={"family": "Arial, sans-serif", "size": 12},
+            showlegend=False,
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+        )
+        return fig
+
+
+def _pca_path(region, version):
+    safe_region = "".join(c if c.isalnum() else "_" for c in region)
+    return os.path.join(utils.CACHE_DIR, "pca", f"{safe_region}-{version[:16]}.json")
+
+
+def _cached_pca(region, version):
+    """
+    RegionalPCA from memory or CACHE_DIR, or None if it hasn't been fitted yet.
+    """
+    key = (region, version)
+    with _pca_lock:
+        pca = _pca_results.get(key)
+    if pca is not None:
+        return pca
+    try:
+        result = json.loads(_read_text_cached(_pca_path(region, version)))
+    except (FileNotFoundError, ValueError):
+        return None
+    pca = RegionalPCA(result)
+    with _pca_lock:
+        _pca_results[key] = pca
+    return pca
+
+
+def get_regional_pca(region):
+    """
+    Fitted PCA of `region`'s indicators, computed once per version of its data and then
+    served from memory and CACHE_DIR. Raises KeyError for a region without enough data.
+    A fit that fails is not retried until the region's data changes.
+    """
+    region = PCA_REGION_ALIASES.get(region, region)
+    panel, _ = regional_indicator_panel()
+    matrix = region_matrix(panel, region)
+    if len(matrix) < PCA_MIN_YEARS or matrix.shape[1] < 2:
+        raise KeyError(f"No regional data for a PCA of {region}")
+    version = matrix_version(matrix)
+    pca = _cached_pca(region, version)
+    if pca is not None:
+        return pca
+
+    key = (region, version)
+    with _pca_lock:
+        error = _pca_failures.get(key)
+    if error is not None:
+        raise error
+    try:
+        result = _pca_result(region, version, matrix.values, list(matrix.columns), matrix.index.values)
+    except ValueError as e:  # Includes np.linalg.LinAlgError
+        logger.warning("Regional PCA for %s failed: %r", region, e)
+        with _pca_lock:
+            _pca_failures[key] = e
+        raise
+    _write_json_atomic(result, _pca_path(*key))
+    pca = RegionalPCA(result)
+    with _pca_lock:
+        _pca_results[key] = pca
+    return pca
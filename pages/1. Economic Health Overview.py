@@ -4,7 +4,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import os
-import base64
+import requests
+from econ_models import get_health_score, get_regional_pca, get_regional_view
+from utils import asset_url, finish_page_timing, render_plot, start_page_timing, timed_section
 
 # Configure Streamlit page
 st.set_page_config(
@@ -12,18 +14,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("Economic Health Overview")
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 st.markdown(f"""
     <style>
@@ -88,7 +82,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{{image_base64}}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%; /* Adjust the size of the image vertically */
             background-position: center 0%; /* Move the image down */
             background-repeat: no-repeat;
@@ -312,19 +306,8 @@ st.markdown("""
 # Modified load_html_plot function
 def load_html_plot(plot_file, height=1000):
     try:
-        plot_path = os.path.join("plots", plot_file)
-        with open(plot_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-            
         st.markdown('<div class="plot-container">', unsafe_allow_html=True)
-        html_base64 = base64.b64encode(html_content.encode('utf-8')).decode('utf-8')
-        components.html(
-            f"""
-            <iframe src="data:text/html;base64,{html_base64}" 
-                    width="2400" height="1200" style="border: none !important;"></iframe>
-            """, 
-            height=height
-        )
+        render_plot(plot_file, height=height, width=2400)
         st.markdown('</div>', unsafe_allow_html=True)
     except FileNotFoundError:
         st.error(f"Plot '{plot_file}' not found.")
@@ -333,7 +316,13 @@ def load_html_plot(plot_file, height=1000):
 
 # Display plot
 st.markdown("### Economic Health Score")
-load_html_plot("Econ_Health_Score.html")
+try:
+    with timed_section("economic health score"):
+        st.plotly_chart(get_health_score().figure, use_container_width=True, key="econ_health_score")
+except (OSError, requests.RequestException, ValueError, KeyError) as e:
+    # Regional data unavailable: fall back to the pre-rendered map, and say so
+    st.warning(f"Could not compute the Economic Health Score ({e}); showing the last saved map.")
+    load_html_plot("Econ_Health_Score.html")
 
 # Market data for tables
 market_data = pd.DataFrame({
@@ -363,39 +352,41 @@ def get_performance_color(value):
     except ValueError:
         return "background-color: #F8F9FA;"
 
-# Style the main table
-styled_table = market_data.style.applymap(
-    get_performance_color, subset=["Trailing 6-Month Performance (%)", "Trailing 12-Month Performance (%)"]
-)
-
-# Sort data for the right table
-sorted_data = market_data.sort_values("Trailing 12-Month Performance (%)", ascending=False)
-
-# Side-by-side tables with specified heights
-col1, col2 = st.columns([2, 1], gap="small")
-
-# Market Overview Table
-with col1:
-    st.markdown("### Market Overview")
-    st.markdown(
-        styled_table.format({
-            "Weighting in S&P 500 (%)": "{:.1f}", 
-            "Trailing 6-Month Performance (%)": "{:.1f}", 
-            "Trailing 12-Month Performance (%)": "{:.1f}"
-        }).to_html(),
-        unsafe_allow_html=True
+# Market tables (pandas Styler rendered to HTML)
+with timed_section("market tables (Styler)"):
+    # Style the main table
+    styled_table = market_data.style.applymap(
+        get_performance_color, subset=["Trailing 6-Month Performance (%)", "Trailing 12-Month Performance (%)"]
     )
 
-# Sorted Performance Table
-with col2:
-    st.markdown("### Top Performers (Trailing 12-Month)")
-    sorted_table = sorted_data[["Market Sector", "Trailing 12-Month Performance (%)"]].style.applymap(
-        get_performance_color, subset=["Trailing 12-Month Performance (%)"]
-    )
-    st.markdown(
-        sorted_table.format({"Trailing 12-Month Performance (%)": "{:.1f}"}).to_html(),
-        unsafe_allow_html=True
-    )
+    # Sort data for the right table
+    sorted_data = market_data.sort_values("Trailing 12-Month Performance (%)", ascending=False)
+
+    # Side-by-side tables with specified heights
+    col1, col2 = st.columns([2, 1], gap="small")
+
+    # Market Overview Table
+    with col1:
+        st.markdown("### Market Overview")
+        st.markdown(
+            styled_table.format({
+                "Weighting in S&P 500 (%)": "{:.1f}", 
+                "Trailing 6-Month Performance (%)": "{:.1f}", 
+                "Trailing 12-Month Performance (%)": "{:.1f}"
+            }).to_html(),
+            unsafe_allow_html=True
+        )
+
+    # Sorted Performance Table
+    with col2:
+        st.markdown("### Top Performers (Trailing 12-Month)")
+        sorted_table = sorted_data[["Market Sector", "Trailing 12-Month Performance (%)"]].style.applymap(
+            get_performance_color, subset=["Trailing 12-Month Performance (%)"]
+        )
+        st.markdown(
+            sorted_table.format({"Trailing 12-Month Performance (%)": "{:.1f}"}).to_html(),
+            unsafe_allow_html=True
+        )
 
 
 # Dropdown for Data Type Selection
@@ -441,10 +432,6 @@ if selected_data_type == "PCA - Indicators Influence on Expenditures":
 # Dynamically sized plot loading function
 def load_html_plot(plot_name, max_width=3000, dynamic_height=True):
     try:
-        plot_path = os.path.join("plots", f"{plot_name}.html")
-        with open(plot_path, "r", encoding="utf-8") as f:
-            plot_html = f.read()
-
         # Dynamic height adjustment based on content type
         height = 800  # Default height
         if dynamic_height:
@@ -455,17 +442,9 @@ def load_html_plot(plot_name, max_width=3000, dynamic_height=True):
             else:
                 height = 1000
 
-        # Embed the plot using an iframe with responsive width
+        # Embed the plot with responsive width
         st.markdown('<div class="plot-container" style="overflow-x: auto;">', unsafe_allow_html=True)
-        html_base64 = base64.b64encode(plot_html.encode('utf-8')).decode('utf-8')
-        components.html(
-            f"""
-            <iframe src="data:text/html;base64,{html_base64}" 
-                    width="100%" style="max-width:{max_width}px; border: none !important;" height="{height}">
-            </iframe>
-            """, 
-            height=height
-        )
+        render_plot(f"{plot_name}.html", height=height, container_style=f"max-width:{max_width}px;")
         st.markdown('</div>', unsafe_allow_html=True)
     except FileNotFoundError:
         st.error(f"Plot '{plot_name}' not found.")
@@ -484,20 +463,48 @@ st.markdown("""
 if selected_data_type == "PCA - Indicators Influence on Expenditures":
     plot_name = f"{selected_region}_PCA_I_E"
     st.write(f"Displaying PCA analysis for **{selected_region}**.")
-    load_html_plot(plot_name)
+    try:
+        with timed_section("regional PCA"):
+            regional_pca = get_regional_pca(selected_region)
+            st.plotly_chart(regional_pca.figure, use_container_width=True, key="regional_pca")
+    except KeyError:
+        # Regions without regional data (Oceania) keep their pre-rendered plot
+        load_html_plot(plot_name)
+    except (OSError, requests.RequestException, ValueError) as e:
+        st.warning(f"Could not compute the PCA for {selected_region} ({e}); showing the last saved plot.")
+        load_html_plot(plot_name)
 else:
     plot_mapping = {
         "Regional GDP": "Regional_gdp",
         "Regional Volume of Imports of Goods": "Regional_voli",
-        "Regional Volume of Exports of Goods": "Regional_vole",
         "Regional Inflation, Average CPI": "Regional_inf",
         "Regional Unemployment Rate": "Reigonal_unemp",
         "Regional Total Investment": "Regional_toti",
         "Regional Expenditure": "Regional_expenditure"
     }
-    plot_name = plot_mapping[selected_data_type]
-    st.write(f"Displaying **{selected_data_type}** data visualization.")
-    load_html_plot(plot_name)
+    # Slice of the regional indicator store behind each view
+    regional_views = {
+        "Regional GDP": "gdp",
+        "Regional Volume of Imports of Goods": "imports",
+        "Regional Inflation, Average CPI": "inflation",
+        "Regional Unemployment Rate": "unemployment",
+        "Regional Total Investment": "investment",
+        "Regional Expenditure": "expenditure",
+    }
+    if selected_data_type not in regional_views:
+        # Regional_vole.html is a copy of the inflation plot, so there is nothing to show yet
+        st.info(f"**{selected_data_type}** data is not available yet.")
+    else:
+        plot_name = plot_mapping[selected_data_type]
+        st.write(f"Displaying **{selected_data_type}** data visualization.")
+        try:
+            with timed_section("regional view"):
+                regional_view = get_regional_view(regional_views[selected_data_type])
+                st.plotly_chart(regional_view.figure, use_container_width=True, key="regional_view")
+        except (OSError, requests.RequestException, ValueError, KeyError) as e:
+            # Regional store unavailable: fall back to the pre-rendered plot, and say so
+            st.warning(f"Could not build the {selected_data_type} view ({e}); showing the last saved plot.")
+            load_html_plot(plot_name)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -510,4 +517,6 @@ st.markdown(f"""
         <div style="color: #90A4AE; font-size: 0.8rem; margin-top: 1rem;">
             Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</div>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_page_timing()
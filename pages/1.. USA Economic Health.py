@@ -4,7 +4,7 @@ import numpy as np
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import os
-import base64
+from utils import PLOT_MODE, asset_url, finish_page_timing, render_plot, render_plot_group, start_page_timing
 
 # Configure Streamlit page
 st.set_page_config(
@@ -12,18 +12,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("USA Economic Health")
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 st.markdown(f"""
     <style>
@@ -59,7 +51,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{image_base64}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%; /* Adjust the size of the image vertically */
             background-position: center 0%; /* Move the image down */
             background-repeat: no-repeat;
@@ -287,14 +279,23 @@ with tab1:
 
     PLOTS_PATH = os.path.join(os.path.dirname(__file__), "..", "plots")
 
+    if PLOT_MODE == "shared":
+        # All overview charts in one document with a single Plotly.js runtime
+        available = [p for p in PLOT_FILES if os.path.exists(os.path.join(PLOTS_PATH, p[0]))]
+        st.markdown('<div class="plot-container">', unsafe_allow_html=True)
+        render_plot_group(
+            [{"file": plot_file, "height": 650, "title": plot_title, "description": PLOT_DESCRIPTIONS.get(plot_file)}
+             for plot_file, plot_title, max_width, max_height in available],
+            width=2400
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
+        PLOT_FILES = [p for p in PLOT_FILES if p not in available]
+
     # Display plots with descriptions
     for plot_file, plot_title, max_width, max_height in PLOT_FILES:
         plot_path = os.path.join(PLOTS_PATH, plot_file)
         
         if os.path.exists(plot_path):
-            with open(plot_path, "r", encoding="utf-8") as f:
-                html_content = f.read()
-            
             st.markdown(f"### {plot_title}")
             
             # Add description
@@ -307,10 +308,9 @@ with tab1:
             
             # Plot container
             st.markdown('<div class="plot-container">', unsafe_allow_html=True)
-            html_base64 = base64.b64encode(html_content.encode('utf-8')).decode('utf-8')
             # Embed plots dynamically
-            components.html(
-                html_content,  # Use the raw HTML content
+            render_plot(
+                plot_file,
                 width=2400,  # Set the iframe width to 2400px
                 height=650,  # Adjust height as needed or leave it as is
                 scrolling=True  # Enable scrolling for content overflow
@@ -331,20 +331,12 @@ with tab2:
     if metric_type in ["All", "Debt"]:
         if os.path.exists(os.path.join(PLOTS_PATH, "Interest_Cov_Ratio.html")):
             st.markdown("#### Interest Coverage Ratio")
-            components.html(
-                open(os.path.join(PLOTS_PATH, "Interest_Cov_Ratio.html")).read(),
-                height=650,
-                width=2400
-            )
+            render_plot("Interest_Cov_Ratio.html", height=650, width=2400, key="fiscal-Interest_Cov_Ratio.html")
     
     if metric_type in ["All", "Revenue"]:
         if os.path.exists(os.path.join(PLOTS_PATH, "usa_sur_def.html")):
             st.markdown("#### Surplus/Deficit")
-            components.html(
-                open(os.path.join(PLOTS_PATH, "usa_sur_def.html")).read(),
-                height=650,
-                width=2400
-            )
+            render_plot("usa_sur_def.html", height=650, width=2400, key="fiscal-usa_sur_def.html")
 
 with tab3:
     # Economic Indicators Tab
@@ -385,3 +377,5 @@ st.markdown("""
     </p>
 </div>
 """.format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
+
+finish_page_timing()
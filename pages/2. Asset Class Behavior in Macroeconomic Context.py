@@ -4,7 +4,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import os
-import base64
+import requests
+from regime_models import REGIMES, get_current_regime, get_regime_heatmap
+from utils import asset_url, finish_page_timing, render_plot, start_page_timing, timed_section
 
 # Configure Streamlit page
 st.set_page_config(
@@ -12,18 +14,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("Asset Class Behavior")
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 st.markdown(f"""
     <style>
@@ -59,7 +53,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{image_base64}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%; /* Adjust the size of the image vertically */
             background-position: center 0%; /* Move the image down */
             background-repeat: no-repeat;
@@ -242,28 +236,23 @@ with st.sidebar:
 # Function to load HTML plots with consistent styling
 def load_html_plot(plot_name, height=None):
     try:
-        plot_path = os.path.join("plots", f"{plot_name}.html")
-        with open(plot_path, "r", encoding="utf-8") as f:
-            plot_html = f.read()
-
-            # Set default or provided height
-            if not height:
-                if "PCA" in plot_name:
-                    height = 2200
-                elif any(keyword in plot_name for keyword in ["gdp", "inf", "int", "heatmap"]):
-                    height = 1600
-                else:
-                    height = 3000
-
-            # Styled HTML wrapper for consistency with minimal spacing
-            styled_html = f"""
-            <div style="width: 100%; max-width: 2400px; margin: 0 auto; 
-                        border: 1px solid #E0E0E0; border-radius: 12px; 
-                        padding: 1rem 0.5rem 0rem; background-color: #FFFFFF;">
-                {plot_html}
-            </div>
-            """
-            components.html(styled_html, height=height)
+        # Set default or provided height
+        if not height:
+            if "PCA" in plot_name:
+                height = 2200
+            elif any(keyword in plot_name for keyword in ["gdp", "inf", "int", "heatmap"]):
+                height = 1600
+            else:
+                height = 3000
+
+        # Styled wrapper for consistency with minimal spacing
+        render_plot(
+            f"{plot_name}.html",
+            height=height,
+            container_style="width: 100%; max-width: 2400px; margin: 0 auto; "
+                            "border: 1px solid #E0E0E0; border-radius: 12px; "
+                            "padding: 1rem 0.5rem 0rem; background-color: #FFFFFF;"
+        )
     except FileNotFoundError:
         st.error(f"Plot '{plot_name}' not found.")
     except Exception as e:
@@ -305,18 +294,106 @@ selected_plot = st.selectbox(
     format_func=lambda x: x[1]  # Display user-friendly title
 )
 
-# Check for Secondary Plot (e.g., Current Regime Analysis)
-secondary_plot = selected_plot[2]  # Access the corresponding current regime plot, if any
-if secondary_plot:
-    st.markdown("""
+# Regime heatmaps and current regime tiles built live from the cached macro and asset series
+live_heatmaps = {
+    "gdp_regime_heatmap": "gdp",
+    "inflation_regime_heatmap": "inflation",
+    "int_regime_heatmap": "rates",
+}
+live_current_regimes = {
+    "curr_reg_gdp": "gdp",
+    "curr_reg_inf": "inflation",
+    "curr_reg_int": "rates",
+}
+
+# Regime cutoffs, shared by the current regime tiles and the heatmap
+thresholds = None
+if selected_plot[0] in live_heatmaps:
+    regime_kind = live_heatmaps[selected_plot[0]]
+    regime_spec = REGIMES[regime_kind]
+    low, high = regime_spec["threshold_range"]
+    labels = regime_spec["labels"]
+    # One slider per cutoff between neighbouring regimes
+    threshold_columns = st.columns(len(regime_spec["thresholds"]))
+    thresholds = [
+        column.slider(
+            f"{labels[i]} / {labels[i + 1]} cutoff (%)",
+            min_value=low,
+            max_value=high,
+            value=float(default),
+            step=0.25,
+            key=f"{regime_kind}_threshold_{i}",
+        )
+        for i, (column, default) in enumerate(zip(threshold_columns, regime_spec["thresholds"]))
+    ]
+    if thresholds != sorted(thresholds):
+        st.caption("Cutoffs are applied in ascending order.")
+
+
+def render_current_regime(current):
+    """
+    One tile per asset, shaded by its average return in the current regime.
+    """
+    colorscale = REGIMES[current["kind"]]["colorscale"]
+    low_color, high_color = colorscale[0][1], colorscale[-1][1]
+    tiles = []
+    for asset, score in current["scores"].items():
+        avg_return = current["returns"][asset]
+        if score is None:
+            background, value = "#F5F5F5", "n/a"
+        else:
+            color = (high_color if score >= 0 else low_color).lstrip("#")
+            red, green, blue = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+            background = f"rgba({red}, {green}, {blue}, {0.15 + 0.85 * abs(score):.2f})"
+            value = f"{avg_return:+.2f}%"
+        tiles.append(f"""
+            <div style="flex: 1; min-width: 110px; padding: 0.8rem 0.5rem; border-radius: 8px;
+                        background-color: {background}; text-align: center;">
+                <div style="font-size: 0.9rem; color: #424242;">{asset}</div>
+                <div style="font-size: 1.2rem; font-weight: 700; color: #212121;">{value}</div>
+            </div>""")
+    st.markdown(f"""
         <div style="color: #2E7D32; font-size: 1.5rem; font-weight: 700; margin-bottom: 0rem;">
-            Current Market Regime
+            Current Market Regime: {current["regime"]}
         </div>
+        <p style="color: #666666; margin-bottom: 0.5rem;">
+            Indicator at {current["value"]:.2f}% as of {current["as_of"]}. Tiles show each asset's
+            average monthly return in this regime.
+        </p>
+        <div style="display: flex; flex-wrap: wrap; gap: 0.5rem; margin-bottom: 1.5rem;">{"".join(tiles)}</div>
     """, unsafe_allow_html=True)
-    load_html_plot(secondary_plot, height=300)  # Current regime plot displayed above
+
+
+# Check for Secondary Plot (e.g., Current Regime Analysis)
+secondary_plot = selected_plot[2]  # Access the corresponding current regime plot, if any
+if secondary_plot:
+    try:
+        with timed_section(f"current regime {secondary_plot}"):
+            render_current_regime(get_current_regime(live_current_regimes[secondary_plot], thresholds))
+    except (OSError, requests.RequestException, ValueError, KeyError) as e:
+        # Fall back to the pre-rendered snapshot if the data can't be loaded, and say so
+        st.warning(f"Could not load the current regime ({e}); showing the last saved snapshot.")
+        st.markdown("""
+            <div style="color: #2E7D32; font-size: 1.5rem; font-weight: 700; margin-bottom: 0rem;">
+                Current Market Regime
+            </div>
+        """, unsafe_allow_html=True)
+        load_html_plot(secondary_plot, height=300)  # Current regime plot displayed above
 
 # Display Main Heatmap Plot
-load_html_plot(selected_plot[0])  # Load primary plot
+if selected_plot[0] in live_heatmaps:
+    try:
+        with timed_section(f"regime heatmap {selected_plot[0]}"):
+            heatmap = get_regime_heatmap(regime_kind, thresholds)
+            st.plotly_chart(heatmap.figure, use_container_width=True, key=selected_plot[0])
+        if heatmap.missing:
+            st.warning(f"Could not load {', '.join(heatmap.missing)}; the heatmap shows the other assets.")
+    except (OSError, requests.RequestException, ValueError, KeyError) as e:
+        # Fall back to the pre-rendered heatmap if the data can't be loaded, and say so
+        st.warning(f"Could not build the regime heatmap ({e}); showing the last saved heatmap.")
+        load_html_plot(selected_plot[0])
+else:
+    load_html_plot(selected_plot[0])  # Load primary plot
 
 # Footer
 st.markdown("""
@@ -328,4 +405,6 @@ st.markdown("""
         Bureau of Economic Analysis (BEA)
     </p>
 </div>
-""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
\ No newline at end of file
+""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
+
+finish_page_timing()
@@ -4,11 +4,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import os
-import base64
-import yfinance as yf
-from fredapi import Fred
 import plotly.graph_objects as go
 import plotly.subplots as sp
+from utils import asset_url, downsample_series, finish_page_timing, get_fred_series, get_price_history, render_plot, start_page_timing, timed_section
 
 # Configure Streamlit page
 st.set_page_config(
@@ -16,22 +14,13 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("SP500 Analysis")
 
 # FRED API Configuration
 secret_value_0 = "4ac2266ac7d9766069d3d0755561988a"  # Replace with your FRED API key
-fred = Fred(api_key=secret_value_0)
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 st.markdown(f"""
     <style>
@@ -59,7 +48,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{image_base64}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%;
             background-position: center 0%;
             background-repeat: no-repeat;
@@ -185,28 +174,25 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Fetching live data
-
-sp500 = yf.Ticker('^GSPC')
-sp500_hist = sp500.history(period='max')
+# Fetching live data (local store, only bars newer than the last stored date are downloaded)
+with timed_section("S&P 500 price history"):
+    sp500_hist = get_price_history('^GSPC')
 sp500_close = sp500_hist['Close']
 latest_price = sp500_close.iloc[-1]
-pct_change = sp500_close.pct_change()
-latest_pct_change = pct_change.iloc[-1] * 100
-# Calculate the Log Returns
-log_returns = np.log(sp500_close / sp500_close.shift(1))
+latest_pct_change = (sp500_close.iloc[-1] / sp500_close.iloc[-2] - 1) * 100
 
-# Calculate the rolling yearly volatility (252 trading days in a year)
-yearly_volatility = log_returns.rolling(window=252).std() * np.sqrt(252)  # Annualizing volatility
+# Log returns, rolling yearly volatility (252 trading days, annualized) and
+# volume pct change from a year ago are maintained incrementally by the store
+log_returns = sp500_hist['log_returns']
+yearly_volatility = sp500_hist['yearly_volatility']
+volume_pct_change = sp500_hist['volume_pct_change']
 
-# Calculate the percentage change of the Volume
-volume_pct_change = sp500_hist["Volume"].pct_change(365) * 100  # Volume pct change from a year ago
 
-
-# Retrieve data from FRED
-gdp_data = fred.get_series('GDPC1')  # Real GDP
-inflation_data = fred.get_series('CPIAUCSL')  # Inflation (CPI)
-unemployment_data = fred.get_series('UNRATE')  # Unemployment
+# Retrieve data from FRED (served from the shared cache between refreshes)
+with timed_section("FRED series"):
+    gdp_data = get_fred_series('GDPC1', api_key=secret_value_0)  # Real GDP
+    inflation_data = get_fred_series('CPIAUCSL', api_key=secret_value_0)  # Inflation (CPI)
+    unemployment_data = get_fred_series('UNRATE', api_key=secret_value_0)  # Unemployment
 
 # Fill missing data (NaN) using forward fill or interpolation
 gdp_data = gdp_data.fillna(method='ffill')  # Forward fill missing GDP data
@@ -279,22 +265,40 @@ with tab1:
     for plot_file in plot_files.get(plot_category, []):
         plot_path = os.path.join(os.path.dirname(__file__), "..", "plots", plot_file)
         if os.path.exists(plot_path):
-            with open(plot_path, "rb") as f:
-                html_content = f.read().decode(errors="ignore")
-            
             st.markdown(f"### {plot_file.replace('.html', '').replace('_', ' ').title()}")
             if plot_file in PLOT_DESCRIPTIONS:
                 st.info(PLOT_DESCRIPTIONS[plot_file])
-            components.html(html_content, height=800, width=2400)
+            render_plot(plot_file, height=800, width=2400)
 
 
 with tab2:  # SP500 Tab (Second)
-    # Filter data from 1960 onwards
-    start_date = '1960-01-01'
-    filtered_data = sp500_hist[sp500_hist.index >= start_date]
-    filtered_returns = log_returns[log_returns.index >= start_date]
-    filtered_volatility = yearly_volatility[yearly_volatility.index >= start_date]
-    filtered_volume_change = volume_pct_change[volume_pct_change.index >= start_date]
+    # Visible date range, from 1960 onwards by default. Narrowing it redraws the
+    # window at finer resolution, since the point budget below stays the same
+    first_date = sp500_hist.index[0].date()
+    last_date = sp500_hist.index[-1].date()
+    view_start, view_end = st.slider(
+        "Date Range",
+        min_value=first_date,
+        max_value=last_date,
+        value=(max(first_date, datetime(1960, 1, 1).date()), last_date),
+        format="YYYY-MM-DD",
+        key="sp500_date_range"
+    )
+    start_date, end_date = str(view_start), str(view_end)
+    filtered_data = sp500_hist.loc[start_date:end_date]
+    filtered_returns = log_returns.loc[start_date:end_date]
+    filtered_volatility = yearly_volatility.loc[start_date:end_date]
+    filtered_volume_change = volume_pct_change.loc[start_date:end_date]
+
+    # Level-of-detail: about one point per horizontal pixel of the plot area. Smooth
+    # series keep their shape with LTTB, spiky ones keep every extreme with min/max buckets
+    PLOT_WIDTH = 2400
+    LOD_POINTS = PLOT_WIDTH - 100
+    with timed_section("SP500 downsampling"):
+        price_lod = downsample_series(filtered_data['Close'], LOD_POINTS, method="lttb")
+        returns_lod = downsample_series(filtered_returns * 100, LOD_POINTS, method="minmax")
+        volatility_lod = downsample_series(filtered_volatility * 100, LOD_POINTS, method="lttb")
+        volume_change_lod = downsample_series(filtered_volume_change, LOD_POINTS, method="minmax")
 
     # Create subplots
     fig = sp.make_subplots(
@@ -313,8 +317,8 @@ with tab2:  # SP500 Tab (Second)
     # S&P 500 Price Plot
     fig.add_trace(
         go.Scatter(
-            x=sp500_hist.index,
-            y=sp500_hist['Close'],
+            x=price_lod.index,
+            y=price_lod,
             mode='lines',
             name='S&P 500',
             line=dict(
@@ -330,8 +334,8 @@ with tab2:  # SP500 Tab (Second)
     # Log Returns Plot
     fig.add_trace(
         go.Scatter(
-            x=log_returns.index,
-            y=log_returns * 100,
+            x=returns_lod.index,
+            y=returns_lod,
             mode='lines',
             name='Log Returns',
             line=dict(
@@ -347,8 +351,8 @@ with tab2:  # SP500 Tab (Second)
     # Yearly Volatility Plot
     fig.add_trace(
         go.Scatter(
-            x=yearly_volatility.index,
-            y=yearly_volatility * 100,
+            x=volatility_lod.index,
+            y=volatility_lod,
             mode='lines',
             name='Yearly Volatility',
             line=dict(
@@ -364,8 +368,8 @@ with tab2:  # SP500 Tab (Second)
     # Volume % Change Plot
     fig.add_trace(
         go.Scatter(
-            x=volume_pct_change.index,
-            y=volume_pct_change,
+            x=volume_change_lod.index,
+            y=volume_change_lod,
             mode='lines',
             name='Volume % Change',
             line=dict(
@@ -382,9 +386,9 @@ with tab2:  # SP500 Tab (Second)
     fig.update_layout(
         template='plotly_white',
         height=1200,  # Increased height for 4 plots
-        width=2400,   # Set the width of the figure to 2400px
+        width=PLOT_WIDTH,   # Set the width of the figure to 2400px
         title=dict(
-            text="S&P 500 Market Analysis Dashboard (1960 - Present)",
+            text=f"S&P 500 Market Analysis Dashboard ({view_start.year} - {'Present' if view_end == last_date else view_end.year})",
             x=0.5,
             y=0.95,
             font=dict(size=24)
@@ -406,7 +410,13 @@ with tab2:  # SP500 Tab (Second)
     )
 
     # Show plot in Streamlit without resizing
-    st.plotly_chart(fig, use_container_width=False)  
+    with timed_section("SP500 chart"):
+        st.plotly_chart(fig, use_container_width=False)
+    if len(price_lod) < len(filtered_data):
+        st.caption(
+            f"Showing {len(price_lod):,} of {len(filtered_data):,} daily points per panel. "
+            "Narrow the date range for full detail."
+        )  
 
 with tab3:  # Economic Indicators Tab
     st.markdown("### Economic Indicators Analysis")
@@ -430,4 +440,6 @@ st.markdown("""
         Bureau of Economic Analysis (BEA)
     </p>
 </div>
-""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
\ No newline at end of file
+""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
+
+finish_page_timing()
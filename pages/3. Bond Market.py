@@ -4,10 +4,11 @@ import numpy as np
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import os
-import base64
 import plotly.graph_objects as go
 import plotly.io as pio
-from fredapi import Fred
+import requests
+from utils import PLOT_MODE, asset_url, finish_page_timing, get_treasury_rates_fred, render_plot, render_plot_group, start_page_timing, timed_section
+from bond_models import SHOCK_SAMPLERS, simulate_curve_shocks, get_cir_calibration, get_cir_simulation, get_curve_factor_model
 
 # Configure Streamlit page
 st.set_page_config(
@@ -15,22 +16,13 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("Bond Market")
 
 # FRED API Configuration
 secret_value_0 = "4ac2266ac7d9766069d3d0755561988a"  # Replace with your FRED API key
-fred = Fred(api_key=secret_value_0)
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png') 
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 st.markdown(f"""
     <style>
@@ -58,7 +50,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{image_base64}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%;
             background-position: center 0%;
             background-repeat: no-repeat;
@@ -204,44 +196,11 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-def get_treasury_rates_fred(start_date="2020-01-01", api_key=None):
-    """
-    Fetch Treasury rates using FRED API.
-    """
-    if not api_key:
-        raise ValueError("API key is required to fetch data from FRED.")
-    
-    fred = Fred(api_key=api_key)
-    
-    # FRED series IDs for different Treasury maturities
-    TREASURY_SERIES = {
-        '3M': 'DTB3',
-        '6M': 'DTB6',
-        '1Y': 'DGS1',
-        '2Y': 'DGS2',
-        '5Y': 'DGS5',
-        '10Y': 'DGS10',
-        '30Y': 'DGS30'
-    }
-    
-    all_data = []
-    
-    for maturity, series_id in TREASURY_SERIES.items():
-        try:
-            series = fred.get_series(series_id, start_date)
-            series.name = f'year_{maturity}'
-            all_data.append(series)
-        except Exception as e:
-            print(f"Could not fetch data for {maturity} Treasury: {e}")
-    
-    if all_data:
-        rates_df = pd.concat(all_data, axis=1)
-        return rates_df.fillna(method='ffill')
-    else:
-        return pd.DataFrame()
-
 # Call the function with the correct API key
-rates = get_treasury_rates_fred(api_key=secret_value_0)
+with timed_section("treasury rates"):
+    rates = get_treasury_rates_fred(api_key=secret_value_0)
+if rates.attrs.get("missing"):
+    st.warning(f"Could not load {', '.join(rates.attrs['missing'])} Treasury data; showing the rest of the curve.")
 
 # Process rates
 
@@ -249,47 +208,57 @@ rates = get_treasury_rates_fred(api_key=secret_value_0)
 latest_rates = rates.iloc[-1]  # Most recent day
 previous_rates = rates.iloc[-2]  # Previous day
 
-# Extract specific rates and calculate percentage change
-YR2_rate = latest_rates["year_2Y"] 
-YR2_delta = ((latest_rates["year_2Y"] - previous_rates["year_2Y"]) / previous_rates["year_2Y"]) * 100
-
-YR10_rate = latest_rates["year_10Y"] 
-YR10_delta = ((latest_rates["year_10Y"] - previous_rates["year_10Y"]) / previous_rates["year_10Y"]) * 100
-
-YR30_rate = latest_rates["year_30Y"] 
-YR30_delta = ((latest_rates["year_30Y"] - previous_rates["year_30Y"]) / previous_rates["year_30Y"]) * 100
+# Extract specific rates; maturities that failed to load are left out of the frame
+def rate_metric(label, latest, previous):
+    if pd.isna(latest) or pd.isna(previous):
+        st.metric(label=label, value="n/a")
+    else:
+        delta = ((latest - previous) / previous) * 100
+        st.metric(label=label, value=f"{latest:.2f}%", delta=f"{delta:.2f}%")
 
-# Calculate the 2Y-10Y Spread and its delta
-YR10_YR2_diff = YR10_rate - YR2_rate
-YR10_YR2_diff_delta = ((YR10_rate - YR2_rate) - (previous_rates["year_10Y"] - previous_rates["year_2Y"])) / \
-                      (previous_rates["year_10Y"] - previous_rates["year_2Y"]) * 100
+YR2_rate, YR2_prev = latest_rates.get("year_2Y"), previous_rates.get("year_2Y")
+YR10_rate, YR10_prev = latest_rates.get("year_10Y"), previous_rates.get("year_10Y")
+YR30_rate, YR30_prev = latest_rates.get("year_30Y"), previous_rates.get("year_30Y")
 
 # Update the metrics dynamically based on rates DataFrame
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric(label="2Y Treasury", value=f"{YR2_rate:.2f}%", delta=f"{YR2_delta:.2f}%")
+    rate_metric("2Y Treasury", YR2_rate, YR2_prev)
 with col2:
-    st.metric(label="10Y Treasury", value=f"{YR10_rate:.2f}%", delta=f"{YR10_delta:.2f}%")
+    rate_metric("10Y Treasury", YR10_rate, YR10_prev)
 with col3:
-    st.metric(label="30Y Treasury", value=f"{YR30_rate:.2f}%", delta=f"{YR30_delta:.2f}%")
+    rate_metric("30Y Treasury", YR30_rate, YR30_prev)
 with col4:
-    st.metric(label="2Y-10Y Spread", value=f"{YR10_YR2_diff:.2f}%", delta=f"{YR10_YR2_diff_delta:.2f}%")
+    # 2Y-10Y Spread needs both maturities
+    if any(pd.isna(r) for r in (YR2_rate, YR10_rate, YR2_prev, YR10_prev)):
+        rate_metric("2Y-10Y Spread", None, None)
+    else:
+        rate_metric("2Y-10Y Spread", YR10_rate - YR2_rate, YR10_prev - YR2_prev)
 
 
-def display_plots(plot_files, show_analysis=False):
+def display_plots(plot_files, show_analysis=False, tab="overview"):
+
+    if PLOT_MODE == "shared":
+        # One document and one Plotly.js runtime for every chart in the tab
+        plot_files = [f for f in plot_files if f in PLOT_CONFIG]
+        try:
+            render_plot_group(
+                [{"file": f, "height": PLOT_CONFIG[f]["height"], "description": PLOT_CONFIG[f]["description"]}
+                 for f in plot_files],
+                width=2400
+            )
+        except FileNotFoundError as e:
+            st.error(f"Plot file not found: {os.path.basename(str(e))}")
+        return
     
     for plot_file in plot_files:
         if plot_file in PLOT_CONFIG:
-            plot_path = os.path.join("plots", plot_file)
             try:
-                with open(plot_path, "r", encoding='utf-8') as f:
-                    html_content = f.read()
-                
                 st.markdown("""
                     <div style="background: #FFFFFF; padding: 1.5rem; border-radius: 8px; margin: 1rem 0; border: 1px solid #E0E0E0;">
                 """, unsafe_allow_html=True)
                 st.info(PLOT_CONFIG[plot_file]["description"])
-                components.html(html_content, height=PLOT_CONFIG[plot_file]["height"], width=2400)
+                render_plot(plot_file, height=PLOT_CONFIG[plot_file]["height"], width=2400, key=f"{tab}-{plot_file}")
                 st.markdown('</div>', unsafe_allow_html=True)
             except FileNotFoundError:
                 st.error(f"Plot file not found: {plot_file}")
@@ -304,12 +273,42 @@ with tab1:
 with tab2:
     # Logic for the "Yield Analysis" tab
     yield_plots = [f for f, config in PLOT_CONFIG.items() if config["category"] == "Yield Analysis"]
-    display_plots(yield_plots, show_analysis=True)
+    display_plots(yield_plots, show_analysis=True, tab="yield")
 
 with tab3:
     # Logic for the "Rate Forecasts" tab
     forecast_plots = [f for f, config in PLOT_CONFIG.items() if config["category"] == "Rate Forecasts"]
-    display_plots(forecast_plots, show_analysis=True)
+    try:
+        with timed_section("CIR calibration"):
+            cir = get_cir_calibration()
+    except (requests.RequestException, ValueError) as e:
+        # No short-rate data: fall back to the pre-rendered plots
+        print(f"Could not run the CIR model: {e!r}")
+        cir = None
+    if cir is not None:
+        cir_figures = {name: cir.figure(name) for name in ["fit", "yield", "parameters"]}
+        st.info(PLOT_CONFIG["CIR_Model.html"]["description"])
+        st.plotly_chart(cir_figures["fit"], use_container_width=True, key="cir_fit")
+        st.info("Zero-coupon yield curve implied by the latest CIR fit, priced off the one-month rate forecast.")
+        st.plotly_chart(cir_figures["yield"], use_container_width=True, key="cir_yield")
+        st.info("CIR parameters re-calibrated over rolling windows of the 3-month T-bill rate.")
+        st.plotly_chart(cir_figures["parameters"], use_container_width=True, key="cir_parameters")
+        forecast_plots = [f for f in forecast_plots if f != "CIR_Model.html"]
+
+        st.info(PLOT_CONFIG["CIR_Model_MonteCarlo_Hist.html"]["description"])
+        col1, col2 = st.columns(2)
+        with col1:
+            mc_paths = st.selectbox("Simulated Paths", [10_000, 50_000, 100_000], index=1,
+                                    format_func=lambda n: f"{n:,}")
+        with col2:
+            mc_steps = st.selectbox("Horizon (Business Days)", [21, 63, 126, 252])
+        with timed_section("CIR Monte Carlo"):
+            simulation = get_cir_simulation(cir, n_paths=mc_paths, n_steps=mc_steps)
+            mc_figures = {name: simulation.figure(name) for name in ["fan", "terminal"]}
+        st.plotly_chart(mc_figures["fan"], use_container_width=True, key="cir_fan")
+        st.plotly_chart(mc_figures["terminal"], use_container_width=True, key="cir_terminal")
+        forecast_plots = [f for f in forecast_plots if f != "CIR_Model_MonteCarlo_Hist.html"]
+    display_plots(forecast_plots, show_analysis=True, tab="forecast")
 
 # New Scenario Analysis Tab
 with tab4:
@@ -328,45 +327,31 @@ with tab4:
     with col2:
         distribution_type = st.selectbox("Shock Distribution Type", ["Normal", "Uniform", "Poisson", "Exponential", "Gamma"])
     with col3:
-        num_simulations = st.number_input("Number of Simulations", min_value=100, max_value=5000, value=1000, step=100)
-
-    # Generate Random Shock Vector
-    def generate_shocks(volatility, size, distribution_type):
-        if distribution_type == "Normal":
-            return np.random.normal(0, volatility, size=size)
-        elif distribution_type == "Uniform":
-            return np.random.uniform(-volatility, volatility, size=size)
-        elif distribution_type == "Poisson":
-            return np.random.poisson(volatility, size=size)  # Poisson distribution
-        elif distribution_type == "Exponential":
-            return np.random.exponential(volatility, size=size)  # Exponential distribution
-        elif distribution_type == "Gamma":
-            return np.random.gamma(shape=2, scale=volatility, size=size)  # Gamma distribution
+        num_simulations = st.number_input("Number of Simulations", min_value=100, max_value=1_000_000, value=100_000, step=10_000)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sampler = st.selectbox("Sampler", SHOCK_SAMPLERS, help="Sobol draws a scrambled quasi-random sequence, rounded up to a power of two per batch.")
+    with col2:
+        antithetic = st.checkbox("Antithetic Shocks", help="Pair every draw with its mirror image.")
+    with col3:
+        show_convergence = st.checkbox("Show Convergence Diagnostic", help="Standard errors across independent batches, and the gain over plain Monte Carlo.")
 
 
     # Create a placeholder covariance matrix and transformation matrix
-    np.random.seed(42)  # For reproducibility
     rates = rates.div(100)
-    C = rates.cov()
-    eigenvalues, eigenvectors = np.linalg.eig(C)
-    lambda_sqrt = np.sqrt(eigenvalues)
-    eigv_decomp = np.diag(lambda_sqrt)
-    B = eigv_decomp @ eigenvectors.T
-    B = pd.DataFrame(data=B[:4] * 100, index=["Wiggle", "Flex", "Twist", "Shift"], columns=rates.columns)
+    # Covariance, eigen-decomposition and loadings are reused until new curve data arrives
+    factor_model = get_curve_factor_model(rates)
+    B = factor_model.loadings(n_factors=4) * 100
     
-    # Run multiple simulations and store results
-    all_impacts = []
-    for _ in range(num_simulations):
-        Random_Shock = generate_shocks(volatility=volatility, size=(4,), distribution_type=distribution_type)
-        impacts = Random_Shock @ B.values
-        all_impacts.append(impacts)
-
-    # Convert impacts to a numpy array for easier manipulation
-    all_impacts = np.array(all_impacts)
-
-    # Calculate the mean and standard deviation of the impacts
-    avg_impacts = np.mean(all_impacts, axis=0)
-    std_impacts = np.std(all_impacts, axis=0)
+    # Run every simulation in one batched draw and summarise the impact distributions
+    with timed_section("scenario simulation"):
+        impact_summary, first_impacts, convergence = simulate_curve_shocks(
+            B, volatility=volatility, distribution_type=distribution_type, num_simulations=int(num_simulations),
+            sampler=sampler, antithetic=antithetic, diagnostics=show_convergence,
+            seed=42,  # Per-run generator, for reproducibility
+        )
+    avg_impacts = impact_summary["Mean"].values
+    std_impacts = impact_summary["Std"].values
 
 
     # Create a sophisticated color palette
@@ -411,6 +396,28 @@ with tab4:
         )
     )
 
+    # 5th-95th percentile range of the impact distribution
+    fig.add_trace(
+        go.Scatter(
+            x=rates.columns,
+            y=impact_summary["P95"].values,
+            mode='markers',
+            name='5th-95th Percentile',
+            marker=dict(color='rgba(46, 125, 50, 0.9)', size=12, symbol='line-ew-open', line=dict(width=2)),
+            error_y=dict(
+                type='data',
+                symmetric=False,
+                array=np.zeros(len(rates.columns)),
+                arrayminus=(impact_summary["P95"] - impact_summary["P5"]).values,
+                color='rgba(46, 125, 50, 0.5)',
+                thickness=1.5,
+                width=8
+            ),
+            customdata=impact_summary["P5"].values,
+            hovertemplate='<b>%{x}</b><br>P5: %{customdata:.2f} bps<br>P95: %{y:.2f} bps<extra></extra>'
+        )
+    )
+
     # Enhanced layout
     fig.update_layout(
         title={
@@ -454,13 +461,27 @@ with tab4:
     # Display the Plotly chart
     st.plotly_chart(fig, use_container_width=False)
 
+    # Full impact distribution per maturity (percentiles and tail expectations)
+    st.markdown("#### Impact Distribution by Maturity (bps)")
+    st.dataframe(impact_summary.round(2))
+
+    # Standard errors across independent batches, and the gain over plain Monte Carlo
+    if show_convergence:
+        st.caption(f"{convergence.attrs['draws']:,} draws in {convergence.attrs['batches']} independent batches. "
+                   "A blank variance reduction means the batches agree to rounding error.")
+        st.dataframe(convergence.style.format({
+            "Mean": "{:.3f}", "Exact Mean": "{:.3f}", "Mean SE": "{:.2e}",
+            "Std": "{:.3f}", "Exact Std": "{:.3f}", "Std SE": "{:.2e}",
+            "Mean Variance Reduction": "{:,.1f}", "Std Variance Reduction": "{:,.1f}",
+        }, na_rep=""))
+
     # Optionally show the transformation matrix
     if st.checkbox("Show Transformation Matrix"):
         st.dataframe(B)
 
     # Optionally display raw shock values for the first simulation
     if st.checkbox("Show Raw Shocks (First Simulation)"):
-        st.write("Random Shock Vector (First Simulation):", all_impacts[0])
+        st.write("Random Shock Vector (First Simulation):", first_impacts)
 
 
 with tab5:
@@ -478,4 +499,6 @@ st.markdown("""
         Sources: Federal Reserve Economic Data (FRED), U.S. Treasury
     </p>
 </div>
-""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
\ No newline at end of file
+""".format(current_time.strftime('%Y-%m-%d %H:%M UTC')), unsafe_allow_html=True)
+
+finish_page_timing()
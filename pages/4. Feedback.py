@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 import os
 from datetime import datetime
-import base64
+from utils import add_feedback, asset_url, finish_page_timing, start_page_timing
 
 # Configure Streamlit page
 st.set_page_config(
@@ -10,18 +10,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing("Feedback")
 
-# Get the absolute path to the image file
-image_path = os.path.join(os.getcwd(), 'plots', 'sp500_gdp.png')
-
-# Function to encode image to base64
-def image_to_base64(image_path):
-    with open(image_path, "rb") as img_file:
-        encoded_image = base64.b64encode(img_file.read()).decode()
-    return f"data:image/png;base64,{encoded_image}"
-
-# Get the base64 encoded image
-image_base64 = image_to_base64(image_path)
+# Hero background image, a static file URL from the shared asset registry
+hero_image_url = asset_url("sp500_gdp")
 
 # Styling (matching the economic page)
 st.markdown(f"""
@@ -51,7 +43,7 @@ st.markdown(f"""
             align-items: center;
             height: 100vh;
             color: white;
-            background-image: url("{image_base64}");
+            background-image: url("{hero_image_url}");
             background-size: 100% 80%;
             background-position: center 0%;
             background-repeat: no-repeat;
@@ -234,10 +226,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Feedback Form
-FEEDBACK_FILE = "user_feedback.csv"
-if not os.path.exists(FEEDBACK_FILE):
-    pd.DataFrame(columns=["Timestamp", "User Type", "Platform Value", "Additional Comments"]).to_csv(FEEDBACK_FILE, index=False)
-
 with st.form("feedback_form"):
     st.markdown("<div class='insight-card'>", unsafe_allow_html=True)
     
@@ -265,19 +253,13 @@ if submit:
     if user_type == "Select your role":
         st.error("Please select your role")
     else:
-        # Prepare feedback data
-        feedback_data = {
-            "Timestamp": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            "User Type": [user_type],
-            "Platform Value": [platform_value],
-            "Additional Comments": [comments]
-        }
-        
-        # Save to CSV
-        feedback_df = pd.read_csv(FEEDBACK_FILE)
-        new_entry = pd.DataFrame(feedback_data)
-        feedback_df = pd.concat([feedback_df, new_entry], ignore_index=True)
-        feedback_df.to_csv(FEEDBACK_FILE, index=False)
+        # Append to the feedback store (exported to user_feedback.csv in the background)
+        add_feedback(
+            user_type=user_type,
+            platform_value=platform_value,
+            comments=comments,
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
         
         st.success("Thank you for your feedback!")
 
@@ -289,4 +271,6 @@ st.markdown(f"""
         <div style="color: #90A4AE; font-size: 0.8rem; margin-top: 1rem;">
             Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</div>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_page_timing()
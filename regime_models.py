@@ -0,0 +1,474 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import requests
+
+import utils
+from utils import (
+    _fetch_executor, _file_lock, _read_text_cached, _write_json_atomic, FRED_TIMEOUT, PRICE_HISTORY_TTL,
+    get_fred_series, get_price_history,
+)
+
+# Assets shown on the regime heatmaps: display name -> (source, id).
+# "price" series come from the local yfinance store, "fred" series are the monthly
+# IMF global price indexes (all commodities, energy, raw materials, metals, food).
+ASSETS = {
+    "S&P 500": ("price", "^GSPC"),
+    "Gold": ("price", "GC=F"),
+    "Oil": ("price", "CL=F"),
+    "10Y Bond": ("price", "IEF"),
+    "30Y Bond": ("price", "TLT"),
+    "GBP/USD": ("price", "GBPUSD=X"),
+    "AUD/USD": ("price", "AUDUSD=X"),
+    "JPY/USD": ("price", "JPYUSD=X"),
+    "GPI_G": ("fred", "PALLFNFINDEXM"),
+    "GPI_E": ("fred", "PNRGINDEXM"),
+    "GPI_RM": ("fred", "PRAWMINDEXM"),
+    "GPI_M": ("fred", "PMETAINDEXM"),
+    "GPI_F": ("fred", "PFOODINDEXM"),
+    "EM ETF": ("price", "EEM"),
+    "S&P 500 CI": ("price", "^SPGSCI"),
+}
+
+# Each month is classified by its indicator value against `thresholds` (ascending):
+# below the first threshold gets the first label, above the last gets the last label.
+# `threshold_range` bounds the threshold sliders on the Asset Class page.
+REGIMES = {
+    "gdp": {
+        "series": "GDPC1",
+        "transform": "annualized_qoq",
+        "thresholds": [0.0, 2.0, 3.0],
+        "threshold_range": (-4.0, 8.0),
+        "labels": ["Negative Growth", "Low Growth", "Moderate Growth", "High Growth"],
+        "title": "Asset Performance Across GDP Regimes",
+        "axis_title": "GDP Regime",
+        "colorscale": [[0, '#A1C4D7'], [0.5, '#FFFFFF'], [1, '#8BC34A']],
+    },
+    "inflation": {
+        "series": "CPIAUCSL",
+        "transform": "yoy",
+        "thresholds": [0.0, 2.0, 4.0],
+        "threshold_range": (-2.0, 10.0),
+        "labels": ["Negative Inflation", "Low Inflation", "Moderate Inflation", "High Inflation"],
+        "title": "Asset Performance Across Inflation Regimes",
+        "axis_title": "Inflation Regime",
+        "colorscale": [[0, '#FFA500'], [0.5, '#FFFFFF'], [1, '#8BC34A']],
+    },
+    "rates": {
+        "series": "FEDFUNDS",
+        "transform": "level",
+        "thresholds": [2.0, 5.0],
+        "threshold_range": (0.0, 10.0),
+        "labels": ["Low Rate", "Moderate Rate", "High Rate"],
+        "title": "Asset Performance Across Interest Rate Regimes",
+        "axis_title": "Interest Rate Regime",
+        "colorscale": [[0, '#B39DDB'], [0.5, '#FFFFFF'], [1, '#8BC34A']],
+    },
+}
+
+# Trailing window of source observations needed for the latest indicator value
+INDICATOR_LOOKBACK = {
+    "level": pd.DateOffset(months=0),
+    "yoy": pd.DateOffset(months=13),
+    "annualized_qoq": pd.DateOffset(months=3),
+}
+# Seconds before the asset scores of a published current regime are refreshed
+CURRENT_REGIME_TTL = PRICE_HISTORY_TTL
+
+# Heatmaps kept in memory, most recently used last. Every threshold setting is its
+# own heatmap, so this also bounds how many slider positions stay cached.
+HEATMAP_CACHE_SIZE = 64
+REGIME_INDEX_CACHE_SIZE = 8
+# Current regimes for non-standard thresholds kept in memory, most recently used last
+CURRENT_REGIME_CACHE_SIZE = 64
+
+# Monthly returns per asset, the combined frame and the regime indicators, each
+# stored with the fingerprint of the source data they were derived from
+_asset_returns = {}
+_returns_frame = {}
+_indicators = {}
+_regime_indexes = OrderedDict()
+_heatmaps = OrderedDict()
+_current_regimes = OrderedDict()
+_returns_lock = threading.Lock()
+_heatmaps_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def series_fingerprint(series):
+    """
+    Content hash of a series (index and values).
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(series.index.values).tobytes())
+    digest.update(np.ascontiguousarray(series.values, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def _load_asset(source, source_id):
+    if source == "price":
+        return get_price_history(source_id)["Close"]
+    return get_fred_series(source_id)
+
+
+def load_asset_prices(timeout=FRED_TIMEOUT):
+    """
+    Raw price (or index level) series for every asset, fetched concurrently through
+    the shared caches. Assets whose data can't be fetched, or take longer than
+    `timeout` seconds, are left out and returned in `missing`, so the rest of the
+    heatmap still loads. Any other error is raised.
+    """
+    futures = {
+        name: _fetch_executor.submit(_load_asset, source, source_id)
+        for name, (source, source_id) in ASSETS.items()
+    }
+    deadline = time.monotonic() + timeout
+    prices, missing = {}, []
+    for name, future in futures.items():
+        try:
+            prices[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        # TimeoutError (an OSError) covers assets still loading at the deadline
+        except (OSError, requests.RequestException, ValueError, KeyError) as e:
+            logger.warning("Could not load %s for the regime heatmaps: %r", name, e)
+            missing.append(name)
+    return prices, missing
+
+
+def monthly_returns(prices):
+    """
+    Month-over-month % returns from month-end levels, indexed by month start.
+    """
+    if prices.index.tz is not None:
+        prices = prices.tz_localize(None)
+    levels = prices.resample("MS").last()
+    return levels.pct_change(fill_method=None) * 100
+
+
+def asset_returns(prices):
+    """
+    Monthly % returns for every asset in `prices`, columns in ASSETS order.
+
+    Each asset's returns are recomputed only when its source series changes, and the
+    combined frame only when one of them does. Returns (frame, fingerprint).
+    """
+    fingerprints = {}
+    columns = {}
+    for name, series in prices.items():
+        fingerprint = series_fingerprint(series)
+        with _returns_lock:
+            cached = _asset_returns.get(name)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, monthly_returns(series))
+            with _returns_lock:
+                _asset_returns[name] = cached
+        fingerprints[name] = fingerprint
+        columns[name] = cached[1]
+
+    key = hashlib.sha1("|".join(f"{name}:{fp}" for name, fp in fingerprints.items()).encode()).hexdigest()
+    with _returns_lock:
+        cached = _returns_frame.get("frame")
+    if cached is None or cached[0] != key:
+        frame = pd.DataFrame({name: columns[name] for name in ASSETS if name in columns})
+        cached = (key, frame)
+        with _returns_lock:
+            _returns_frame["frame"] = cached
+    return cached[1], key
+
+
+def _transform_indicator(series, transform):
+    if transform == "annualized_qoq":
+        # Quarterly growth, annualized, applied to each month of its quarter
+        growth = ((series / series.shift(1)) ** 4 - 1) * 100
+        monthly = growth.resample("MS").ffill()
+        last_quarter = pd.DatetimeIndex([monthly.index[-1] + pd.DateOffset(months=m) for m in (1, 2)])
+        return monthly.reindex(monthly.index.append(last_quarter), method="ffill")
+    monthly = series.resample("MS").mean()
+    if transform == "yoy":
+        return monthly.pct_change(12, fill_method=None) * 100
+    return monthly
+
+
+def regime_indicator(kind):
+    """
+    Monthly indicator series the regimes of `kind` are classified on, recomputed only
+    when the underlying FRED series changes. Returns (indicator, fingerprint).
+    """
+    spec = REGIMES[kind]
+    series = get_fred_series(spec["series"])
+    fingerprint = series_fingerprint(series)
+    with _returns_lock:
+        cached = _indicators.get(kind)
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, _transform_indicator(series, spec["transform"]))
+        with _returns_lock:
+            _indicators[kind] = cached
+    return cached[1], fingerprint
+
+
+def classify_regimes(values, thresholds):
+    """
+    Regime code per value (0 below the first threshold, len(thresholds) above the
+    last), -1 where the value is missing.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.searchsorted(np.asarray(thresholds, dtype=float), values, side="right")
+    codes[np.isnan(values)] = -1
+    return codes
+
+
+class RegimeIndex:
+    """
+    Months sorted by indicator value, with prefix sums of asset returns over that order.
+
+    Regime i holds the months with thresholds[i - 1] <= value < thresholds[i], which is a
+    contiguous run of the sorted order, so per-regime statistics for any thresholds take
+    one binary search per threshold and a difference of prefix sums, never a regroup.
+    Build instances through `get_regime_index` so every threshold change reuses one.
+    """
+
+    def __init__(self, returns, indicator):
+        values = indicator.reindex(returns.index).values.astype(float)
+        classified = ~np.isnan(values)
+        order = np.argsort(values[classified], kind="stable")
+        self.values = values[classified][order]
+        self.columns = returns.columns
+        sorted_returns = returns.values[classified][order]
+        observed = ~np.isnan(sorted_returns)
+        sorted_returns = np.where(observed, sorted_returns, 0.0)
+
+        def prefix(a):
+            return np.vstack([np.zeros((1, a.shape[1]), dtype=a.dtype), np.cumsum(a, axis=0)])
+
+        self._sums = prefix(sorted_returns)
+        self._squares = prefix(sorted_returns ** 2)
+        self._observations = prefix(observed.astype(np.int64))
+
+    def boundaries(self, thresholds):
+        """
+        Start of each regime in the sorted order, plus the end of the last one.
+        """
+        cuts = np.searchsorted(self.values, np.asarray(thresholds, dtype=float), side="left")
+        return np.concatenate([[0], cuts, [len(self.values)]])
+
+    def statistics(self, thresholds, labels):
+        """
+        Mean and standard deviation of monthly % returns, and observed months, for each
+        asset in each regime. Cells without observations are NaN.
+        """
+        bounds = self.boundaries(thresholds)
+        start, end = bounds[:-1], bounds[1:]
+        n = (self._observations[end] - self._observations[start]).astype(float)
+        sums = self._sums[end] - self._sums[start]
+        squares = self._squares[end] - self._squares[start]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, sums / n, np.nan)
+            variance = np.where(n > 1, (squares - sums * mean) / (n - 1), np.nan)
+        std = np.sqrt(np.clip(variance, 0, None))
+        frame = lambda a: pd.DataFrame(a, index=labels, columns=self.columns)
+        return frame(mean), frame(std), frame(n.astype(int))
+
+
+class RegimeHeatmap:
+    """
+    Per-regime asset performance for one regime kind, with its figure built on first use.
+    Build instances through `get_regime_heatmap` so reruns on the same data share one.
+    """
+
+    def __init__(self, kind, performance, volatility, observations, thresholds, missing=()):
+        self.kind = kind
+        self.performance = performance
+        self.volatility = volatility
+        self.observations = observations
+        self.thresholds = thresholds
+        self.missing = list(missing)
+        self._figure = None
+        self._figure_lock = threading.Lock()
+
+    @property
+    def figure(self):
+        with self._figure_lock:
+            if self._figure is None:
+                self._figure = self._build_figure()
+            return self._figure
+
+    def _build_figure(self):
+        spec = REGIMES[self.kind]
+        z = self.performance.values
+        fig = go.Figure(go.Heatmap(
+            z=z,
+            x=list(self.performance.columns),
+            y=list(self.performance.index),
+            text=np.round(z, 2),
+            texttemplate="%{text}",
+            textfont={"size": 10},
+            colorscale=spec["colorscale"],
+            zmid=0,
+            hoverongaps=False,
+            customdata=np.dstack([self.volatility.values, self.observations.values]),
+            hovertemplate=("%{y}<br>%{x}: %{z:.2f}% avg monthly return"
+                           "<br>%{customdata[0]:.2f}% monthly volatility<br>%{customdata[1]} months<extra></extra>"),
+        ))
+        fig.update_layout(
+            title=spec["title"],
+            height=1000,
+            xaxis_title="Assets",
+            yaxis_title=spec["axis_title"],
+        )
+        return fig
+
+
+def _lru_get(cache, key):
+    with _heatmaps_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache, key, value, size):
+    with _heatmaps_lock:
+        cache[key] = value
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def get_regime_index(kind, returns, returns_key, indicator, indicator_key):
+    key = (kind, returns_key, indicator_key)
+    index = _lru_get(_regime_indexes, key)
+    if index is None:
+        index = RegimeIndex(returns, indicator)
+        _lru_put(_regime_indexes, key, index, REGIME_INDEX_CACHE_SIZE)
+    return index
+
+
+def get_regime_heatmap(kind, thresholds=None):
+    """
+    Per-regime asset performance for `kind` ("gdp", "inflation" or "rates") from the
+    latest cached data, with `thresholds` defaulting to the kind's standard cutoffs.
+
+    Results are memoized by the content of their inputs, so reruns reuse them and new
+    data rebuilds only what it touches. New thresholds on the same data are answered
+    from the kind's RegimeIndex.
+    """
+    spec = REGIMES[kind]
+    thresholds = tuple(sorted(spec["thresholds"] if thresholds is None else map(float, thresholds)))
+    prices, missing = load_asset_prices()
+    returns, returns_key = asset_returns(prices)
+    indicator, indicator_key = regime_indicator(kind)
+
+    key = (kind, thresholds, returns_key, indicator_key)
+    heatmap = _lru_get(_heatmaps, key)
+    if heatmap is None:
+        index = get_regime_index(kind, returns, returns_key, indicator, indicator_key)
+        performance, volatility, observations = index.statistics(thresholds, spec["labels"])
+        heatmap = RegimeHeatmap(kind, performance, volatility, observations, thresholds, missing)
+        _lru_put(_heatmaps, key, heatmap, HEATMAP_CACHE_SIZE)
+    return heatmap
+
+
+# Current regime
+def latest_indicator_value(kind, series):
+    """
+    (date, value) of the latest indicator observation for `kind`, computed from the
+    trailing INDICATOR_LOOKBACK window of `series` rather than the full history.
+    """
+    transform = REGIMES[kind]["transform"]
+    tail = series.loc[series.index[-1] - INDICATOR_LOOKBACK[transform]:]
+    values = _transform_indicator(tail, transform).dropna()
+    if values.empty:
+        raise ValueError(f"Not enough recent {REGIMES[kind]['series']} observations to classify the current regime")
+    # Quarterly indicators are extended over their quarter, report the quarter itself
+    return min(values.index[-1], series.index[-1]), float(values.iloc[-1])
+
+
+def _current_regime_path(kind):
+    return os.path.join(utils.CACHE_DIR, "regimes", f"current-{kind}.json")
+
+
+def _read_current_regime(path):
+    try:
+        return json.loads(_read_text_cached(path))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _build_current_regime(kind, series, source, thresholds):
+    spec = REGIMES[kind]
+    date, value = latest_indicator_value(kind, series)
+    regime = spec["labels"][int(classify_regimes([value], thresholds)[0])]
+    returns = get_regime_heatmap(kind, thresholds).performance.loc[regime]
+    scale = np.nanmax(np.abs(returns.values)) if returns.notna().any() else 0
+    return {
+        "kind": kind,
+        "source": source,
+        "updated": time.time(),
+        "as_of": date.strftime("%Y-%m-%d"),
+        "value": round(value, 4),
+        "regime": regime,
+        # Average monthly % return per asset in this regime, and the same scaled to [-1, 1]
+        "returns": {asset: None if np.isnan(r) else round(float(r), 4) for asset, r in returns.items()},
+        "scores": {asset: None if np.isnan(r) else round(float(r / scale), 4) if scale else 0.0
+                   for asset, r in returns.items()},
+    }
+
+
+def get_current_regime(kind, thresholds=None):
+    """
+    Current regime of `kind` and every asset's average monthly return in it, as a small
+    dict. With the kind's standard thresholds it is published to CACHE_DIR/regimes and
+    shared by every session and process; other slider positions are kept in memory,
+    CURRENT_REGIME_CACHE_SIZE of them at most.
+
+    A rerun only reads the indicator's latest observation and the published result. The
+    result is rebuilt, from the latest observations alone, when a new observation
+    arrives or the thresholds change, and its asset scores are refreshed after
+    CURRENT_REGIME_TTL seconds.
+    """
+    spec = REGIMES[kind]
+    standard = tuple(sorted(map(float, spec["thresholds"])))
+    thresholds = standard if thresholds is None else tuple(sorted(map(float, thresholds)))
+    series = get_fred_series(spec["series"])
+    source = {
+        "series": spec["series"],
+        "last_date": series.index[-1].strftime("%Y-%m-%d"),
+        "last_value": float(series.iloc[-1]),
+        "thresholds": list(thresholds),
+    }
+
+    def is_fresh(current):
+        return (current is not None and current["source"] == source
+                and time.time() - current["updated"] < CURRENT_REGIME_TTL)
+
+    if thresholds != standard:
+        key = (kind, thresholds)
+        current = _lru_get(_current_regimes, key)
+        if not is_fresh(current):
+            current = _build_current_regime(kind, series, source, thresholds)
+            _lru_put(_current_regimes, key, current, CURRENT_REGIME_CACHE_SIZE)
+        return current
+
+    path = _current_regime_path(kind)
+    current = _read_current_regime(path)
+    if is_fresh(current):
+        return current
+    # Built before taking the lock, loading the assets can take seconds
+    current = _build_current_regime(kind, series, source, thresholds)
+    with _file_lock(path + ".lock"):
+        published = _read_current_regime(path)
+        if is_fresh(published):
+            # Another process published it while we were building ours
+            return published
+        _write_json_atomic(current, path)
+        # Per-threshold files published by earlier versions
+        for stale in glob.glob(os.path.join(os.path.dirname(path), f"current-{kind}-*.json*")):
+            os.remove(stale)
+    return current
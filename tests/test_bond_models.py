@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bond_models
+
+
+@pytest.fixture
+def loadings():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(size=(4, 6)), columns=["1Y", "2Y", "5Y", "10Y", "20Y", "30Y"])
+
+
+@pytest.mark.parametrize("distribution_type", list(bond_models.SHOCK_DISTRIBUTIONS))
+@pytest.mark.parametrize("sampler, antithetic", [("Pseudo-random", False), ("Pseudo-random", True), ("Sobol", False)])
+def test_simulated_moments_match_closed_form(loadings, distribution_type, sampler, antithetic):
+    n = 200_000
+    summary, _, diagnostics = bond_models.simulate_curve_shocks(
+        loadings, 0.5, distribution_type, n, sampler=sampler, antithetic=antithetic, seed=7, diagnostics=True
+    )
+    exact_mean, exact_std = bond_models.exact_impact_moments(loadings.values, 0.5, distribution_type)
+    np.testing.assert_allclose(diagnostics["Exact Mean"], exact_mean)
+    np.testing.assert_allclose(diagnostics["Exact Std"], exact_std)
+    # Five plain Monte Carlo standard errors covers the worst of the six maturities
+    assert np.all(np.abs(summary["Mean"].values - exact_mean) < 5 * exact_std / np.sqrt(n))
+    np.testing.assert_allclose(summary["Std"].values, exact_std, rtol=0.02)
+
+
+def test_sorted_percentiles_match_numpy():
+    rng = np.random.default_rng(1)
+    q = [0, 1, 5, 25, 50, 75, 95, 99, 100]
+    for n in (1, 2, 7, 1000):
+        rows = np.sort(rng.gamma(2, size=(3, n)), axis=1)
+        np.testing.assert_allclose(bond_models._sorted_percentiles(rows, q), np.percentile(rows, q, axis=1).T)
+
+
+def test_concurrent_cir_simulations_run_once(monkeypatch):
+    runs = []
+
+    def simulation(calibration, n_paths, n_steps, seed):
+        runs.append(seed)
+        time.sleep(0.2)
+        return SimpleNamespace(seed=seed)
+
+    monkeypatch.setattr(bond_models, "_cir_simulations", bond_models.OrderedDict())
+    monkeypatch.setattr(bond_models, "CIRSimulation", simulation)
+    calibration = SimpleNamespace(version="v1")
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(bond_models.get_cir_simulation(calibration, 100, 10, seed=0)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert runs == [0]
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert not bond_models._cir_building
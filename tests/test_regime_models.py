@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import regime_models
+
+
+@pytest.fixture
+def synthetic():
+    rng = np.random.default_rng(5)
+    index = pd.date_range("2000-01-31", periods=240, freq="ME")
+    returns = pd.DataFrame(rng.normal(0.5, 4, (len(index), 3)), index=index, columns=["S&P 500", "Gold", "Bonds"])
+    # Assets with a shorter history, and months without an indicator reading
+    returns.iloc[:60, 1] = np.nan
+    returns.iloc[rng.choice(len(index), 10, replace=False), 2] = np.nan
+    # Half-point steps so some months sit exactly on a threshold
+    indicator = pd.Series(np.round(rng.normal(2, 2, len(index)) * 2) / 2, index=index)
+    indicator.iloc[rng.choice(len(index), 15, replace=False)] = np.nan
+    return returns, indicator
+
+
+@pytest.mark.parametrize("thresholds", [(0.0, 2.0, 3.0), (-1.5, 2.0), (1.0, 1.0, 4.0), (50.0,)])
+def test_regime_index_matches_groupby(synthetic, thresholds):
+    returns, indicator = synthetic
+    labels = [f"Regime {i}" for i in range(len(thresholds) + 1)]
+    mean, std, observations = regime_models.RegimeIndex(returns, indicator).statistics(thresholds, labels)
+
+    codes = pd.Series(regime_models.classify_regimes(indicator.reindex(returns.index), thresholds), index=returns.index)
+    grouped = returns[codes >= 0].groupby(codes[codes >= 0])
+    expected = lambda stat: stat.reindex(range(len(labels))).set_axis(labels)
+    pd.testing.assert_frame_equal(mean, expected(grouped.mean()), check_names=False)
+    pd.testing.assert_frame_equal(std, expected(grouped.std()), check_names=False)
+    pd.testing.assert_frame_equal(observations, expected(grouped.count()).fillna(0).astype(int), check_names=False)
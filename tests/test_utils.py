@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+@pytest.fixture
+def tokyo_time(monkeypatch):
+    # A zone well east of UTC, where naive local time reads as hours in the future
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_fred_cache_ttl_ignores_local_timezone(tokyo_time, tmp_path, monkeypatch):
+    fetches = []
+
+    def fetch(series_id, api_key=None, timeout=None):
+        fetches.append(series_id)
+        return pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-01", "2024-01-02"]))
+
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_fetch_fred_observations", fetch)
+    for _ in range(5):
+        utils.get_fred_series("DGS10", ttl=6 * 60 * 60)
+    assert fetches == ["DGS10"]
+
+
+def test_price_history_ttl_ignores_local_timezone(tokyo_time, tmp_path, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "refresh_price_history", refreshes.append)
+    monkeypatch.setattr(utils, "_read_price_parts", lambda store_dir: pd.DataFrame())
+    os.makedirs(utils._price_store_dir("^GSPC"), exist_ok=True)
+    for _ in range(5):
+        utils.get_price_history("^GSPC", ttl=60 * 60)
+    assert refreshes == ["^GSPC"]
+
+
+def test_memory_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(utils, "_memory_cache", utils.OrderedDict())
+    monkeypatch.setattr(utils, "MEMORY_CACHE_SIZE", 3)
+    for i in range(5):
+        utils._memory_put(i, i)
+    assert utils._memory_get(0) is None
+    assert utils._memory_get(2) == 2
+    utils._memory_put(5, 5)
+    assert list(utils._memory_cache) == [4, 2, 5]
+
+
+def test_fred_refresh_failure_backs_off(tmp_path, monkeypatch):
+    fetches = []
+
+    def fetch(series_id, api_key=None, timeout=None):
+        fetches.append(series_id)
+        raise requests.ConnectionError("FRED is down")
+
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    path = utils._fred_cache_path("DGS10")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stale = pd.DataFrame({"value": [1.0]}, index=pd.to_datetime(["2024-01-01"]))
+    stale.to_parquet(path)
+    os.utime(path, (time.time() - 24 * 60 * 60,) * 2)
+    monkeypatch.setattr(utils, "_fetch_fred_observations", fetch)
+
+    for _ in range(3):
+        assert utils.get_fred_series("DGS10", ttl=60).tolist() == [1.0]
+    assert fetches == ["DGS10"]
+
+    # Once the backoff runs out the next call tries FRED again
+    os.utime(path + ".retry", (time.time() - utils.FRED_RETRY_AFTER - 1,) * 2)
+    utils.get_fred_series("DGS10", ttl=60)
+    assert fetches == ["DGS10", "DGS10"]
+
+
+def test_incremental_price_history_matches_full_recompute(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range("2020-01-01", periods=700)
+    market = pd.DataFrame(
+        {"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))), "Volume": rng.integers(1_000, 5_000, len(index))},
+        index=index,
+    )
+    available = {"end": 450}
+
+    def fetch(ticker, start=None):
+        bars = market.iloc[:available["end"]]
+        return bars if start is None else bars[bars.index >= pd.Timestamp(start)]
+
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_memory_cache", utils.OrderedDict())
+    monkeypatch.setattr(utils, "_fetch_price_bars", fetch)
+    store_dir = utils._price_store_dir("^GSPC")
+
+    assert utils.refresh_price_history("^GSPC") == 450
+    for end in (451, 520, 700):
+        # The last stored bar was written mid-session and has since been revised
+        market.iloc[available["end"] - 1, 0] *= 1.01
+        available["end"] = end
+        utils.refresh_price_history("^GSPC")
+    assert utils.refresh_price_history("^GSPC") == 0
+
+    expected = market.join(utils._compute_derived(market))
+    pd.testing.assert_frame_equal(utils._read_price_parts(store_dir), expected, check_freq=False)
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 20), (1000, 3), (1000, 100), (5003, 777)])
+def test_lttb_keeps_endpoints_within_target(n, n_out):
+    rng = np.random.default_rng(n)
+    y = np.cumsum(rng.normal(size=n))
+    picked = utils.lttb_indices(np.arange(n), y, n_out)
+    assert len(picked) <= n_out
+    assert picked[0] == 0 and picked[-1] == n - 1
+    assert np.all(np.diff(picked) > 0)
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 20), (1000, 2), (1000, 100), (5003, 777)])
+def test_minmax_keeps_extremes_within_target(n, n_out):
+    rng = np.random.default_rng(n)
+    y = rng.standard_t(2, size=n)
+    picked = utils.minmax_indices(y, n_out)
+    assert len(picked) <= n_out
+    assert np.all(np.diff(picked) > 0)
+    # Every bucket's min and max survive, so the global ones do too
+    assert y.argmin() in picked and y.argmax() in picked
+    if n > n_out:
+        buckets = (np.arange(n) * (n_out // 2)) // n
+        for b in range(n_out // 2):
+            bucket = np.flatnonzero(buckets == b)
+            assert bucket[y[bucket].argmin()] in picked and bucket[y[bucket].argmax()] in picked
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_series(method):
+    rng = np.random.default_rng(0)
+    series = pd.Series(np.cumsum(rng.normal(size=3000)), index=pd.bdate_range("2010-01-01", periods=3000))
+    series.iloc[[0, 100, 2999]] = np.nan
+    out = utils.downsample_series(series, 500, method=method)
+    assert len(out) <= 500
+    assert not out.isna().any()
+    assert out.index.is_monotonic_increasing
+    pd.testing.assert_series_equal(out, series.dropna().loc[out.index])
+    clean = series.dropna()
+    assert clean.idxmax() in out.index and clean.idxmin() in out.index
+    if method == "lttb":
+        assert out.index[0] == clean.index[0] and out.index[-1] == clean.index[-1]
+    # Short series come back untouched
+    pd.testing.assert_series_equal(utils.downsample_series(series.iloc[:50], 500, method=method), series.iloc[:50].dropna())
@@ -0,0 +1,291 @@
+"""
+Offline rerun-latency benchmark for the dashboard pages.
+
+FRED and yfinance responses are replayed from fixtures, so the benchmark needs no
+network access. Each page is driven headlessly with Streamlit's AppTest:
+
+- cold: a fresh cache directory and empty in-process caches, first run of a new session
+- warm: reruns of the same session, cycling through different widget inputs
+
+Usage:
+    python tools/benchmark.py record            # save live FRED/yfinance responses as fixtures
+    python tools/benchmark.py run [--cold 5] [--warm 20] [--json out.json] [page ...]
+
+Without recorded fixtures, `run` uses deterministic synthetic data of the same shape.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import utils
+import bond_models
+import econ_models
+import regime_models
+from streamlit.testing.v1 import AppTest
+
+FIXTURES_DIR = os.path.join(utils.CACHE_DIR, "fixtures")
+# FRED series and tickers fetched by the benchmarked pages
+_REGIME_ASSETS = regime_models.ASSETS.values()
+FIXTURE_SERIES = (["GDPC1", "CPIAUCSL", "UNRATE", "FEDFUNDS"] + list(utils.TREASURY_SERIES.values())
+                  + [source_id for source, source_id in _REGIME_ASSETS if source == "fred"])
+FIXTURE_TICKERS = ["^GSPC"] + [source_id for source, source_id in _REGIME_ASSETS if source == "price" and source_id != "^GSPC"]
+MONTHLY_SERIES = {"CPIAUCSL", "UNRATE", "FEDFUNDS"} | {source_id for source, source_id in _REGIME_ASSETS if source == "fred"}
+QUARTERLY_SERIES = {"GDPC1"}
+
+
+def _set_slider(at, key, value):
+    at.slider(key=key).set_value(value)
+
+
+def _set_labeled(widgets, label, value):
+    next(w for w in widgets if w.label == label).set_value(value)
+
+
+def _sp500_inputs(at, i):
+    """
+    Date windows of different lengths, full history down to a single year.
+    """
+    starts = ["1960-01-01", "2000-01-01", "2015-01-01", "2023-01-01"]
+    end = at.slider(key="sp500_date_range").value[1]
+    _set_slider(at, "sp500_date_range", (pd.Timestamp(starts[i % len(starts)]).date(), end))
+
+
+def _bond_inputs(at, i):
+    distributions = ["Normal", "Uniform", "Poisson", "Exponential", "Gamma"]
+    simulations = [10_000, 100_000, 500_000]
+    _set_labeled(at.selectbox, "Shock Distribution Type", distributions[i % len(distributions)])
+    _set_labeled(at.number_input, "Number of Simulations", simulations[i % len(simulations)])
+
+
+# Page -> function varying its widgets before warm rerun i
+PAGES = {
+    "pages/2.. SP500 Analysis.py": _sp500_inputs,
+    "pages/3. Bond Market.py": _bond_inputs,
+    "pages/1. Economic Health Overview.py": None,
+    "pages/1.. USA Economic Health.py": None,
+    "pages/2. Asset Class Behavior in Macroeconomic Context.py": None,
+    "Home.py": None,
+}
+DEFAULT_PAGES = ["pages/2.. SP500 Analysis.py", "pages/3. Bond Market.py"]
+
+
+# Fixtures
+def _fixture_path(kind, name):
+    safe_name = "".join(c if c.isalnum() else "_" for c in name)
+    return os.path.join(FIXTURES_DIR, kind, f"{safe_name}.parquet")
+
+
+def record_fixtures():
+    """
+    Fetch every fixture series live and store it under FIXTURES_DIR.
+    """
+    for series_id in FIXTURE_SERIES:
+        series = utils._fetch_fred_observations(series_id)
+        path = _fixture_path("fred", series_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        series.to_frame("value").to_parquet(path)
+        print(f"FRED {series_id}: {len(series)} observations")
+    for ticker in FIXTURE_TICKERS:
+        bars = utils._fetch_price_bars(ticker)
+        path = _fixture_path("prices", ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        bars.to_parquet(path)
+        print(f"yfinance {ticker}: {len(bars)} bars")
+
+
+def synthetic_series(series_id):
+    rng = np.random.default_rng(sum(map(ord, series_id)))
+    if series_id in QUARTERLY_SERIES:
+        index = pd.date_range("1947-01-01", "2024-10-01", freq="QS")
+    elif series_id in MONTHLY_SERIES:
+        index = pd.date_range("1948-01-01", "2025-01-01", freq="MS")
+    else:
+        index = pd.bdate_range("1990-01-01", "2025-01-31")
+    if series_id in QUARTERLY_SERIES or series_id == "CPIAUCSL":
+        values = 100 * np.exp(np.cumsum(rng.normal(0.006, 0.01, len(index))))
+    else:
+        values = np.abs(2 + rng.random() * 3 + np.cumsum(rng.normal(0, 0.03, len(index))))
+    return pd.Series(values, index=index, dtype=float)
+
+
+def synthetic_bars(ticker):
+    rng = np.random.default_rng(sum(map(ord, ticker)))
+    index = pd.bdate_range("1927-12-30", "2025-01-31", tz="America/New_York")
+    close = 17.7 * np.exp(np.cumsum(rng.normal(0.0003, 0.011, len(index))))
+    return pd.DataFrame({
+        "Open": close, "High": close * 1.005, "Low": close * 0.995, "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000_000, len(index)).astype(float),
+        "Dividends": 0.0, "Stock Splits": 0.0,
+    }, index=index)
+
+
+class FixtureReplay:
+    """
+    Stand-in for the FRED and yfinance fetchers, serving recorded (or synthetic) responses.
+    """
+
+    def __init__(self):
+        self.synthetic = False
+        self.series = {}
+        self.bars = {}
+        for series_id in FIXTURE_SERIES:
+            path = _fixture_path("fred", series_id)
+            if os.path.exists(path):
+                self.series[series_id] = pd.read_parquet(path)["value"]
+            else:
+                self.series[series_id] = synthetic_series(series_id)
+                self.synthetic = True
+        for ticker in FIXTURE_TICKERS:
+            path = _fixture_path("prices", ticker)
+            if os.path.exists(path):
+                self.bars[ticker] = pd.read_parquet(path)
+            else:
+                self.bars[ticker] = synthetic_bars(ticker)
+                self.synthetic = True
+
+    def fetch_fred_observations(self, series_id, api_key=None, timeout=None):
+        if series_id not in self.series:
+            self.series[series_id] = synthetic_series(series_id)
+        return self.series[series_id].copy()
+
+    def fetch_price_bars(self, ticker, start=None):
+        if ticker not in self.bars:
+            self.bars[ticker] = synthetic_bars(ticker)
+        bars = self.bars[ticker]
+        if start is not None:
+            bars = bars[bars.index >= pd.Timestamp(start, tz=bars.index.tz)]
+        return bars.copy()
+
+    def install(self):
+        utils._fetch_fred_observations = self.fetch_fred_observations
+        utils._fetch_price_bars = self.fetch_price_bars
+
+
+# Runs
+def _reset_caches(cache_dir):
+    """
+    Point every cache at an empty directory and drop in-process memoization.
+    """
+    utils.CACHE_DIR = cache_dir
+    with utils._memory_lock:
+        utils._memory_cache.clear()
+    with bond_models._factor_models_lock:
+        bond_models._factor_models.clear()
+    with bond_models._cir_lock:
+        bond_models._cir_calibrations.clear()
+        bond_models._cir_simulations.clear()
+    with econ_models._regional_store_lock:
+        econ_models._regional_store.clear()
+    with econ_models._health_score_lock:
+        econ_models._health_score.clear()
+    with econ_models._pca_lock:
+        econ_models._pca_results.clear()
+        econ_models._pca_failures.clear()
+    with regime_models._returns_lock:
+        regime_models._asset_returns.clear()
+        regime_models._returns_frame.clear()
+        regime_models._indicators.clear()
+    with regime_models._heatmaps_lock:
+        regime_models._heatmaps.clear()
+        regime_models._regime_indexes.clear()
+        regime_models._current_regimes.clear()
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{at.exception[0].value}")
+    return elapsed
+
+
+def benchmark_page(page, cold_runs, warm_runs, timeout=120):
+    vary = PAGES.get(page)
+    cold, warm = [], []
+    cwd = os.getcwd()
+    os.chdir(BASE_DIR)  # pages resolve plots/ relative to the working directory
+    try:
+        for _ in range(cold_runs):
+            cache_dir = tempfile.mkdtemp(prefix="alterra-bench-")
+            try:
+                _reset_caches(cache_dir)
+                at = AppTest.from_file(os.path.join(BASE_DIR, page), default_timeout=timeout)
+                cold.append(_timed_run(at))
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        # Warm reruns share one session and a populated cache
+        cache_dir = tempfile.mkdtemp(prefix="alterra-bench-")
+        try:
+            _reset_caches(cache_dir)
+            at = AppTest.from_file(os.path.join(BASE_DIR, page), default_timeout=timeout)
+            _timed_run(at)
+            for i in range(warm_runs):
+                if vary is not None:
+                    vary(at, i)
+                warm.append(_timed_run(at))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        os.chdir(cwd)
+    return cold, warm
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": None, "p95": None, "n": 0}
+    ms = np.array(samples) * 1000
+    return {"p50": round(float(np.percentile(ms, 50)), 1), "p95": round(float(np.percentile(ms, 95)), 1), "n": len(ms)}
+
+
+def run(pages, cold_runs, warm_runs, json_path=None):
+    replay = FixtureReplay()
+    replay.install()
+    if replay.synthetic:
+        print("No recorded fixtures for every source; using synthetic data where missing\n")
+
+    results = {}
+    print(f"{'page':58s} {'cold p50':>9s} {'cold p95':>9s} {'warm p50':>9s} {'warm p95':>9s}")
+    for page in pages:
+        cold, warm = benchmark_page(page, cold_runs, warm_runs)
+        results[page] = {"cold": _percentiles(cold), "warm": _percentiles(warm)}
+        c, w = results[page]["cold"], results[page]["warm"]
+        fmt = lambda v: f"{v:8.1f}ms" if v is not None else f"{'-':>10s}"
+        print(f"{page:58s}{fmt(c['p50'])}{fmt(c['p95'])}{fmt(w['p50'])}{fmt(w['p95'])}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"synthetic": replay.synthetic, "results": results}, f, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("record", help="record live FRED/yfinance fixtures")
+    run_parser = sub.add_parser("run", help="replay fixtures and time page reruns")
+    run_parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES)
+    run_parser.add_argument("--cold", type=int, default=5, help="cold runs per page")
+    run_parser.add_argument("--warm", type=int, default=20, help="warm reruns per page")
+    run_parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_fixtures()
+    else:
+        run(args.pages, args.cold, args.warm, args.json)
+
+
+if __name__ == "__main__":
+    main()
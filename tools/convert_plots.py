@@ -0,0 +1,43 @@
+"""
+Convert the saved Plotly HTML figures in plots/ to compact specs in plots/specs.
+
+Each spec is a compressed .npz holding the figure layout and config as JSON and the
+trace arrays as typed numpy arrays. The dashboard draws them with st.plotly_chart when
+run with ALTERRA_PLOT_MODE=native.
+
+Usage: python tools/convert_plots.py [plot.html ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import PLOTS_DIR, convert_plot_file, load_figure_spec
+
+
+def main(plot_files):
+    if not plot_files:
+        plot_files = sorted(f for f in os.listdir(PLOTS_DIR) if f.endswith(".html"))
+
+    total_html = total_spec = 0
+    for plot_file in plot_files:
+        plot_file = os.path.basename(plot_file)
+        html_size = os.path.getsize(os.path.join(PLOTS_DIR, plot_file))
+        spec_path = convert_plot_file(plot_file)
+        spec_size = os.path.getsize(spec_path)
+
+        start = time.perf_counter()
+        load_figure_spec(plot_file)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        total_html += html_size
+        total_spec += spec_size
+        print(f"{plot_file:45s} {html_size / 1024:8.1f}KB -> {spec_size / 1024:7.1f}KB  (load {load_ms:.1f}ms)")
+
+    if total_html:
+        print(f"{'Total':45s} {total_html / 1024:8.1f}KB -> {total_spec / 1024:7.1f}KB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+"""
+Local stand-in for the FRED API, serving series from on-disk snapshots.
+
+Implements the two endpoints the dashboard relies on:
+
+    GET /fred/series/observations?series_id=...&api_key=...&file_type=json
+        [&observation_start=YYYY-MM-DD&observation_end=YYYY-MM-DD]
+    GET /fred/series?series_id=...&api_key=...&file_type=json
+
+with FRED's response and error shapes, plus configurable latency and error injection.
+Snapshots are parquet files with a date index and a "value" column, one per series
+(`python tools/benchmark.py record` writes them to cache/fixtures/fred).
+
+Point the dashboard at it with:
+    FRED_API_URL=http://localhost:8700/fred streamlit run Home.py
+
+Usage:
+    python tools/fred_server.py [--port 8700] [--snapshots DIR] [--synthetic]
+        [--latency-ms 50] [--jitter-ms 20] [--error-rate 0.01] [--timeout-rate 0.0]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SNAPSHOTS = os.path.join(os.environ.get("ALTERRA_CACHE_DIR", os.path.join(BASE_DIR, "cache")), "fixtures", "fred")
+# Realtime period reported for every observation, as FRED does for current vintages
+REALTIME = time.strftime("%Y-%m-%d")
+
+
+class SnapshotStore:
+    """
+    Series snapshots loaded on first request, with serialized responses memoized.
+    """
+
+    def __init__(self, directory, synthetic=False):
+        self.directory = directory
+        self.synthetic = synthetic
+        self._series = {}
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def series(self, series_id):
+        with self._lock:
+            if series_id in self._series:
+                return self._series[series_id]
+        path = os.path.join(self.directory, f"{series_id}.parquet")
+        if os.path.exists(path):
+            series = pd.read_parquet(path)["value"]
+        elif self.synthetic:
+            sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+            from benchmark import synthetic_series
+            series = synthetic_series(series_id)
+        else:
+            series = None
+        with self._lock:
+            self._series[series_id] = series
+        return series
+
+    def observations(self, series_id, start=None, end=None):
+        """
+        Encoded observations response body, or None for an unknown series.
+        """
+        key = (series_id, start, end)
+        with self._lock:
+            if key in self._responses:
+                return self._responses[key]
+        series = self.series(series_id)
+        if series is None:
+            return None
+        series = series.loc[start:end] if start or end else series
+        body = json.dumps({
+            "realtime_start": REALTIME,
+            "realtime_end": REALTIME,
+            "observation_start": start or "1776-07-04",
+            "observation_end": end or "9999-12-31",
+            "units": "lin",
+            "output_type": 1,
+            "file_type": "json",
+            "order_by": "observation_date",
+            "sort_order": "asc",
+            "count": len(series),
+            "offset": 0,
+            "limit": 100000,
+            "observations": [
+                {
+                    "realtime_start": REALTIME,
+                    "realtime_end": REALTIME,
+                    "date": date.strftime("%Y-%m-%d"),
+                    # FRED marks missing observations with "."
+                    "value": "." if np.isnan(value) else repr(float(value)),
+                }
+                for date, value in series.items()
+            ],
+        }).encode()
+        with self._lock:
+            self._responses[key] = body
+        return body
+
+    def metadata(self, series_id):
+        series = self.series(series_id)
+        if series is None:
+            return None
+        index = series.index
+        steps = np.diff(index.values[-13:]).astype("timedelta64[D]").astype(int) if len(index) > 1 else [1]
+        step = int(np.median(steps))
+        frequency, short = (("Daily", "D") if step < 7 else ("Weekly", "W") if step < 28
+                            else ("Monthly", "M") if step < 80 else ("Quarterly", "Q"))
+        return json.dumps({
+            "realtime_start": REALTIME,
+            "realtime_end": REALTIME,
+            "seriess": [{
+                "id": series_id,
+                "realtime_start": REALTIME,
+                "realtime_end": REALTIME,
+                "title": series_id,
+                "observation_start": index[0].strftime("%Y-%m-%d"),
+                "observation_end": index[-1].strftime("%Y-%m-%d"),
+                "frequency": frequency,
+                "frequency_short": short,
+                "units": "",
+                "seasonal_adjustment": "Not Seasonally Adjusted",
+                "last_updated": time.strftime("%Y-%m-%d %H:%M:%S-00"),
+                "popularity": 0,
+                "notes": "Served from a local snapshot",
+            }],
+        }).encode()
+
+
+def make_handler(store, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, timeout_rate=0.0, timeout_s=30.0):
+    class FredHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real service
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status, message):
+            self._send(status, json.dumps({"error_code": status, "error_message": message}).encode())
+
+        def do_GET(self):
+            # Injected latency, timeouts and server errors
+            delay = max(random.gauss(latency_ms, jitter_ms), 0) / 1000 if latency_ms or jitter_ms else 0
+            if delay:
+                time.sleep(delay)
+            roll = random.random()
+            if roll < timeout_rate:
+                time.sleep(timeout_s)
+            elif roll < timeout_rate + error_rate:
+                self._error(random.choice([429, 500, 503]), "Injected error from the local FRED stand-in.")
+                return
+
+            url = urlsplit(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if not params.get("api_key"):
+                self._error(400, "Bad Request.  Variable api_key is not set.")
+                return
+            series_id = params.get("series_id")
+            if not series_id:
+                self._error(400, "Bad Request.  Variable series_id is not set.")
+                return
+
+            endpoint = url.path.rstrip("/").split("/fred", 1)[-1]
+            if endpoint == "/series/observations":
+                body = store.observations(series_id, params.get("observation_start"), params.get("observation_end"))
+            elif endpoint == "/series":
+                body = store.metadata(series_id)
+            else:
+                self._error(404, "Not Found.")
+                return
+            if body is None:
+                self._error(400, "Bad Request.  The series does not exist.")
+                return
+            self._send(200, body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FredHandler
+
+
+def serve(port=8700, host="127.0.0.1", snapshots=DEFAULT_SNAPSHOTS, synthetic=False, **faults):
+    """
+    Start the stand-in on a background thread and return the server.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(SnapshotStore(snapshots, synthetic), **faults))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fred-stand-in", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--snapshots", default=DEFAULT_SNAPSHOTS, help="directory of <series_id>.parquet snapshots")
+    parser.add_argument("--synthetic", action="store_true", help="serve synthetic data for series without a snapshot")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/500/503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="how long hanging requests hang")
+    args = parser.parse_args()
+
+    server = serve(
+        args.port, args.host, args.snapshots, args.synthetic,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, timeout_s=args.timeout_s,
+    )
+    print(f"FRED stand-in on http://{args.host}:{args.port}/fred (snapshots: {args.snapshots})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Concurrent-session load generator for the dashboard pages.
+
+Simulates N concurrent sessions per page, each driven headlessly with Streamlit's AppTest
+in its own process (AppTest needs a process to itself, it cannot share one between
+threads). Sessions share the on-disk caches under CACHE_DIR, as the workers of a
+multi-process deployment would, but not in-process memoization. Every session replays a
+realistic widget interaction sequence for its page and each rerun is timed; a step that
+raises is counted as an error and the session carries on. The RSS of the session
+processes is sampled throughout, summed across sessions.
+
+Reports per page: reruns/s throughput, p50/p95/p99 rerun latency, RSS over time and errors.
+
+FRED and yfinance are replayed from tools/benchmark.py fixtures by default. Pass
+--fred-url to send FRED traffic to a running stand-in (tools/fred_server.py) instead.
+
+Usage:
+    python tools/load_test.py [--sessions 8] [--steps 10] [--think-ms 0] [--json out.json] [page ...]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils
+from benchmark import FixtureReplay
+from streamlit.testing.v1 import AppTest
+
+# Page -> interaction sequence of (widget kind, label or key, value), replayed in a loop.
+# "date_window" moves the start of a date range slider. Pages without widgets are simply rerun.
+SCENARIOS = {
+    "Home.py": [],
+    "pages/1. Economic Health Overview.py": [
+        ("selectbox", "data_type_selector", value) for value in [
+            "Regional GDP", "Regional Inflation, Average CPI", "Regional Unemployment Rate",
+            "Regional Expenditure", "PCA - Indicators Influence on Expenditures",
+        ]
+    ],
+    "pages/1.. USA Economic Health.py": [
+        ("selectbox", "overview_view", "Detailed"),
+        ("selectbox", "fiscal_metric", "Debt"),
+        ("selectbox", "fiscal_metric", "Revenue"),
+        ("multiselect", "Select Indicators", ["GDP", "Inflation"]),
+        ("selectbox", "overview_view", "Standard"),
+    ],
+    # Its view selectbox holds tuples, which AppTest cannot round-trip, so only the
+    # default GDP heatmap's threshold sliders are moved
+    "pages/2. Asset Class Behavior in Macroeconomic Context.py": [
+        ("slider", "gdp_threshold_0", -1.0),
+        ("slider", "gdp_threshold_1", 1.5),
+        ("slider", "gdp_threshold_2", 4.0),
+        ("slider", "gdp_threshold_0", 0.0),
+        ("slider", "gdp_threshold_1", 2.0),
+    ],
+    "pages/2.. SP500 Analysis.py": [
+        ("date_window", "sp500_date_range", start) for start in ["2000-01-01", "2020-01-01", "1960-01-01", "2023-06-01"]
+    ],
+    "pages/3. Bond Market.py": [
+        ("selectbox", "Shock Distribution Type", "Uniform"),
+        ("number_input", "Number of Simulations", 200_000),
+        ("number_input", "Volatility (Standard Deviation)", 2.0),
+        ("checkbox", "Show Transformation Matrix", True),
+        ("selectbox", "Horizon (Business Days)", 63),
+        ("selectbox", "Sampler", "Sobol"),
+        ("selectbox", "Shock Distribution Type", "Normal"),
+        ("selectbox", "Sampler", "Pseudo-random"),
+        ("number_input", "Number of Simulations", 100_000),
+        ("selectbox", "Horizon (Business Days)", 21),
+    ],
+}
+DEFAULT_PAGES = ["Home.py", "pages/1. Economic Health Overview.py", "pages/2.. SP500 Analysis.py", "pages/3. Bond Market.py"]
+
+
+def _find_widget(at, kind, name):
+    widgets = getattr(at, kind)
+    for widget in widgets:
+        if getattr(widget, "key", None) == name or widget.label == name:
+            return widget
+    raise LookupError(f"No {kind} {name!r}")
+
+
+def apply_step(at, step):
+    kind, name, value = step
+    if kind == "date_window":
+        widget = _find_widget(at, "slider", name)
+        widget.set_value((pd.Timestamp(value).date(), widget.value[1]))
+    else:
+        _find_widget(at, kind, name).set_value(value)
+
+
+def rss_mb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    # Exited, or no /proc on this platform
+    return float("nan")
+
+
+class RssSampler:
+    """
+    Samples the summed resident set size of the live processes in `pids` on a
+    background thread.
+    """
+
+    def __init__(self, pids, interval=0.5):
+        self.pids = pids
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self):
+        sizes = [mb for mb in map(rss_mb, self.pids) if mb == mb]
+        if not sizes:
+            return  # All exited
+        total = sum(sizes)
+        self.samples.append((round(time.perf_counter() - self._start, 2), round(total, 1)))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def install_fixtures(fred_url=None):
+    fetch_fred_observations = utils._fetch_fred_observations
+    FixtureReplay().install()
+    if fred_url:
+        # Only price bars are replayed; FRED goes over HTTP to the stand-in
+        utils.FRED_API_URL = fred_url.rstrip("/")
+        utils._fetch_fred_observations = fetch_fred_observations
+    os.chdir(BASE_DIR)  # pages resolve plots/ relative to the working directory
+
+
+def run_session(page, steps, think_ms, seed, timeout=180):
+    """
+    One simulated session: initial page load then `steps` interactions. Returns rerun
+    latencies in seconds, the number of steps that failed and their first error messages.
+    """
+    rng = random.Random(seed)
+    scenario = SCENARIOS.get(page, [])
+    at = AppTest.from_file(os.path.join(BASE_DIR, page), default_timeout=timeout)
+    latencies, errors, messages = [], 0, []
+    offset = rng.randrange(len(scenario)) if scenario else 0
+    for i in range(steps + 1):
+        try:
+            if i and scenario:
+                apply_step(at, scenario[(offset + i) % len(scenario)])
+            start = time.perf_counter()
+            at.run()
+            latencies.append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+        except Exception as e:
+            errors += 1
+            messages.append(f"step {i}: {e!r}"[:300])
+        if think_ms:
+            time.sleep(rng.expovariate(1000 / think_ms))
+    return latencies, errors, messages[:3]
+
+
+def session_main(args):
+    """
+    Entry point of one session process: set up, report ready, wait for the parent's
+    go on stdin, run, and write the result as JSON.
+    """
+    install_fixtures(args.fred_url)
+    with open(args.session_result + ".ready", "w"):
+        pass
+    sys.stdin.readline()
+    try:
+        latencies, errors, messages = run_session(args.session, args.steps, args.think_ms, args.seed)
+    except Exception as e:
+        latencies, errors, messages = [], args.steps + 1, [f"session: {e!r}"[:300]]
+    result = {"latencies": latencies, "errors": errors, "messages": messages, "finished": time.time()}
+    with open(args.session_result, "w") as f:
+        json.dump(result, f)
+
+
+def load_page(page, sessions, steps, think_ms, fred_url=None, timeout=600):
+    """
+    Run `sessions` concurrent sessions of `page`, each in its own Python process
+    (a plain interpreter, so background work the page starts shuts down normally).
+    Processes are started and importing before the clock starts; a session whose
+    process dies or times out counts all its steps as errors.
+    """
+    workdir = tempfile.mkdtemp(prefix="load_test-")
+    paths = [os.path.join(workdir, f"session-{seed}.json") for seed in range(sessions)]
+    processes = []
+    for seed, path in enumerate(paths):
+        command = [sys.executable, os.path.abspath(__file__), "--session", page, "--seed", str(seed),
+                   "--steps", str(steps), "--think-ms", str(think_ms), "--session-result", path]
+        if fred_url:
+            command += ["--fred-url", fred_url]
+        processes.append(subprocess.Popen(command, stdin=subprocess.PIPE, text=True))
+
+    deadline = time.time() + timeout
+    while time.time() < deadline and not all(
+        os.path.exists(path + ".ready") or process.poll() is not None for path, process in zip(paths, processes)
+    ):
+        time.sleep(0.1)
+
+    with RssSampler([p.pid for p in processes]) as sampler:
+        began = time.time()
+        for process in processes:
+            try:
+                process.stdin.write("go\n")
+                process.stdin.close()
+            except OSError:
+                pass  # Already exited
+        for process in processes:
+            try:
+                process.wait(timeout=max(began + timeout - time.time(), 1))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    results = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            result = {"latencies": [], "errors": steps + 1, "messages": ["session process died or timed out"],
+                      "finished": time.time()}
+        results.append(result)
+    shutil.rmtree(workdir, ignore_errors=True)
+    # Until the last session finished its reruns, not until its process exited
+    elapsed = max(r["finished"] for r in results) - began
+
+    latencies = np.concatenate([np.array(r["latencies"], dtype=float) for r in results]) * 1000
+    rss = [mb for _, mb in sampler.samples] or [float("nan")]
+    quantile = lambda q: round(float(np.percentile(latencies, q)), 1) if latencies.size else float("nan")
+    return {
+        "sessions": sessions,
+        "reruns": int(latencies.size),
+        "errors": int(sum(r["errors"] for r in results)),
+        "error_messages": [m for r in results for m in r["messages"]][:10],
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(latencies.size / elapsed, 2),
+        "p50_ms": quantile(50),
+        "p95_ms": quantile(95),
+        "p99_ms": quantile(99),
+        "rss_start_mb": rss[0],
+        "rss_peak_mb": max(rss),
+        "rss_end_mb": rss[-1],
+        "rss_samples": sampler.samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES)
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions per page")
+    parser.add_argument("--steps", type=int, default=10, help="interactions per session after the first load")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean think time between interactions")
+    parser.add_argument("--fred-url", help="FRED API base URL (e.g. a tools/fred_server.py stand-in)")
+    parser.add_argument("--json", help="also write results, including RSS samples, to this file")
+    # Internal: run as one session process of load_page
+    parser.add_argument("--session", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--session-result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.session:
+        return session_main(args)
+
+    results = {}
+    print(f"{'page':58s} {'rps':>7s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'session RSS start/peak/end MB':>30s} {'errors':>6s}")
+    for page in args.pages:
+        r = results[page] = load_page(page, args.sessions, args.steps, args.think_ms, args.fred_url)
+        rss = f"{r['rss_start_mb']:.0f}/{r['rss_peak_mb']:.0f}/{r['rss_end_mb']:.0f}"
+        print(f"{page:58s} {r['throughput_rps']:7.2f} {r['p50_ms']:7.1f}ms {r['p95_ms']:7.1f}ms {r['p99_ms']:7.1f}ms "
+              f"{rss:>30s} {r['errors']:6d}")
+        for message in r["error_messages"]:
+            print(f"    {message}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sessions": args.sessions, "steps": args.steps, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
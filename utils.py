@@ -0,0 +1,1446 @@
+import os
+import glob
+import gzip
+import html
+import json
+import hashlib
+import logging
+import re
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip variants are always available
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Paths shared by every page
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PLOTS_DIR = os.path.join(BASE_DIR, "plots")
+CACHE_DIR = os.environ.get("ALTERRA_CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+
+# Plot rendering mode:
+#   "inline" - each plot's HTML is sent to the browser inside the page (default)
+#   "static" - plots are served once by a local static file server and embedded by URL,
+#              so browsers cache them and reruns only send a small iframe tag
+#   "shared" - figures are drawn in one document per group with a single locally served
+#              Plotly.js bundle instead of one CDN script per iframe (works offline)
+#   "native" - figures are loaded from their compact specs in plots/specs and drawn with
+#              st.plotly_chart (see tools/convert_plots.py)
+PLOT_MODE = os.environ.get("ALTERRA_PLOT_MODE", "inline")
+STATIC_HOST = os.environ.get("ALTERRA_STATIC_HOST", "0.0.0.0")
+STATIC_PORT = int(os.environ.get("ALTERRA_STATIC_PORT", "8600"))
+# Address browsers use to reach the static server (set this when behind a proxy)
+STATIC_URL = os.environ.get("ALTERRA_STATIC_URL", f"http://localhost:{STATIC_PORT}").rstrip("/")
+# Compact figure specs (layout JSON + binary trace arrays) converted from plots/*.html
+FIGURE_SPECS_DIR = os.path.join(PLOTS_DIR, "specs")
+# Trace arrays shorter than this stay inline in the spec JSON
+SPEC_MIN_ARRAY_LENGTH = 16
+# Resized/recompressed image variants, named by a hash of the source content and options.
+# They live under the app's static/ folder so Streamlit serves them at app/static/assets/
+# (needs server.enableStaticServing, set in .streamlit/config.toml)
+APP_STATIC_DIR = os.path.join(BASE_DIR, "static")
+ASSET_VARIANTS_DIR = os.path.join(APP_STATIC_DIR, "assets")
+ASSET_URL_PREFIX = "app/static/assets"
+
+# Image assets shared by the pages: name -> source in plots/ and variant options
+IMAGE_ASSETS = {
+    "hero": {"source": "wheat_field.jpg", "size": (2200, 900)},
+    "sp500_gdp": {"source": "sp500_gdp.png", "max_width": 2200},
+    "oil_digger": {"source": "oil_digger.jpg", "max_width": 1200},
+    "wheat_field": {"source": "wheat_field.jpg", "max_width": 1200},
+}
+# Plotly.js bundled with the installed plotly package, written here on first use
+VENDOR_DIR = os.path.join(CACHE_DIR, "vendor")
+PLOTLY_BUNDLE = "plotly.min.js"
+# URL prefix -> directory served by the static server
+STATIC_ROUTES = {
+    "plots": PLOTS_DIR,
+    "vendor": VENDOR_DIR,
+}
+
+# FRED API Configuration
+FRED_API_KEY = os.environ.get("FRED_API_KEY", "4ac2266ac7d9766069d3d0755561988a")
+# Point at a local stand-in (tools/fred_server.py) for load tests and offline development
+FRED_API_URL = os.environ.get("FRED_API_URL", "https://api.stlouisfed.org/fred").rstrip("/")
+# Seconds to wait on a single FRED request
+FRED_TIMEOUT = 10
+
+# FRED series IDs for different Treasury maturities
+TREASURY_SERIES = {
+    '3M': 'DTB3',
+    '6M': 'DTB6',
+    '1Y': 'DGS1',
+    '2Y': 'DGS2',
+    '5Y': 'DGS5',
+    '10Y': 'DGS10',
+    '30Y': 'DGS30'
+}
+
+# Constant maturity yields for the full curve
+FULL_TREASURY_CURVE = {
+    '1M': 'DGS1MO',
+    '3M': 'DGS3MO',
+    '6M': 'DGS6MO',
+    '1Y': 'DGS1',
+    '2Y': 'DGS2',
+    '3Y': 'DGS3',
+    '5Y': 'DGS5',
+    '7Y': 'DGS7',
+    '10Y': 'DGS10',
+    '20Y': 'DGS20',
+    '30Y': 'DGS30'
+}
+
+# Seconds a cached FRED series stays fresh, keyed by series id.
+# Daily series refresh a few times a day, monthly/quarterly releases far less often.
+DEFAULT_FRED_TTL = 6 * 60 * 60
+FRED_SERIES_TTL = {
+    **{series_id: 6 * 60 * 60 for series_id in {**TREASURY_SERIES, **FULL_TREASURY_CURVE}.values()},
+    'CPIAUCSL': 24 * 60 * 60,
+    'UNRATE': 24 * 60 * 60,
+    'FEDFUNDS': 24 * 60 * 60,
+    'GDPC1': 7 * 24 * 60 * 60,
+    # IMF global price indexes used by the regime heatmaps, released monthly
+    **{series_id: 24 * 60 * 60 for series_id in ['PALLFNFINDEXM', 'PNRGINDEXM', 'PRAWMINDEXM', 'PMETAINDEXM', 'PFOODINDEXM']},
+}
+# Seconds to keep serving a stale series after a failed refresh before trying FRED again
+FRED_RETRY_AFTER = 5 * 60
+
+# Render timing: off unless ALTERRA_TIMING=1 or the page URL has ?timing=1
+TIMING_ENABLED = os.environ.get("ALTERRA_TIMING", "0") == "1"
+TIMING_LOG = os.environ.get("ALTERRA_TIMING_LOG", os.path.join(CACHE_DIR, "timings.jsonl"))
+
+# Feedback store: SQLite in WAL mode, exported to the CSV the team reads
+FEEDBACK_DB = os.environ.get("ALTERRA_FEEDBACK_DB", os.path.join(BASE_DIR, "feedback.db"))
+FEEDBACK_CSV = os.path.join(BASE_DIR, "user_feedback.csv")
+FEEDBACK_COLUMNS = ["Timestamp", "User Type", "Platform Value", "Additional Comments"]
+# Seconds after a submission before new rows are appended to FEEDBACK_CSV
+FEEDBACK_EXPORT_DELAY = 30
+# Entries kept in the in-process file cache; enough for every plot, spec and price store at once
+MEMORY_CACHE_SIZE = 512
+
+_fred_session = None
+_fred_session_lock = threading.Lock()
+# Shared by every session, so concurrent fetches reuse threads as well as connections
+_fetch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fred")
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _memory_get(key):
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            _memory_cache.move_to_end(key)
+    return cached
+
+
+def _memory_put(key, value):
+    with _memory_lock:
+        _memory_cache[key] = value
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _get_fred_session():
+    """
+    Process-wide HTTP session, so FRED requests reuse pooled keep-alive connections.
+    """
+    global _fred_session
+    with _fred_session_lock:
+        if _fred_session is None:
+            session = requests.Session()
+            retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _fred_session = session
+    return _fred_session
+
+
+def _fetch_fred_observations(series_id, api_key=FRED_API_KEY, timeout=FRED_TIMEOUT):
+    response = _get_fred_session().get(
+        f"{FRED_API_URL}/series/observations",
+        params={"series_id": series_id, "api_key": api_key, "file_type": "json"},
+        timeout=timeout,
+    )
+    payload = response.json()
+    if response.status_code != 200:
+        raise ValueError(payload.get("error_message", f"FRED returned HTTP {response.status_code}"))
+
+    observations = payload["observations"]
+    index = pd.to_datetime([obs["date"] for obs in observations])
+    # FRED marks missing observations with "."
+    values = pd.to_numeric([obs["value"] for obs in observations], errors="coerce")
+    return pd.Series(values, index=index, dtype=float)
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """
+    Exclusive inter-process lock, so only one Streamlit process refreshes a file at a time.
+    """
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _write_parquet_atomic(df, path):
+    # Write to a temp file in the same directory and rename over the target,
+    # so readers in other processes never see a half written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_json_atomic(data, path):
+    # Same temp file and rename as _write_parquet_atomic
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_arrow_atomic(table, path):
+    # Same temp file and rename as _write_parquet_atomic. Uncompressed, so readers can
+    # memory map the columns instead of decoding them
+    import pyarrow.feather as feather
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_parquet_cached(path):
+    """
+    Read a parquet file, reusing the in-memory copy while the file is unchanged on disk.
+    Returns (frame, mtime) or (None, None) when the file does not exist.
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None, None
+
+    cached = _memory_get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], mtime
+
+    df = pd.read_parquet(path)
+    _memory_put(path, (mtime, df))
+    return df, mtime
+
+
+def _fred_cache_path(series_id):
+    return os.path.join(CACHE_DIR, "fred", f"{series_id}.parquet")
+
+
+def get_fred_series(series_id, observation_start=None, ttl=None, api_key=FRED_API_KEY, timeout=FRED_TIMEOUT):
+    """
+    Fetch a FRED series through the shared on-disk cache.
+
+    The full history is stored as parquet under CACHE_DIR and reused by every session
+    and every Streamlit process until its TTL expires. If a refresh fails, the stale
+    copy is served and a `.retry` marker next to it holds off further attempts for
+    FRED_RETRY_AFTER seconds, so reruns don't each wait on FRED under the file lock.
+    """
+    if ttl is None:
+        ttl = FRED_SERIES_TTL.get(series_id, DEFAULT_FRED_TTL)
+    path = _fred_cache_path(series_id)
+    retry_path = path + ".retry"
+
+    def read_usable():
+        df, mtime = _read_parquet_cached(path)
+        if df is None:
+            return None
+        if time.time() - mtime < ttl:
+            return df
+        # Stale, but a recent refresh failed: keep serving it until the backoff runs out
+        try:
+            if time.time() - os.path.getmtime(retry_path) < FRED_RETRY_AFTER:
+                return df
+        except FileNotFoundError:
+            pass
+        return None
+
+    df = read_usable()
+    if df is None:
+        with _file_lock(path + ".lock"):
+            # Another process may have refreshed the file while we waited for the lock
+            df = read_usable()
+            if df is None:
+                try:
+                    series = _fetch_fred_observations(series_id, api_key, timeout)
+                    df = series.rename("value").to_frame()
+                    _write_parquet_atomic(df, path)
+                    if os.path.exists(retry_path):
+                        os.remove(retry_path)
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    df, _ = _read_parquet_cached(path)
+                    if df is None:
+                        raise
+                    with open(retry_path, "a"):
+                        os.utime(retry_path, None)
+                    logger.warning("Serving stale cache for %s, retrying in %ss: %s", series_id, FRED_RETRY_AFTER, e)
+
+    series = df["value"].rename(None)
+    if observation_start is not None:
+        series = series[series.index >= pd.to_datetime(observation_start)]
+    return series.copy()
+
+
+
+def get_treasury_rates_fred(start_date="2020-01-01", api_key=None, maturities=None, timeout=FRED_TIMEOUT):
+    """
+    Fetch Treasury rates using FRED API, one concurrent request per maturity.
+
+    `maturities` is a {label: series_id} mapping or a list of labels from
+    FULL_TREASURY_CURVE; it defaults to TREASURY_SERIES. Maturities that fail or
+    take longer than `timeout` seconds are left out, and listed in
+    `rates_df.attrs["missing"]`, so the rest of the curve still loads.
+    """
+    if not api_key:
+        raise ValueError("API key is required to fetch data from FRED.")
+
+    if maturities is None:
+        maturities = TREASURY_SERIES
+    elif not isinstance(maturities, dict):
+        maturities = {maturity: FULL_TREASURY_CURVE[maturity] for maturity in maturities}
+
+    futures = {
+        maturity: _fetch_executor.submit(get_fred_series, series_id, start_date, api_key=api_key, timeout=timeout)
+        for maturity, series_id in maturities.items()
+    }
+
+    # Every request runs at once, so the deadline is shared rather than per maturity
+    deadline = time.monotonic() + timeout
+    all_data = []
+    missing = []
+    for maturity, future in futures.items():
+        try:
+            series = future.result(timeout=max(deadline - time.monotonic(), 0))
+            series.name = f'year_{maturity}'
+            all_data.append(series)
+        except Exception as e:
+            # A timed out request keeps running and fills the cache for the next rerun
+            print(f"Could not fetch data for {maturity} Treasury: {e!r}")
+            missing.append(maturity)
+
+    if all_data:
+        rates_df = pd.concat(all_data, axis=1).ffill()
+    else:
+        rates_df = pd.DataFrame()
+    rates_df.attrs["missing"] = missing
+    return rates_df
+
+# Price history store
+PRICE_HISTORY_TTL = 60 * 60
+# Parts written before the store is compacted back into a single file
+PRICE_STORE_MAX_PARTS = 50
+# Rows of stored history needed to extend the rolling columns (365 day volume change)
+_DERIVED_LOOKBACK = 366
+
+
+def _price_store_dir(ticker):
+    safe_name = "".join(c if c.isalnum() else "_" for c in ticker)
+    return os.path.join(CACHE_DIR, "prices", safe_name)
+
+
+def _compute_derived(bars, context=None):
+    """
+    Log returns, rolling yearly volatility and yearly volume change for `bars`.
+    `context` is the tail of the stored history, used to warm up the rolling windows
+    so appended rows match a full recompute.
+    """
+    full = bars if context is None else pd.concat([context, bars])
+    close = full["Close"]
+    derived = pd.DataFrame(index=full.index)
+    derived["log_returns"] = np.log(close / close.shift(1))
+    # Rolling yearly volatility (252 trading days in a year), annualized
+    derived["yearly_volatility"] = derived["log_returns"].rolling(window=252).std() * np.sqrt(252)
+    # Volume pct change from a year ago
+    derived["volume_pct_change"] = full["Volume"].pct_change(365) * 100
+    return derived.iloc[len(full) - len(bars):]
+
+
+def _list_price_parts(store_dir):
+    return sorted(glob.glob(os.path.join(store_dir, "part-*.parquet")))
+
+
+def _read_price_parts(store_dir):
+    parts = _list_price_parts(store_dir)
+    if not parts:
+        return None
+    try:
+        key = tuple((part, os.stat(part).st_mtime) for part in parts)
+    except FileNotFoundError:
+        return _read_price_parts(store_dir)
+    cached = _memory_get(store_dir)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    frames = []
+    for part in parts:
+        df, _ = _read_parquet_cached(part)
+        if df is None:
+            # Removed by a concurrent compaction, re-list and start over
+            return _read_price_parts(store_dir)
+        frames.append(df)
+    history = pd.concat(frames) if len(frames) > 1 else frames[0]
+    # Later parts supersede earlier ones (the last bar of a day is re-fetched once final)
+    history = history[~history.index.duplicated(keep="last")]
+    _memory_put(store_dir, (key, history))
+    return history
+
+
+def _fetch_price_bars(ticker, start=None):
+    # Imported lazily, only needed when the store is refreshed
+    import yfinance as yf
+
+    if start is None:
+        return yf.Ticker(ticker).history(period="max")
+    return yf.Ticker(ticker).history(start=start)
+
+
+def _append_price_part(store_dir, bars):
+    parts = _list_price_parts(store_dir)
+    next_id = int(os.path.basename(parts[-1])[5:10]) + 1 if parts else 0
+    _write_parquet_atomic(bars, os.path.join(store_dir, f"part-{next_id:05d}.parquet"))
+
+
+def _compact_price_parts(store_dir, history):
+    old_parts = _list_price_parts(store_dir)
+    _append_price_part(store_dir, history)
+    for part in old_parts:
+        os.remove(part)
+        with _memory_lock:
+            _memory_cache.pop(part, None)
+
+
+def refresh_price_history(ticker):
+    """
+    Fetch only the bars newer than the last stored date and append them as a new part.
+    The last stored bar is fetched again, since it may have been written mid-session.
+    Returns the number of rows appended.
+    """
+    store_dir = _price_store_dir(ticker)
+    history = _read_price_parts(store_dir)
+
+    if history is None or history.empty:
+        bars = _fetch_price_bars(ticker)
+        context = None
+    else:
+        last_date = history.index[-1]
+        bars = _fetch_price_bars(ticker, start=last_date.strftime("%Y-%m-%d"))
+        bars = bars[bars.index >= last_date]
+        if bars.empty:
+            return 0
+        bars = bars[history.columns.intersection(bars.columns)]
+        stored_last = history.iloc[-1][bars.columns]
+        if len(bars) == 1 and bars.index[0] == last_date and bars.iloc[0].equals(stored_last):
+            return 0
+        context = history[history.index < bars.index[0]].iloc[-_DERIVED_LOOKBACK:][["Close", "Volume"]]
+
+    if bars.empty:
+        return 0
+    new_rows = bars.join(_compute_derived(bars, context))
+    _append_price_part(store_dir, new_rows)
+
+    if len(_list_price_parts(store_dir)) > PRICE_STORE_MAX_PARTS:
+        _compact_price_parts(store_dir, _read_price_parts(store_dir))
+    return len(new_rows)
+
+
+def get_price_history(ticker, ttl=PRICE_HISTORY_TTL):
+    """
+    Daily bars for `ticker` with derived log_returns, yearly_volatility and
+    volume_pct_change columns, served from the local append-only store.
+    The store is topped up with new bars at most once per `ttl` seconds.
+    """
+    store_dir = _price_store_dir(ticker)
+    marker = os.path.join(store_dir, "last_refresh")
+
+    def is_fresh():
+        try:
+            return time.time() - os.stat(marker).st_mtime < ttl
+        except FileNotFoundError:
+            return False
+
+    if not is_fresh():
+        with _file_lock(os.path.join(store_dir, "store.lock")):
+            if not is_fresh():
+                try:
+                    refresh_price_history(ticker)
+                    with open(marker, "w") as f:
+                        f.write(pd.Timestamp.now().isoformat())
+                except Exception as e:
+                    if not _list_price_parts(store_dir):
+                        raise
+                    print(f"Serving stored history for {ticker}: {e}")
+
+    return _read_price_parts(store_dir)
+
+
+# Image assets
+def _file_digest(path):
+    """
+    sha1 of a file's content, memoized by mtime.
+    """
+    mtime = os.stat(path).st_mtime
+    key = ("digest", path)
+    cached = _memory_get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    digest = digest.hexdigest()
+    _memory_put(key, (mtime, digest))
+    return digest
+
+
+def image_variant(source_path, size=None, max_width=None, fmt="WEBP", quality=80):
+    """
+    Path of a resized and recompressed copy of an image, built once.
+
+    size resizes to exactly (width, height); max_width only scales down, keeping the
+    aspect ratio. Variants are named by the source content hash and the options, so an
+    edited source gets a new variant and concurrent sessions never write the same file
+    twice. Falls back to JPEG if Pillow was built without WebP.
+    """
+    from PIL import Image, features
+
+    if fmt == "WEBP" and not features.check("webp"):
+        fmt = "JPEG"
+    options = f"{size}|{max_width}|{fmt}|{quality}"
+    key = hashlib.sha1(f"{_file_digest(source_path)}|{options}".encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    path = os.path.join(ASSET_VARIANTS_DIR, f"{stem}-{key}.{'jpg' if fmt == 'JPEG' else fmt.lower()}")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(ASSET_VARIANTS_DIR, exist_ok=True)
+    with _file_lock(os.path.join(CACHE_DIR, "locks", os.path.basename(path) + ".lock")):
+        if os.path.exists(path):
+            return path
+        image = Image.open(source_path)
+        if size is not None:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        elif max_width is not None and image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.Resampling.LANCZOS)
+        if fmt == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        fd, tmp_path = tempfile.mkstemp(dir=ASSET_VARIANTS_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            if fmt == "JPEG":
+                image.save(f, "JPEG", quality=quality, optimize=True, progressive=True)
+            else:
+                image.save(f, fmt, quality=quality, method=6)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    return path
+
+
+def get_image_asset(name):
+    """
+    Path of the prebuilt variant of a registered image asset, looked up once per source mtime.
+    """
+    spec = IMAGE_ASSETS[name]
+    source_path = os.path.join(PLOTS_DIR, spec["source"])
+    mtime = os.stat(source_path).st_mtime
+    key = ("asset", name)
+    cached = _memory_get(key)
+    if cached is not None and cached[0] == mtime and os.path.exists(cached[1]):
+        return cached[1]
+    options = {k: v for k, v in spec.items() if k != "source"}
+    path = image_variant(source_path, **options)
+    _memory_put(key, (mtime, path))
+    return path
+
+
+def asset_url(name):
+    """
+    URL of an image asset for page CSS and markdown. The browser fetches and caches it
+    once, and only on pages that actually show it.
+    """
+    return f"{ASSET_URL_PREFIX}/{quote(os.path.basename(get_image_asset(name)))}"
+
+
+# Plot downsampling
+def minmax_indices(y, n_out):
+    """
+    Positions of the minimum and maximum of `y` in each of n_out // 2 equal buckets,
+    in order. Keeps every spike, so suits noisy series like returns.
+    """
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+    bucket = (np.arange(n) * n_buckets) // n
+    # Sorted by bucket then value: each bucket's first entry is its min, last its max
+    order = np.lexsort((y, bucket))
+    bounds = np.searchsorted(bucket[order], np.arange(n_buckets + 1))
+    picked = np.concatenate([order[bounds[:-1]], order[bounds[1:] - 1]])
+    return np.unique(picked)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: positions of n_out points that keep the visual shape
+    of the line (x, y). First and last points are always kept.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Interior points split into n_out - 2 buckets
+    edges = (np.arange(n_out - 1) * (n - 2)) // (n_out - 2) + 1
+    edges[-1] = n - 1
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket (or the last point) is the triangle's third vertex
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def downsample_series(series, n_out, method="lttb"):
+    """
+    At most about n_out points of `series` (NaNs dropped) chosen to preserve its shape.
+    method is "lttb" for smooth lines or "minmax" to keep every local extreme.
+    """
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+    if method == "minmax":
+        positions = minmax_indices(series.values, n_out)
+    elif method == "lttb":
+        positions = lttb_indices(series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else series.index,
+                                 series.values, n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return series.iloc[positions]
+
+
+# Static plot serving
+_static_server = None
+_static_server_lock = threading.Lock()
+
+
+def _static_etag(stat_result):
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _compressed_variant(source_path, route, name, encoding):
+    """
+    Path of a pre-compressed copy of `source_path`, rebuilt when the source changes.
+    """
+    suffix = {"br": ".br", "gzip": ".gz"}[encoding]
+    variant_path = os.path.join(CACHE_DIR, "static", route, name + suffix)
+    try:
+        if os.stat(variant_path).st_mtime >= os.stat(source_path).st_mtime:
+            return variant_path
+    except FileNotFoundError:
+        pass
+
+    with open(source_path, "rb") as f:
+        data = f.read()
+    compressed = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, compresslevel=9)
+    os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(variant_path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, variant_path)
+    return variant_path
+
+
+def precompress_static_files():
+    """
+    Build gzip (and brotli, when installed) variants of every served text file.
+    """
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for route, directory in STATIC_ROUTES.items():
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if os.path.splitext(name)[1] in (".html", ".js", ".css", ".json", ".svg"):
+                for encoding in encodings:
+                    _compressed_variant(os.path.join(directory, name), route, name, encoding)
+
+
+class _StaticFileHandler(BaseHTTPRequestHandler):
+    """
+    Serves STATIC_ROUTES with ETag/Last-Modified revalidation and pre-compressed variants.
+    """
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _resolve(self):
+        path = unquote(urlsplit(self.path).path).lstrip("/")
+        route, _, name = path.partition("/")
+        directory = STATIC_ROUTES.get(route)
+        if directory is None or not name:
+            return None, None, None
+        full_path = os.path.realpath(os.path.join(directory, name))
+        if not full_path.startswith(os.path.realpath(directory) + os.sep) or not os.path.isfile(full_path):
+            return None, None, None
+        return full_path, route, name
+
+    def _serve(self, send_body):
+        full_path, route, name = self._resolve()
+        if full_path is None:
+            self.send_error(404, "File not found")
+            return
+
+        stat_result = os.stat(full_path)
+        etag = _static_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+        not_modified = False
+        if self.headers.get("If-None-Match"):
+            not_modified = etag in [tag.strip() for tag in self.headers["If-None-Match"].split(",")]
+        elif self.headers.get("If-Modified-Since"):
+            try:
+                not_modified = parsedate_to_datetime(self.headers["If-Modified-Since"]).timestamp() >= int(stat_result.st_mtime)
+            except (TypeError, ValueError):
+                pass
+
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+
+        body_path = full_path
+        content_encoding = None
+        accepted = self.headers.get("Accept-Encoding", "")
+        if not not_modified and os.path.splitext(name)[1] in (".html", ".js", ".css", ".json", ".svg"):
+            for encoding in (["br"] if brotli is not None else []) + ["gzip"]:
+                if encoding in accepted:
+                    body_path = _compressed_variant(full_path, route, name, encoding)
+                    content_encoding = encoding
+                    break
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        # Versioned URLs (?v=...) never change content, everything else is revalidated
+        if "v=" in urlsplit(self.path).query:
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if not_modified:
+            self.end_headers()
+            return
+
+        self.send_header("Content-Type", content_type)
+        if content_encoding:
+            self.send_header("Content-Encoding", content_encoding)
+        self.send_header("Content-Length", str(os.path.getsize(body_path)))
+        self.end_headers()
+        if send_body:
+            with open(body_path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def ensure_static_server():
+    """
+    Start the static file server once per process. If the port is already taken,
+    another Streamlit process on this host is serving the same files.
+    """
+    global _static_server
+    with _static_server_lock:
+        if _static_server is not None:
+            return
+        try:
+            ensure_plotly_bundle()
+            precompress_static_files()
+            server = ThreadingHTTPServer((STATIC_HOST, STATIC_PORT), _StaticFileHandler)
+        except OSError as e:
+            print(f"Static server not started on port {STATIC_PORT} ({e}); assuming it is already running")
+            _static_server = False
+            return
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="static-server", daemon=True).start()
+        _static_server = server
+
+
+def static_url(route, name):
+    """
+    Cache-busting URL of a file served by the static server.
+    """
+    path = os.path.join(STATIC_ROUTES[route], name)
+    version = _static_etag(os.stat(path)).strip('"')
+    return f"{STATIC_URL}/{route}/{quote(name)}?v={version}"
+
+
+def _read_text_cached(path):
+    mtime = os.stat(path).st_mtime
+    cached = _memory_get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    _memory_put(path, (mtime, text))
+    return text
+
+
+def render_plot(plot_file, height, width=None, scrolling=False, container_style=None, key=None):
+    """
+    Embed a saved plot from plots/ according to PLOT_MODE.
+
+    In "static" mode the browser loads the plot by URL from the static server, so only
+    a small iframe tag goes over the websocket on each rerun. `key` is needed in "native"
+    mode when the same plot appears more than once on a page. Raises FileNotFoundError
+    if the plot does not exist.
+    """
+    with timed_section(f"plot {plot_file}"):
+        _render_plot(plot_file, height, width=width, scrolling=scrolling, container_style=container_style, key=key)
+
+
+def _render_plot(plot_file, height, width=None, scrolling=False, container_style=None, key=None):
+    path = os.path.join(PLOTS_DIR, plot_file)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    if PLOT_MODE == "native" and os.path.exists(figure_spec_path(plot_file)):
+        spec = load_figure_spec(plot_file)
+        st.plotly_chart(spec.to_figure(), use_container_width=width is None, config=spec.config, key=key)
+        return
+
+    if PLOT_MODE == "shared":
+        render_plot_group([{"file": plot_file, "height": height}], width=width, scrolling=scrolling,
+                          container_style=container_style)
+        return
+
+    if PLOT_MODE == "static":
+        ensure_static_server()
+        frame_width = f"{width}px" if width else "100%"
+        content = (
+            f'<iframe src="{html.escape(static_url("plots", plot_file))}" width="{frame_width}" '
+            f'height="{height}" scrolling="{"yes" if scrolling else "no"}" style="border: none;"></iframe>'
+        )
+    else:
+        content = _read_text_cached(path)
+
+    if container_style:
+        content = f'<div style="{container_style}">{content}</div>'
+    components.html(content, height=height, width=width, scrolling=scrolling)
+
+
+def ensure_plotly_bundle():
+    """
+    Write the Plotly.js bundle shipped with the plotly package into VENDOR_DIR, once per version.
+    """
+    import plotly
+    from plotly.offline import get_plotlyjs
+
+    path = os.path.join(VENDOR_DIR, PLOTLY_BUNDLE)
+    version_path = path + ".version"
+    try:
+        with open(version_path) as f:
+            if f.read() == plotly.__version__ and os.path.exists(path):
+                return path
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=VENDOR_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+    os.replace(tmp_path, path)
+    with open(version_path, "w") as f:
+        f.write(plotly.__version__)
+    return path
+
+
+def _plot_figure_json(plot_file):
+    """
+    Raw `{"data": ..., "layout": ..., "config": ...}` JSON of a saved plot, cut out of its
+    Plotly.newPlot(...) call without re-serializing. Memoized by file mtime.
+    """
+    path = os.path.join(PLOTS_DIR, plot_file)
+    text = _read_text_cached(path)
+    mtime = os.stat(path).st_mtime
+    key = ("figure", path)
+    cached = _memory_get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    start = text.find("Plotly.newPlot(")
+    if start < 0:
+        raise ValueError(f"No Plotly figure found in {plot_file}")
+    decoder = json.JSONDecoder()
+    pos = start + len("Plotly.newPlot(")
+    parts = []
+    # Arguments are: div id, data, layout, config
+    for _ in range(4):
+        while text[pos] in " \t\r\n,":
+            pos += 1
+        _, end = decoder.raw_decode(text, pos)
+        parts.append(text[pos:end])
+        pos = end
+    figure_json = '{"data": %s, "layout": %s, "config": %s}' % tuple(parts[1:])
+
+    _memory_put(key, (mtime, figure_json))
+    return figure_json
+
+
+def load_plot_figure(plot_file):
+    """
+    Figure dict (data, layout, config) of a saved plot in plots/.
+    """
+    return json.loads(_plot_figure_json(plot_file))
+
+
+# Approximate space taken by a group entry's title and description
+_GROUP_TITLE_HEIGHT = 50
+_GROUP_DESCRIPTION_HEIGHT = 80
+
+
+def render_plot_group(plots, width=None, scrolling=False, container_style=None):
+    """
+    Draw several saved plots in one document that loads Plotly.js once.
+
+    `plots` is a list of dicts with "file" and "height", and optionally "title" and
+    "description". The bundle is the locally vendored copy served by the static
+    server, so no CDN is needed; figures are drawn as they scroll into view.
+    """
+    with timed_section(f"plot group ({len(plots)} plots)"):
+        _render_plot_group(plots, width=width, scrolling=scrolling, container_style=container_style)
+
+
+def _render_plot_group(plots, width=None, scrolling=False, container_style=None):
+    for plot in plots:
+        path = os.path.join(PLOTS_DIR, plot["file"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+
+    ensure_static_server()
+    bundle_url = static_url("vendor", PLOTLY_BUNDLE)
+
+    sections = []
+    figures = []
+    total_height = 0
+    for i, plot in enumerate(plots):
+        header = ""
+        if plot.get("title"):
+            header += f'<h3 class="plot-title">{html.escape(plot["title"])}</h3>'
+            total_height += _GROUP_TITLE_HEIGHT
+        if plot.get("description"):
+            header += f'<div class="plot-description">{plot["description"]}</div>'
+            total_height += _GROUP_DESCRIPTION_HEIGHT
+        sections.append(f'<section>{header}<div id="plot-{i}" style="min-height: {plot["height"]}px;"></div></section>')
+        figures.append(_plot_figure_json(plot["file"]).replace("</", "<\\/"))
+        total_height += plot["height"]
+
+    body = "".join(sections)
+    if container_style:
+        body = f'<div style="{container_style}">{body}</div>'
+
+    content = f"""
+    <script src="{html.escape(bundle_url)}"></script>
+    <style>
+        body {{ margin: 0; font-family: "Source Sans Pro", sans-serif; }}
+        .plot-title {{ color: #2E7D32; font-size: 1.5rem; font-weight: 600; margin: 1rem 0 0.5rem; }}
+        .plot-description {{ background: #F8F9FA; border-left: 4px solid #2E7D32; padding: 0.75rem 1rem;
+                             margin-bottom: 1rem; color: #262626; }}
+    </style>
+    {body}
+    <script>
+        var figures = [{",".join(figures)}];
+        function draw(i) {{
+            var fig = figures[i];
+            if (!fig) return;
+            figures[i] = null;
+            Plotly.newPlot("plot-" + i, fig.data, fig.layout, fig.config);
+        }}
+        if ("IntersectionObserver" in window) {{
+            var observer = new IntersectionObserver(function(entries) {{
+                entries.forEach(function(entry) {{
+                    if (entry.isIntersecting) {{
+                        observer.unobserve(entry.target);
+                        draw(parseInt(entry.target.id.split("-")[1]));
+                    }}
+                }});
+            }}, {{rootMargin: "400px"}});
+            figures.forEach(function(_, i) {{ observer.observe(document.getElementById("plot-" + i)); }});
+        }} else {{
+            figures.forEach(function(_, i) {{ draw(i); }});
+        }}
+    </script>
+    """
+    components.html(content, height=total_height, width=width, scrolling=scrolling)
+
+
+# Compact figure specs
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+
+
+def figure_spec_path(plot_file):
+    return os.path.join(FIGURE_SPECS_DIR, os.path.splitext(plot_file)[0] + ".npz")
+
+
+def _pack_array(values):
+    """
+    Typed array for a JSON list of trace values, or None if it should stay as JSON.
+    """
+    if len(values) < SPEC_MIN_ARRAY_LENGTH:
+        return None
+    if all(isinstance(v, str) for v in values):
+        # Naive ISO dates are stored as datetime64, which plotly serializes back to the same dates
+        if all(_ISO_DATE.match(v) for v in values):
+            return np.array(values, dtype="datetime64[ns]")
+        return np.array(values)
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) or v is None for v in values):
+        array = np.array([np.nan if v is None else v for v in values])
+        if array.dtype.kind == "i":
+            array = array.astype(np.result_type(np.min_scalar_type(array.min()), np.min_scalar_type(array.max())))
+        return array
+    if all(isinstance(v, list) for v in values):
+        try:
+            array = np.array(values, dtype=float)
+        except (TypeError, ValueError):
+            return None
+        return array if array.ndim == 2 else None
+    return None
+
+
+def _pack_value(value, arrays):
+    if isinstance(value, dict):
+        return {k: _pack_value(v, arrays) for k, v in value.items()}
+    if isinstance(value, list):
+        array = _pack_array(value)
+        if array is not None:
+            key = f"a{len(arrays)}"
+            arrays[key] = array
+            return {"__array__": key}
+        return [_pack_value(v, arrays) for v in value]
+    return value
+
+
+def _unpack_value(value, arrays):
+    if isinstance(value, dict):
+        if "__array__" in value:
+            return arrays[value["__array__"]]
+        return {k: _unpack_value(v, arrays) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack_value(v, arrays) for v in value]
+    return value
+
+
+def save_figure_spec(figure, path):
+    """
+    Store a figure dict (data, layout, config) as compressed npz: trace arrays as typed
+    arrays and everything else as a small JSON document.
+    """
+    arrays = {}
+    spec = {
+        "data": [_pack_value(trace, arrays) for trace in figure["data"]],
+        "layout": figure.get("layout", {}),
+        "config": figure.get("config", {}),
+    }
+    arrays["__spec__"] = np.frombuffer(json.dumps(spec, separators=(",", ":")).encode("utf-8"), dtype=np.uint8)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def convert_plot_file(plot_file):
+    """
+    Convert plots/<plot_file> (a saved Plotly HTML page) to its compact spec. Returns the spec path.
+    """
+    path = figure_spec_path(plot_file)
+    save_figure_spec(load_plot_figure(plot_file), path)
+    return path
+
+
+class FigureSpec:
+    """
+    A saved figure with its trace arrays loaded as numpy arrays.
+    """
+
+    def __init__(self, data, layout, config):
+        self.data = data
+        self.layout = layout
+        self.config = config
+        self._figure = None
+        self._figure_lock = threading.Lock()
+
+    @property
+    def trace_names(self):
+        return [trace.get("name") for trace in self.data]
+
+    def trace(self, name):
+        """
+        First trace called `name`.
+        """
+        for trace in self.data:
+            if trace.get("name") == name:
+                return trace
+        raise KeyError(name)
+
+    def to_figure(self):
+        """
+        plotly Figure of the spec, built once and shared.
+        """
+        with self._figure_lock:
+            if self._figure is None:
+                import plotly.graph_objects as go
+                self._figure = go.Figure({"data": self.data, "layout": self.layout}, skip_invalid=True)
+        return self._figure
+
+
+def load_figure_spec(plot_file):
+    """
+    FigureSpec for a plot converted with convert_plot_file, memoized by file mtime.
+    """
+    path = figure_spec_path(plot_file)
+    mtime = os.stat(path).st_mtime
+    key = ("spec", path)
+    cached = _memory_get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = {key: npz[key] for key in npz.files}
+    spec = json.loads(arrays.pop("__spec__").tobytes().decode("utf-8"))
+    figure_spec = FigureSpec(
+        [_unpack_value(trace, arrays) for trace in spec["data"]],
+        spec["layout"],
+        spec["config"],
+    )
+    _memory_put(key, (mtime, figure_spec))
+    return figure_spec
+
+
+# Feedback store
+_feedback_local = threading.local()
+_feedback_export_timer = None
+_feedback_export_lock = threading.Lock()
+
+
+def _feedback_connection():
+    """
+    This thread's connection to the feedback database, created (and migrated from
+    FEEDBACK_CSV) on first use.
+    """
+    conn = getattr(_feedback_local, "conn", None)
+    if conn is not None:
+        return conn
+
+    conn = sqlite3.connect(FEEDBACK_DB, timeout=30)
+    # WAL lets readers and the exporter run alongside writers; each insert is one short transaction
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _file_lock(os.path.join(CACHE_DIR, "locks", "feedback.lock")):
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, user_type TEXT, "
+                "platform_value TEXT, comments TEXT)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'csv_exported_id'").fetchone()
+            if migrated is None:
+                # First run: import existing CSV rows, which are then already exported
+                if os.path.exists(FEEDBACK_CSV):
+                    rows = pd.read_csv(FEEDBACK_CSV, dtype=str, keep_default_na=False)
+                    conn.executemany(
+                        "INSERT INTO feedback (timestamp, user_type, platform_value, comments) VALUES (?, ?, ?, ?)",
+                        rows.reindex(columns=FEEDBACK_COLUMNS, fill_value="").itertuples(index=False, name=None),
+                    )
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM feedback").fetchone()[0]
+                conn.execute("INSERT INTO meta VALUES ('csv_exported_id', ?)", (str(last_id),))
+    _feedback_local.conn = conn
+    return conn
+
+
+def add_feedback(user_type, platform_value, comments, timestamp=None):
+    """
+    Append one feedback entry. A single-row insert, so the cost does not grow with the
+    number of entries, and concurrent submissions from any process are serialized by SQLite.
+    """
+    timestamp = timestamp or time.strftime("%Y-%m-%d %H:%M:%S")
+    conn = _feedback_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO feedback (timestamp, user_type, platform_value, comments) VALUES (?, ?, ?, ?)",
+            (timestamp, user_type, platform_value, comments),
+        )
+    schedule_feedback_export()
+
+
+def read_feedback():
+    """
+    All feedback entries as a DataFrame with FEEDBACK_COLUMNS.
+    """
+    df = pd.read_sql_query(
+        "SELECT timestamp, user_type, platform_value, comments FROM feedback ORDER BY id",
+        _feedback_connection(),
+    )
+    df.columns = FEEDBACK_COLUMNS
+    return df
+
+
+def export_feedback_csv():
+    """
+    Append entries not yet in FEEDBACK_CSV to it and return how many were written.
+    Only new rows are read and written; the file is rebuilt in full if it has gone missing.
+    """
+    conn = _feedback_connection()
+    with _file_lock(os.path.join(CACHE_DIR, "locks", "feedback_csv.lock")):
+        exported_id = int(conn.execute("SELECT value FROM meta WHERE key = 'csv_exported_id'").fetchone()[0])
+        if not os.path.exists(FEEDBACK_CSV):
+            exported_id = 0
+        rows = pd.read_sql_query(
+            "SELECT id, timestamp, user_type, platform_value, comments FROM feedback WHERE id > ? ORDER BY id",
+            conn,
+            params=(exported_id,),
+        )
+        if rows.empty and os.path.exists(FEEDBACK_CSV):
+            return 0
+
+        new_rows = rows.drop(columns="id")
+        new_rows.columns = FEEDBACK_COLUMNS
+        if exported_id == 0:
+            # Full rebuild goes through a temp file so readers never see a partial CSV
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(FEEDBACK_CSV), suffix=".tmp")
+            with os.fdopen(fd, "w", newline="") as f:
+                new_rows.to_csv(f, index=False)
+            os.replace(tmp_path, FEEDBACK_CSV)
+        else:
+            new_rows.to_csv(FEEDBACK_CSV, mode="a", header=False, index=False)
+
+        if not rows.empty:
+            with conn:
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'csv_exported_id'", (str(rows["id"].iloc[-1]),))
+    return len(rows)
+
+
+def _run_feedback_export():
+    global _feedback_export_timer
+    with _feedback_export_lock:
+        _feedback_export_timer = None
+    try:
+        export_feedback_csv()
+    except Exception as e:
+        print(f"Feedback CSV export failed: {e}")
+
+
+def schedule_feedback_export(delay=FEEDBACK_EXPORT_DELAY):
+    """
+    Export to CSV in the background after `delay` seconds, batching submissions in between.
+    """
+    global _feedback_export_timer
+    with _feedback_export_lock:
+        if _feedback_export_timer is None:
+            _feedback_export_timer = threading.Timer(delay, _run_feedback_export)
+            _feedback_export_timer.daemon = True
+            _feedback_export_timer.start()
+
+
+# Render timing
+_timing_log_lock = threading.Lock()
+
+
+def _payload_counter(ctx):
+    """
+    Wrap the session's message queue so it counts the bytes of every message sent to
+    the browser. Returns the counting function, or None if this Streamlit has no hook.
+    """
+    enqueue = getattr(ctx, "_enqueue", None)
+    if enqueue is None:
+        return None
+    if not hasattr(enqueue, "payload_bytes"):
+        def counting_enqueue(msg, _enqueue=enqueue):
+            counting_enqueue.payload_bytes += msg.ByteSize()
+            _enqueue(msg)
+        counting_enqueue.payload_bytes = 0
+        ctx._enqueue = counting_enqueue
+        enqueue = counting_enqueue
+    return enqueue
+
+
+class PageTiming:
+    """
+    Wall time and payload bytes of the named sections of one page run.
+    """
+
+    def __init__(self, page, ctx):
+        self.page = page
+        self.session_id = getattr(ctx, "session_id", None)
+        self.counter = _payload_counter(ctx)
+        self.started = time.time()
+        self.start_bytes = self.payload_bytes()
+        self.sections = []
+
+    def payload_bytes(self):
+        return self.counter.payload_bytes if self.counter is not None else 0
+
+    def record(self, name, seconds, payload_bytes):
+        self.sections.append({
+            "section": name,
+            "ms": round(seconds * 1000, 2),
+            "bytes": payload_bytes if self.counter is not None else None,
+        })
+
+    def summary(self):
+        return {
+            "ts": self.started,
+            "page": self.page,
+            "session": self.session_id,
+            "total_ms": round((time.time() - self.started) * 1000, 2),
+            "total_bytes": self.payload_bytes() - self.start_bytes if self.counter is not None else None,
+            "sections": self.sections,
+        }
+
+
+def _current_timing():
+    if get_script_run_ctx() is None:
+        return None
+    return st.session_state.get("_page_timing")
+
+
+def start_page_timing(page):
+    """
+    Begin timing this run of `page`. Call at the top of the page, after set_page_config;
+    sections are only recorded when timing is enabled.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    enabled = TIMING_ENABLED or st.query_params.get("timing") == "1"
+    st.session_state["_page_timing"] = PageTiming(page, ctx) if enabled else None
+
+
+@contextmanager
+def timed_section(name):
+    """
+    Record the wall time and bytes sent to the browser by the enclosed block.
+    A no-op unless start_page_timing enabled timing for this run.
+    """
+    timing = _current_timing()
+    if timing is None:
+        yield
+        return
+    start_bytes = timing.payload_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.record(name, time.perf_counter() - start, timing.payload_bytes() - start_bytes)
+
+
+def timed(name=None):
+    """
+    Decorator form of timed_section, named after the function by default.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_section(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish_page_timing():
+    """
+    Append this run's timings to TIMING_LOG as one JSON line and show them in a sidebar panel.
+    Call at the end of the page.
+    """
+    timing = _current_timing()
+    if timing is None:
+        return
+    st.session_state["_page_timing"] = None
+    summary = timing.summary()
+
+    os.makedirs(os.path.dirname(TIMING_LOG), exist_ok=True)
+    with _timing_log_lock, open(TIMING_LOG, "a") as f:
+        f.write(json.dumps(summary) + "\n")
+
+    with st.sidebar.expander("Render timings", expanded=True):
+        st.caption(
+            f"{summary['page']}: {summary['total_ms']:.0f} ms"
+            + (f", {summary['total_bytes'] / 1024:.0f} KB sent" if summary["total_bytes"] is not None else "")
+        )
+        if summary["sections"]:
+            sections = pd.DataFrame(summary["sections"]).set_index("section")
+            if sections["bytes"].notna().any():
+                sections["KB"] = (sections["bytes"] / 1024).round(1)
+            st.dataframe(sections.drop(columns="bytes"), use_container_width=True)